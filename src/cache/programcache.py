@@ -0,0 +1,108 @@
+import gc
+import hashlib
+import os
+import pickle
+import sys
+from parser.stmt import Stmt
+from typing import Any, Callable, List, Optional, TypeVar
+
+
+CACHE_DIRECTORY = "__tntcache__"
+CACHE_SUFFIX = ".tntc"
+
+# everything that shapes a resolved program; editing any of these makes
+# all existing entries stale
+FRONT_END_PACKAGES = ("cache", "parser", "resolver", "scanner")
+
+T = TypeVar("T")
+
+
+class ProgramCache:
+  # one entry per script, stored next to it like __pycache__, holding the
+  # resolved statements; the resolver's results travel inside the nodes
+  fingerprint: Optional[bytes] = None
+
+
+  def __init__(self, script_path: str):
+    directory, name = os.path.split(os.path.abspath(script_path))
+    self.script_path = script_path
+    self.entry_path = os.path.join(
+      directory, CACHE_DIRECTORY, name + CACHE_SUFFIX
+    )
+    self.key: Optional[bytes] = None
+
+
+  def load(self) -> Optional[List[Stmt]]:
+    try:
+      self.key = self._key()
+
+      with open(self.entry_path, "rb") as file:
+        if file.readline().rstrip(b"\n") != self.key:
+          return None
+        return _without_gc(pickle.load, file)
+    except Exception:
+      # a damaged entry can fail to unpickle in about any way, it is only
+      # a miss and the script gets scanned again
+      return None
+
+
+  def store(self, statements: List[Stmt]):
+    temporary = f"{self.entry_path}.{os.getpid()}"
+
+    try:
+      key = self.key if self.key is not None else self._key()
+      payload = _without_gc(
+        pickle.dumps, statements, pickle.HIGHEST_PROTOCOL
+      )
+
+      os.makedirs(os.path.dirname(self.entry_path), exist_ok = True)
+      with open(temporary, "wb") as file:
+        file.write(key + b"\n")
+        file.write(payload)
+      os.replace(temporary, self.entry_path)
+    except RecursionError:
+      # deeply nested programs are just not cached
+      return
+    except OSError:
+      if os.path.exists(temporary):
+        os.remove(temporary)
+
+
+  def _key(self) -> bytes:
+    digest = hashlib.sha256(ProgramCache._fingerprint())
+    with open(self.script_path, "rb") as file:
+      digest.update(hashlib.file_digest(file, "sha256").digest())
+
+    return digest.hexdigest().encode()
+
+
+  @staticmethod
+  def _fingerprint() -> bytes:
+    if ProgramCache.fingerprint is not None:
+      return ProgramCache.fingerprint
+
+    digest = hashlib.sha256(sys.version.encode())
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    for package in FRONT_END_PACKAGES:
+      directory = os.path.join(root, package)
+      for name in sorted(os.listdir(directory)):
+        if name.endswith(".py"):
+          with open(os.path.join(directory, name), "rb") as file:
+            digest.update(name.encode())
+            digest.update(file.read())
+
+    ProgramCache.fingerprint = digest.digest()
+    return ProgramCache.fingerprint
+
+
+def _without_gc(function: Callable[..., T], *args: Any) -> T:
+  # a program is hundreds of thousands of small objects that are all alive,
+  # letting the collector rescan them while they are built only costs time
+  enabled = gc.isenabled()
+  gc.disable()
+  try:
+    return function(*args)
+  finally:
+    if enabled:
+      gc.enable()
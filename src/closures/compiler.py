@@ -0,0 +1,1002 @@
+from closures.objects import CompiledFunction, Entry, TailCall
+from errors.executionerror import ExecutionError
+from interpreter.callable import Callable as CallableObj, ClassObj
+from interpreter.environment import Cell, UNDEFINED
+from interpreter.instance import Instance, Shape
+from interpreter.stringify import stringify
+from parser.expr import (
+  Assign, Binary, Call, CELL, Expr, Get, Grouping, Literal, LOCAL,
+  Logical, Set, Super, This, Unary, UPVALUE, Variable,
+  Visitor as ExprVisitor
+)
+from parser.stmt import (
+  Block, Class, Expression, Function, If, Import, Let, Print,
+  Return, Stmt, Visitor as StmtVisitor, While
+)
+from scanner.token import Token
+from scanner.tokentype import TokenType
+from typing import (
+  Any, Callable, cast, List, Optional, Tuple, TYPE_CHECKING, Union
+)
+
+if TYPE_CHECKING:
+  from closures.engine import ClosureEngine
+
+
+# what every compiled node is called with: the running call's frame and the
+# cells its closure captured
+Evaluator = Callable[[List[object], List[Cell]], Any]
+# statements give back None to carry on, or a 1-tuple holding the value a
+# return statement left the function with. A tuple rather than the
+# tree-walker's Completion, returns are too frequent to build objects for;
+# returns of calls give back the call instead
+ReturnSlot = Optional[Union[Tuple[object], TailCall]]
+Executor = Callable[[List[object], List[Cell]], ReturnSlot]
+# makes a function object for a declaration each time it's executed
+Maker = Callable[[List[object], List[Cell]], CompiledFunction]
+# stores a declared name's value, as found in the given frame
+Declarer = Callable[[List[object], object], None]
+
+# operators whose result is a bool whenever they don't raise
+COMPARISONS = (
+  TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL,
+  TokenType.GREATER, TokenType.GREATER_EQUAL,
+  TokenType.LESS, TokenType.LESS_EQUAL
+)
+
+RETURNED_VOID = (None,)
+
+
+class ClosureCompiler(ExprVisitor[Evaluator], StmtVisitor[Executor]):
+  # turns a resolved program into a tree of Python closures, one per node.
+  # Whatever the tree-walker works out again on each visit, the operator,
+  # how a variable is reached, the operand checks the type inferrer
+  # ruled out, is settled here once; the inline caches live in the
+  # closures of their sites
+  def __init__(self, engine: "ClosureEngine"):
+    self.engine = engine
+    self.globals = engine.universe.slots
+
+
+  def compile(self, statements: List[Stmt]) -> Executor:
+    return self._sequence(statements)
+
+
+  def visit_block_stmt(self, stmt: Block) -> Executor:
+    body = self._sequence(stmt.statements)
+    if not stmt.frame_size:
+      return body
+
+    size = stmt.frame_size
+
+    def block(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+      return body([None] * size, upvalues)
+
+    return block
+
+
+  def visit_class_stmt(self, stmt: Class) -> Executor:
+    name = stmt.name.lexeme
+    declare = self._declarer(stmt)
+    initialize = self._initializer(stmt)
+    frame_size, super_slot = stmt.frame_size, stmt.super_slot
+
+    super_class_of: Optional[Evaluator] = None
+    super_name: Optional[Token] = None
+    if stmt.super_class is not None:
+      super_class_of = self._compile(stmt.super_class)
+      super_name = stmt.super_class.name
+
+    makers = [
+      (method.name.lexeme, self._function(
+        method, method.name.lexeme == "construct"
+      ))
+      for method in stmt.methods
+    ]
+
+    def class_(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+      super_class = None
+      if super_class_of is not None:
+        super_class = super_class_of(frame, upvalues)
+
+        if not isinstance(super_class, ClassObj):
+          raise ExecutionError(
+            cast(Token, super_name), "Superclass must be a class."
+          )
+
+      declare(frame, None)
+
+      scope = frame
+      if super_class is not None:
+        if frame_size:
+          scope = [None] * frame_size
+        # only ever read by the methods, through their upvalues
+        scope[super_slot] = Cell(super_class)
+
+      methods = {name: make(scope, upvalues) for name, make in makers}
+      initialize(frame, ClassObj(name, super_class, methods))
+
+    return class_
+
+
+  def visit_expression_stmt(self, stmt: Expression) -> Executor:
+    expression = self._compile(stmt.expression)
+
+    def expression_(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+      expression(frame, upvalues)
+
+    return expression_
+
+
+  def visit_function_stmt(self, stmt: Function) -> Executor:
+    make = self._function(stmt, False)
+    declare = self._declarer(stmt)
+
+    if stmt.access != CELL:
+      def function(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+        declare(frame, make(frame, upvalues))
+
+      return function
+
+    # the cell has to exist before the closure, which captures it to recurse
+    initialize = self._initializer(stmt)
+
+    def recursive(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+      declare(frame, None)
+      initialize(frame, make(frame, upvalues))
+
+    return recursive
+
+
+  def visit_if_stmt(self, stmt: If) -> Executor:
+    condition = self._condition(stmt.condition)
+    then_branch = self._execute(stmt.then_branch)
+
+    if stmt.else_branch is None:
+      def if_(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+        if condition(frame, upvalues):
+          return then_branch(frame, upvalues)
+
+      return if_
+
+    else_branch = self._execute(stmt.else_branch)
+
+    def if_else(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+      if condition(frame, upvalues):
+        return then_branch(frame, upvalues)
+      return else_branch(frame, upvalues)
+
+    return if_else
+
+
+  def visit_import_stmt(self, stmt: Import) -> Executor:
+    # ModuleLoader.link has already put the module's statements in its place
+    return _nothing
+
+
+  def visit_let_stmt(self, stmt: Let) -> Executor:
+    value = _constant(None)
+    if stmt.initializer is not None:
+      value = self._compile(stmt.initializer)
+    slot = stmt.slot
+
+    if stmt.access == LOCAL:
+      def let(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+        frame[slot] = value(frame, upvalues)
+
+      return let
+
+    if stmt.access == CELL:
+      def let_cell(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+        frame[slot] = Cell(value(frame, upvalues))
+
+      return let_cell
+
+    define = self._declarer(stmt)
+
+    def let_global(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+      define(frame, value(frame, upvalues))
+
+    return let_global
+
+
+  def visit_print_stmt(self, stmt: Print) -> Executor:
+    expression = self._compile(stmt.expression)
+
+    def print_(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+      print(stringify(expression(frame, upvalues)))
+
+    return print_
+
+
+  def visit_return_stmt(self, stmt: Return) -> Executor:
+    if stmt.value is None:
+      def return_void(
+        frame: List[object], upvalues: List[Cell]
+      ) -> ReturnSlot:
+        return RETURNED_VOID
+
+      return return_void
+
+    if isinstance(stmt.value, Call) and stmt.value.tail:
+      return self._tail_call(stmt.value)
+
+    value = self._compile(stmt.value)
+
+    def return_(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+      return (value(frame, upvalues),)
+
+    return return_
+
+
+  def visit_while_stmt(self, stmt: While) -> Executor:
+    condition = self._condition(stmt.condition)
+    body = self._execute(stmt.body)
+
+    def while_(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+      while condition(frame, upvalues):
+        returned = body(frame, upvalues)
+        if returned is not None:
+          return returned
+
+    return while_
+
+
+  def visit_assign_expr(self, expr: Assign) -> Evaluator:
+    value = self._compile(expr.value)
+    slot = expr.slot
+
+    if expr.access == LOCAL:
+      def assign(frame: List[object], upvalues: List[Cell]) -> Any:
+        result = frame[slot] = value(frame, upvalues)
+        return result
+
+      return assign
+
+    if expr.access == CELL:
+      def assign_cell(frame: List[object], upvalues: List[Cell]) -> Any:
+        result = cast(Cell, frame[slot]).value = value(frame, upvalues)
+        return result
+
+      return assign_cell
+
+    if expr.access == UPVALUE:
+      def assign_upvalue(frame: List[object], upvalues: List[Cell]) -> Any:
+        result = upvalues[slot].value = value(frame, upvalues)
+        return result
+
+      return assign_upvalue
+
+    name = expr.name
+    slots = self.globals
+
+    def assign_global(frame: List[object], upvalues: List[Cell]) -> Any:
+      result = value(frame, upvalues)
+      if slots[slot] is UNDEFINED:
+        raise ExecutionError(name, f"Undefined variable '{name.lexeme}'.")
+
+      slots[slot] = result
+      return result
+
+    return assign_global
+
+
+  def visit_binary_expr(self, expr: Binary) -> Evaluator:
+    left = self._compile(expr.left)
+    operator = expr.operator
+
+    if expr.numeric:
+      # the type inferrer proved both operands are numbers
+      if isinstance(expr.right, Literal):
+        return _numeric_constant(
+          operator.type, left, cast(float, expr.right.value)
+        )
+      return _numeric(operator.type, left, self._compile(expr.right))
+
+    right = self._compile(expr.right)
+    match operator.type:
+      case TokenType.BANG_EQUAL:
+        def not_equal(frame: List[object], upvalues: List[Cell]) -> bool:
+          return left(frame, upvalues) != right(frame, upvalues)
+
+        return not_equal
+
+      case TokenType.EQUAL_EQUAL:
+        def equal(frame: List[object], upvalues: List[Cell]) -> bool:
+          return left(frame, upvalues) == right(frame, upvalues)
+
+        return equal
+
+      case TokenType.PLUS:
+        def add(frame: List[object], upvalues: List[Cell]) -> Any:
+          a, b = left(frame, upvalues), right(frame, upvalues)
+          if type(a) is float and type(b) is float:
+            return a + b
+          if type(a) is str and type(b) is str:
+            return a + b
+
+          raise ExecutionError(
+            operator, "Operands must be two numbers or two strings."
+          )
+
+        return add
+
+      case _:
+        return _checked(operator, left, right)
+
+
+  def visit_calL_expr(self, expr: Call) -> Evaluator:
+    # a method called right where it's looked up is never bound, it gets
+    # its receiver passed along instead
+    if isinstance(expr.callee, Get):
+      return self._method_call(expr, expr.callee)
+    if isinstance(expr.callee, Super):
+      return self._super_call(expr, expr.callee)
+
+    callee = self._compile(expr.callee)
+    arguments = self._arguments(expr.arguments)
+    engine, paren = self.engine, expr.paren
+
+    def call(frame: List[object], upvalues: List[Cell]) -> Any:
+      function = callee(frame, upvalues)
+      values = arguments(frame, upvalues)
+
+      try:
+        if (
+          type(function) is CompiledFunction
+          and len(values) == function.params
+        ):
+          return function.enter(
+            function.receiver, values, function.upvalues
+          )
+        return _call(engine, paren, function, None, values)
+      except RecursionError:
+        raise _stack_overflow(paren)
+
+    return call
+
+
+  def visit_get_expr(self, expr: Get) -> Evaluator:
+    obj, name = self._compile(expr.obj), expr.name
+    shape: Optional[Shape] = None
+    index, method = 0, cast(Optional[CompiledFunction], None)
+
+    def get(frame: List[object], upvalues: List[Cell]) -> Any:
+      nonlocal shape, index, method
+      instance = obj(frame, upvalues)
+      if type(instance) is not Instance:
+        raise ExecutionError(name, "Only instances have properties.")
+
+      if instance.shape is not shape:
+        index, method = cast(
+          Tuple[int, Optional[CompiledFunction]], instance.look_up(name)
+        )
+        shape = instance.shape
+
+      if method is None:
+        return instance.values[index]
+      return method.bind(instance)
+
+    return get
+
+
+  def visit_grouping_expr(self, expr: Grouping) -> Evaluator:
+    return self._compile(expr.expression)
+
+
+  def visit_literal_expr(self, expr: Literal) -> Evaluator:
+    return _constant(expr.value)
+
+
+  def visit_logical_expr(self, expr: Logical) -> Evaluator:
+    left = self._compile(expr.left)
+    right = self._compile(expr.right)
+
+    if expr.operator.type == TokenType.OR:
+      def or_(frame: List[object], upvalues: List[Cell]) -> Any:
+        value = left(frame, upvalues)
+        if value is not None and value is not False:
+          return value
+        return right(frame, upvalues)
+
+      return or_
+
+    def and_(frame: List[object], upvalues: List[Cell]) -> Any:
+      value = left(frame, upvalues)
+      if value is None or value is False:
+        return value
+      return right(frame, upvalues)
+
+    return and_
+
+
+  def visit_set_expr(self, expr: Set) -> Evaluator:
+    obj, name = self._compile(expr.obj), expr.name
+    value = self._compile(expr.value)
+    shape: Optional[Shape] = None
+    index, next_shape = 0, cast(Optional[Shape], None)
+
+    def set_(frame: List[object], upvalues: List[Cell]) -> Any:
+      nonlocal shape, index, next_shape
+      instance = obj(frame, upvalues)
+      if type(instance) is not Instance:
+        raise ExecutionError(name, "Only instances have fields.")
+
+      result = value(frame, upvalues)
+
+      if instance.shape is not shape:
+        # as for Get, but a missing field is added through the transition
+        shape = instance.shape
+        found = shape.slots.get(name.lexeme)
+        index = len(shape.slots) if found is None else found
+        next_shape = None
+        if found is None:
+          next_shape = shape.with_field(name.lexeme)
+
+      if next_shape is None:
+        instance.values[index] = result
+      else:
+        instance.shape = next_shape
+        instance.values.append(result)
+
+      return result
+
+    return set_
+
+
+  def visit_super_expr(self, expr: Super) -> Evaluator:
+    method_of = self._super_method(expr)
+
+    def super_(frame: List[object], upvalues: List[Cell]) -> Any:
+      method, receiver = method_of(frame, upvalues)
+      return method.bind(receiver)
+
+    return super_
+
+
+  def visit_this_expr(self, expr: This) -> Evaluator:
+    return self._variable(expr.keyword, expr.access, expr.slot)
+
+
+  def visit_unary_expr(self, expr: Unary) -> Evaluator:
+    right = self._compile(expr.right)
+    operator = expr.operator
+
+    if operator.type == TokenType.BANG:
+      def not_(frame: List[object], upvalues: List[Cell]) -> bool:
+        value = right(frame, upvalues)
+        return value is None or value is False
+
+      return not_
+
+    if expr.numeric:
+      if operator.type == TokenType.PLUS:
+        return right
+
+      def negate(frame: List[object], upvalues: List[Cell]) -> Any:
+        return -right(frame, upvalues)
+
+      return negate
+
+    negative = operator.type == TokenType.MINUS
+
+    def unary(frame: List[object], upvalues: List[Cell]) -> Any:
+      value = right(frame, upvalues)
+      if type(value) is not float:
+        raise ExecutionError(operator, "Operand must be a number.")
+
+      return -value if negative else value
+
+    return unary
+
+
+  def visit_variable_expr(self, expr: Variable) -> Evaluator:
+    return self._variable(expr.name, expr.access, expr.slot)
+
+
+  def _method_call(self, expr: Call, callee: Get) -> Evaluator:
+    obj, name = self._compile(callee.obj), callee.name
+    arguments = self._arguments(expr.arguments)
+    engine, paren = self.engine, expr.paren
+    shape: Optional[Shape] = None
+    index, method = 0, cast(Optional[CompiledFunction], None)
+
+    def method_call(frame: List[object], upvalues: List[Cell]) -> Any:
+      nonlocal shape, index, method
+      instance = obj(frame, upvalues)
+      if type(instance) is not Instance:
+        raise ExecutionError(name, "Only instances have properties.")
+
+      if instance.shape is not shape:
+        # the site's inline cache missed, it now expects this shape
+        index, method = cast(
+          Tuple[int, Optional[CompiledFunction]], instance.look_up(name)
+        )
+        shape = instance.shape
+
+      # the callee is read before the arguments run, they may assign the
+      # field or come through this site again and move its cache on
+      found = method
+      if found is None:
+        field = instance.values[index]
+        values = arguments(frame, upvalues)
+        try:
+          return _call(engine, paren, field, None, values)
+        except RecursionError:
+          raise _stack_overflow(paren)
+
+      values = arguments(frame, upvalues)
+      try:
+        if len(values) == found.params:
+          return found.enter(instance, values, found.upvalues)
+        return _call(engine, paren, found, instance, values)
+      except RecursionError:
+        raise _stack_overflow(paren)
+
+    return method_call
+
+
+  def _tail_call(self, expr: Call) -> Executor:
+    # methods get bound here, the call has to outlive the frame it was
+    # made in
+    callee = self._compile(expr.callee)
+    arguments = self._arguments(expr.arguments)
+    engine, paren = self.engine, expr.paren
+
+    def tail_call(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+      function = callee(frame, upvalues)
+      values = arguments(frame, upvalues)
+
+      if (
+        type(function) is CompiledFunction
+        and len(values) == function.params
+      ):
+        return TailCall(function, function.receiver, values)
+
+      try:
+        return (_call(engine, paren, function, None, values),)
+      except RecursionError:
+        raise _stack_overflow(paren)
+
+    return tail_call
+
+
+  def _super_call(self, expr: Call, callee: Super) -> Evaluator:
+    method_of = self._super_method(callee)
+    arguments = self._arguments(expr.arguments)
+    engine, paren = self.engine, expr.paren
+
+    def super_call(frame: List[object], upvalues: List[Cell]) -> Any:
+      method, receiver = method_of(frame, upvalues)
+      values = arguments(frame, upvalues)
+
+      try:
+        if len(values) == method.params:
+          return method.enter(receiver, values, method.upvalues)
+        return _call(engine, paren, method, receiver, values)
+      except RecursionError:
+        raise _stack_overflow(paren)
+
+    return super_call
+
+
+  def _super_method(
+    self, expr: Super
+  ) -> Callable[
+    [List[object], List[Cell]], Tuple[CompiledFunction, Instance]
+  ]:
+    super_class_of = self._variable(expr.keyword, expr.access, expr.slot)
+    this = self._variable(expr.this.keyword, expr.this.access, expr.this.slot)
+    name = expr.method
+    class_obj: Optional[ClassObj] = None
+    method = cast(CompiledFunction, None)
+
+    def super_method(
+      frame: List[object], upvalues: List[Cell]
+    ) -> Tuple[CompiledFunction, Instance]:
+      nonlocal class_obj, method
+      super_class = super_class_of(frame, upvalues)
+      receiver = this(frame, upvalues)
+
+      if super_class is not class_obj:
+        # a class declared in a function is a new class every call
+        found = super_class.find_method(name.lexeme)
+
+        if found is None:
+          raise ExecutionError(
+            name, f"Undefined property '{name.lexeme}'."
+          )
+
+        method = cast(CompiledFunction, found)
+        class_obj = super_class
+
+      return method, receiver
+
+    return super_method
+
+
+  def _variable(self, name: Token, access: int, slot: int) -> Evaluator:
+    if access == LOCAL:
+      def local(frame: List[object], upvalues: List[Cell]) -> Any:
+        return frame[slot]
+
+      return local
+
+    if access == CELL:
+      def cell(frame: List[object], upvalues: List[Cell]) -> Any:
+        return cast(Cell, frame[slot]).value
+
+      return cell
+
+    if access == UPVALUE:
+      def upvalue(frame: List[object], upvalues: List[Cell]) -> Any:
+        return upvalues[slot].value
+
+      return upvalue
+
+    slots = self.globals
+
+    def global_(frame: List[object], upvalues: List[Cell]) -> Any:
+      value = slots[slot]
+      if value is not UNDEFINED:
+        return value
+
+      raise ExecutionError(name, f"Undefined variable '{name.lexeme}'.")
+
+    return global_
+
+
+  def _declarer(self, stmt: Union[Class, Function, Let]) -> Declarer:
+    slot = stmt.slot
+
+    if stmt.access == LOCAL:
+      def declare(frame: List[object], value: object):
+        frame[slot] = value
+
+      return declare
+
+    if stmt.access == CELL:
+      def declare_cell(frame: List[object], value: object):
+        frame[slot] = Cell(value)
+
+      return declare_cell
+
+    universe, name = self.engine.universe, stmt.name.lexeme
+
+    def define(frame: List[object], value: object):
+      universe.define(name, value)
+
+    return define
+
+
+  def _initializer(self, stmt: Union[Class, Function]) -> Declarer:
+    # fills in a variable the declarer left empty
+    if stmt.access != CELL:
+      return self._declarer(stmt)
+
+    slot = stmt.slot
+
+    def initialize(frame: List[object], value: object):
+      cast(Cell, frame[slot]).value = value
+
+    return initialize
+
+
+  def _function(self, declaration: Function, is_initializer: bool) -> Maker:
+    body = self._sequence(declaration.body)
+    padding = [None] * (declaration.frame_size - 1 - len(declaration.params))
+    cells = declaration.cells
+    captures = declaration.upvalues
+
+    def run(
+      receiver: Optional[Instance],
+      arguments: List[object],
+      upvalues: List[Cell]
+    ) -> ReturnSlot:
+      frame: List[object] = [receiver, *arguments, *padding]
+      for slot in cells:
+        frame[slot] = Cell(frame[slot])
+
+      return body(frame, upvalues)
+
+    def enter(
+      receiver: Optional[Instance],
+      arguments: List[object],
+      upvalues: List[Cell]
+    ) -> object:
+      # sets the frame up as run does rather than calling it, one more
+      # Python frame per call made deep recursion several times slower
+      frame: List[object] = [receiver, *arguments, *padding]
+      for slot in cells:
+        frame[slot] = Cell(frame[slot])
+
+      returned = body(frame, upvalues)
+      if is_initializer:
+        return receiver
+      if type(returned) is TailCall:
+        return _tail_calls(returned)
+      if returned is not None:
+        return returned[0]
+
+    def make(frame: List[object], upvalues: List[Cell]) -> CompiledFunction:
+      return CompiledFunction(
+        declaration,
+        [
+          cast(Cell, frame[index]) if is_local else upvalues[index]
+          for is_local, index in captures
+        ],
+        is_initializer,
+        cast(Entry, enter),
+        cast(Entry, run)
+      )
+
+    return make
+
+
+  def _arguments(
+    self, arguments: List[Expr]
+  ) -> Callable[[List[object], List[Cell]], List[object]]:
+    compiled = [self._compile(argument) for argument in arguments]
+
+    if len(compiled) == 0:
+      def none(frame: List[object], upvalues: List[Cell]) -> List[object]:
+        return []
+
+      return none
+
+    if len(compiled) == 1:
+      only = compiled[0]
+
+      def one(frame: List[object], upvalues: List[Cell]) -> List[object]:
+        return [only(frame, upvalues)]
+
+      return one
+
+    if len(compiled) == 2:
+      first, second = compiled
+
+      def two(frame: List[object], upvalues: List[Cell]) -> List[object]:
+        return [first(frame, upvalues), second(frame, upvalues)]
+
+      return two
+
+    def many(frame: List[object], upvalues: List[Cell]) -> List[object]:
+      values: List[object] = []
+      for argument in compiled:
+        values.append(argument(frame, upvalues))
+      return values
+
+    return many
+
+
+  def _condition(self, expr: Expr) -> Evaluator:
+    # compiles expr to something Python can branch on directly
+    compiled = self._compile(expr)
+    if (
+      isinstance(expr, Binary) and expr.operator.type in COMPARISONS
+      or isinstance(expr, Unary) and expr.operator.type == TokenType.BANG
+    ):
+      return compiled
+
+    def truthy(frame: List[object], upvalues: List[Cell]) -> bool:
+      value = compiled(frame, upvalues)
+      return value is not None and value is not False
+
+    return truthy
+
+
+  def _sequence(self, statements: List[Stmt]) -> Executor:
+    compiled = [self._execute(statement) for statement in statements]
+
+    if len(compiled) == 0:
+      return _nothing
+
+    if len(compiled) == 1:
+      return compiled[0]
+
+    if len(compiled) == 2:
+      first, second = compiled
+
+      def pair(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+        returned = first(frame, upvalues)
+        if returned is not None:
+          return returned
+        return second(frame, upvalues)
+
+      return pair
+
+    def sequence(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+      for statement in compiled:
+        returned = statement(frame, upvalues)
+        if returned is not None:
+          return returned
+
+    return sequence
+
+
+  def _execute(self, stmt: Stmt) -> Executor:
+    return stmt.accept(self)
+
+
+  def _compile(self, expr: Expr) -> Evaluator:
+    return expr.accept(self)
+
+
+def _call(
+  engine: "ClosureEngine",
+  paren: Token,
+  callee: object,
+  receiver: Optional[Instance],
+  arguments: List[object]
+) -> object:
+  # everything a call site's fast path doesn't cover, errors included
+  if not isinstance(callee, CallableObj):
+    raise ExecutionError(paren, "Can only call functions and classes.")
+
+  if len(arguments) != callee.arity():
+    raise ExecutionError(
+      paren,
+      f"Expected {callee.arity()} arguments but got {len(arguments)}."
+    )
+
+  if receiver is not None:
+    return cast(CompiledFunction, callee).invoke(
+      cast(Any, engine), receiver, arguments
+    )
+  return callee.call(cast(Any, engine), arguments)
+
+
+def _stack_overflow(paren: Token) -> ExecutionError:
+  # Python's stack ran out under the call at paren, TNT reports that like
+  # the VM reports running out of frames
+  return ExecutionError(paren, "Stack overflow.")
+
+
+def _tail_calls(returned: TailCall) -> object:
+  # makes tail calls one after the other, as FunctionObj.invoke does, until
+  # one of them returns a value
+  while True:
+    function, receiver = returned.function, returned.receiver
+    value = function.run(receiver, returned.arguments, function.upvalues)
+    if function.is_initializer:
+      return receiver
+    if type(value) is not TailCall:
+      return value[0] if value is not None else None
+    returned = value
+
+
+def _nothing(frame: List[object], upvalues: List[Cell]) -> ReturnSlot:
+  return None
+
+
+def _constant(value: object) -> Evaluator:
+  def constant(frame: List[object], upvalues: List[Cell]) -> Any:
+    return value
+
+  return constant
+
+
+def _numeric(
+  operator: TokenType, left: Evaluator, right: Evaluator
+) -> Evaluator:
+  match operator:
+    case TokenType.PLUS:
+      def add(frame: List[object], upvalues: List[Cell]) -> Any:
+        return left(frame, upvalues) + right(frame, upvalues)
+      return add
+    case TokenType.MINUS:
+      def subtract(frame: List[object], upvalues: List[Cell]) -> Any:
+        return left(frame, upvalues) - right(frame, upvalues)
+      return subtract
+    case TokenType.STAR:
+      def multiply(frame: List[object], upvalues: List[Cell]) -> Any:
+        return left(frame, upvalues) * right(frame, upvalues)
+      return multiply
+    case TokenType.SLASH:
+      def divide(frame: List[object], upvalues: List[Cell]) -> Any:
+        return left(frame, upvalues) / right(frame, upvalues)
+      return divide
+    case TokenType.LESS:
+      def less(frame: List[object], upvalues: List[Cell]) -> Any:
+        return left(frame, upvalues) < right(frame, upvalues)
+      return less
+    case TokenType.LESS_EQUAL:
+      def less_equal(frame: List[object], upvalues: List[Cell]) -> Any:
+        return left(frame, upvalues) <= right(frame, upvalues)
+      return less_equal
+    case TokenType.GREATER:
+      def greater(frame: List[object], upvalues: List[Cell]) -> Any:
+        return left(frame, upvalues) > right(frame, upvalues)
+      return greater
+    case _:
+      def greater_equal(frame: List[object], upvalues: List[Cell]) -> Any:
+        return left(frame, upvalues) >= right(frame, upvalues)
+      return greater_equal
+
+
+def _numeric_constant(
+  operator: TokenType, left: Evaluator, right: float
+) -> Evaluator:
+  # as _numeric, for the common case of a literal right operand
+  match operator:
+    case TokenType.PLUS:
+      def add(frame: List[object], upvalues: List[Cell]) -> Any:
+        return left(frame, upvalues) + right
+      return add
+    case TokenType.MINUS:
+      def subtract(frame: List[object], upvalues: List[Cell]) -> Any:
+        return left(frame, upvalues) - right
+      return subtract
+    case TokenType.STAR:
+      def multiply(frame: List[object], upvalues: List[Cell]) -> Any:
+        return left(frame, upvalues) * right
+      return multiply
+    case TokenType.SLASH:
+      def divide(frame: List[object], upvalues: List[Cell]) -> Any:
+        return left(frame, upvalues) / right
+      return divide
+    case TokenType.LESS:
+      def less(frame: List[object], upvalues: List[Cell]) -> Any:
+        return left(frame, upvalues) < right
+      return less
+    case TokenType.LESS_EQUAL:
+      def less_equal(frame: List[object], upvalues: List[Cell]) -> Any:
+        return left(frame, upvalues) <= right
+      return less_equal
+    case TokenType.GREATER:
+      def greater(frame: List[object], upvalues: List[Cell]) -> Any:
+        return left(frame, upvalues) > right
+      return greater
+    case _:
+      def greater_equal(frame: List[object], upvalues: List[Cell]) -> Any:
+        return left(frame, upvalues) >= right
+      return greater_equal
+
+
+def _checked(operator: Token, left: Evaluator, right: Evaluator) -> Evaluator:
+  # the number-only operators for operands nothing is known about
+  def numbers(
+    frame: List[object], upvalues: List[Cell]
+  ) -> Tuple[float, float]:
+    a, b = left(frame, upvalues), right(frame, upvalues)
+    if type(a) is float and type(b) is float:
+      return a, b
+
+    raise ExecutionError(operator, "Operands must be numbers.")
+
+  match operator.type:
+    case TokenType.MINUS:
+      def subtract(frame: List[object], upvalues: List[Cell]) -> Any:
+        a, b = numbers(frame, upvalues)
+        return a - b
+      return subtract
+    case TokenType.STAR:
+      def multiply(frame: List[object], upvalues: List[Cell]) -> Any:
+        a, b = numbers(frame, upvalues)
+        return a * b
+      return multiply
+    case TokenType.SLASH:
+      def divide(frame: List[object], upvalues: List[Cell]) -> Any:
+        a, b = numbers(frame, upvalues)
+        return a / b
+      return divide
+    case TokenType.LESS:
+      def less(frame: List[object], upvalues: List[Cell]) -> Any:
+        a, b = numbers(frame, upvalues)
+        return a < b
+      return less
+    case TokenType.LESS_EQUAL:
+      def less_equal(frame: List[object], upvalues: List[Cell]) -> Any:
+        a, b = numbers(frame, upvalues)
+        return a <= b
+      return less_equal
+    case TokenType.GREATER:
+      def greater(frame: List[object], upvalues: List[Cell]) -> Any:
+        a, b = numbers(frame, upvalues)
+        return a > b
+      return greater
+    case _:
+      def greater_equal(frame: List[object], upvalues: List[Cell]) -> Any:
+        a, b = numbers(frame, upvalues)
+        return a >= b
+      return greater_equal
@@ -0,0 +1,25 @@
+from closures.compiler import ClosureCompiler
+from errors.executionerror import ExecutionError
+from interpreter.environment import Environment
+from logger.logger import Logger
+from natives.clock import ClockFn
+from parser.stmt import Stmt
+from typing import List
+
+
+class ClosureEngine:
+  # runs programs compiled to closures, sharing the tree-walker's universe
+  # layout, objects and error messages
+  def __init__(self):
+    self.universe = Environment()
+    self.universe.define("clock", ClockFn())
+
+
+  def interpret(self, statements: List[Stmt]):
+    program = ClosureCompiler(self).compile(statements)
+    self.universe.reserve_globals()
+
+    try:
+      program([None], [])
+    except ExecutionError as e:
+      Logger.execution_error(e)
@@ -0,0 +1,64 @@
+from interpreter.callable import FunctionObj
+from interpreter.environment import Cell
+from interpreter.instance import Instance
+from parser.stmt import Function
+from typing import Callable, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+  from interpreter.interpreter import Interpreter
+
+
+# runs a compiled function body: receiver, arguments, captured cells
+Entry = Callable[[Optional[Instance], List[object], List[Cell]], object]
+
+
+class TailCall:
+  # what a return of a call hands back in place of a value, the function
+  # being returned from makes the call once its own frame is gone
+  __slots__ = ("function", "receiver", "arguments")
+
+  def __init__(
+    self,
+    function: "CompiledFunction",
+    receiver: Optional[Instance],
+    arguments: List[object]
+  ):
+    self.function = function
+    self.receiver = receiver
+    self.arguments = arguments
+
+
+class CompiledFunction(FunctionObj):
+  # a function whose body was compiled to closures; it runs without going
+  # through an interpreter at all
+  def __init__(
+    self,
+    declaration: Function,
+    upvalues: List[Cell],
+    is_initializer: bool,
+    enter: Entry,
+    run: Entry,
+    receiver: Optional[Instance] = None
+  ):
+    super().__init__(declaration, upvalues, is_initializer, receiver)
+    self.enter = enter
+    # the body alone, leaving tail calls it returns to whoever entered it
+    self.run = run
+    # checked by call sites before they take the fast path into enter
+    self.params = len(declaration.params)
+
+
+  def invoke(
+    self,
+    interpreter: "Interpreter",
+    receiver: Optional[Instance],
+    arguments: List[object]
+  ) -> object:
+    return self.enter(receiver, arguments, self.upvalues)
+
+
+  def bind(self, instance: Instance):
+    return CompiledFunction(
+      self.declaration, self.upvalues, self.is_initializer, self.enter,
+      self.run, instance
+    )
@@ -0,0 +1,9 @@
+from scanner.token import Token
+
+
+class Untranslatable(RuntimeError):
+  # raised by the jit for a construct it leaves to the tree-walker
+  def __init__(self, token: Token, construct: str):
+    super().__init__(construct)
+    self.construct = construct
+    self.token = token
@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
-from errors.returntrickery import ReturnTrickery
-from interpreter.environment import Environment
-from interpreter.instance import Instance
+from interpreter.completion import Completion, TAIL_CALL
+from interpreter.environment import Cell
+from interpreter.instance import Instance, Shape
 from parser.stmt import Function
 from typing import Dict, List, Optional, TYPE_CHECKING
 
@@ -30,7 +30,13 @@ class ClassObj(Callable):
   ):
     self.name = name
     self.super_class = super_class
+    # inherited methods are copied in, so finding one never walks up
     self.methods = methods
+    if super_class is not None:
+      self.methods = {**super_class.methods, **methods}
+
+    self.initializer = self.methods.get("construct")
+    self.shape = Shape()
 
 
   def call(
@@ -38,27 +44,21 @@ class ClassObj(Callable):
   ) -> object:
     instance = Instance(self)
 
-    initializer = self.find_method("construct")
-    if initializer is not None:
-      initializer.bind(instance).call(interpreter, arguments)
+    if self.initializer is not None:
+      self.initializer.invoke(interpreter, instance, arguments)
 
     return instance
 
 
   def arity(self) -> int:
-    initializer = self.find_method("construct")
-    if initializer is None:
+    if self.initializer is None:
       return 0
 
-    return initializer.arity()
+    return self.initializer.arity()
 
 
   def find_method(self, name: str) -> Optional["FunctionObj"]:
-    if name in self.methods:
-      return self.methods[name]
-
-    if self.super_class is not None:
-      return self.super_class.find_method(name)
+    return self.methods.get(name)
 
 
   def __repr__(self) -> str:
@@ -69,33 +69,71 @@ class FunctionObj(Callable):
   def __init__(
     self,
     declaration: Function,
-    closure: Environment,
-    is_initializer: bool
+    upvalues: List[Cell],
+    is_initializer: bool,
+    receiver: Optional[Instance] = None
   ):
     self.is_initializer = is_initializer
     self.declaration = declaration
-    self.closure = closure
+    # only the cells the function captured, not the scopes around it
+    self.upvalues = upvalues
+    self.receiver = receiver
 
 
   def call(
     self, interpreter: "Interpreter", arguments: List[object]
   ) -> object:
-    environment = Environment(self.closure)
-    for i in range(len(self.declaration.params)):
-      environment.define(
-        self.declaration.params[i].lexeme, arguments[i]
-      )
+    return self.invoke(interpreter, self.receiver, arguments)
+
 
-    try:
-      interpreter.execute_block(self.declaration.body, environment)
-    except ReturnTrickery as e:
-      if self.is_initializer:
-        return self.closure.get_at(0, "this")
+  def invoke(
+    self,
+    interpreter: "Interpreter",
+    receiver: Optional[Instance],
+    arguments: List[object]
+  ) -> object:
+    # calls the function as a method of receiver without binding it first.
+    # Tail calls come back as completions once the returning frame is done,
+    # and run here in its place, so they don't nest on the Python stack
+    function = self
+    while True:
+      declaration = function.declaration
+      if declaration.compiled is None:
+        declaration.calls += 1
+        if declaration.calls == interpreter.jit.threshold:
+          interpreter.jit.compile(declaration)
+
+      if declaration.compiled is not None:
+        value = declaration.compiled(
+          interpreter, function.upvalues, receiver, *arguments
+        )
+        if function.is_initializer:
+          return receiver
+        if type(value) is not Completion:
+          return value
+
+        function, receiver, arguments = value.value
+        continue
+
+      frame: List[object] = [receiver, *arguments]
+      if declaration.frame_size > len(frame):
+        frame.extend([None] * (declaration.frame_size - len(frame)))
+
+      for slot in declaration.cells:
+        frame[slot] = Cell(frame[slot])
+
+      completion = interpreter.execute_frame(
+        declaration.body, frame, function.upvalues
+      )
+      if function.is_initializer:
+        return receiver
 
-      return e.value
+      if completion is None:
+        return None
+      if completion.kind != TAIL_CALL:
+        return completion.value
 
-    if self.is_initializer:
-      return self.closure.get_at(0, "this")
+      function, receiver, arguments = completion.value
 
 
   def arity(self) -> int:
@@ -103,11 +141,8 @@ class FunctionObj(Callable):
 
 
   def bind(self, instance: Instance):
-    environment = Environment(self.closure)
-    environment.define("this", instance)
-
     return FunctionObj(
-      self.declaration, environment, self.is_initializer
+      self.declaration, self.upvalues, self.is_initializer, instance
     )
 
 
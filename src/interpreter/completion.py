@@ -0,0 +1,15 @@
+# how a statement can finish other than by falling through to the next one
+RETURN = 0
+# a return of a call; its value is the function, receiver and arguments,
+# which FunctionObj.invoke calls once the returning frame is gone
+TAIL_CALL = 1
+
+
+class Completion:
+  # handed back up through the statements a return (or any other jump out
+  # of them) leaves, statements that complete normally give back None
+  __slots__ = ("kind", "value")
+
+  def __init__(self, kind: int, value: object = None):
+    self.kind = kind
+    self.value = value
@@ -1,56 +1,55 @@
 from errors.executionerror import ExecutionError
+from parser.expr import global_slot, GLOBAL_SLOTS
 from scanner.token import Token
-from typing import Dict, Optional
+from typing import List
 
 
-class Environment:
-  def __init__(self, enclosing: Optional["Environment"] = None):
-    self.values: Dict[str, object] = {}
-    self.enclosing = enclosing
-
+# sits in every global slot whose name hasn't been defined (yet)
+UNDEFINED = object()
 
-  def define(self, name: str, value: object):
-    self.values[name] = value
 
+class Cell:
+  # a local that some closure captured, shared by the frame that declared it
+  # and every closure over it
+  __slots__ = ("value",)
 
-  def get(self, name: Token) -> object:
-    if name.lexeme in self.values:
-      return self.values[name.lexeme]
+  def __init__(self, value: object):
+    self.value = value
 
-    if self.enclosing is not None:
-      return self.enclosing.get(name)
-
-    raise ExecutionError(name, f"Undefined variable '{name.lexeme}'.")
 
+class Environment:
+  # the universe, indexed by the process-wide global slot numbers; locals
+  # live in flat per-call frames instead
+  __slots__ = ("slots",)
 
-  def get_at(self, distance: int, name: str) -> object:
-    return self.ancestor(distance).values.get(name)
+  def __init__(self):
+    self.slots: List[object] = []
+    self.reserve_globals()
 
 
-  def assign(self, name: Token, value: object):
-    if name.lexeme in self.values:
-      self.values[name.lexeme] = value
-      return
+  def define(self, name: str, value: object):
+    slot = global_slot(name)
+    if slot >= len(self.slots):
+      self.reserve_globals()
+    self.slots[slot] = value
 
-    if self.enclosing is not None:
-      self.enclosing.assign(name, value)
-      return
 
-    raise ExecutionError(name, f"Undefined variable '{name.lexeme}'.")
+  def reserve_globals(self):
+    # the resolver may have numbered new globals since the last run
+    self.slots.extend([UNDEFINED] * (len(GLOBAL_SLOTS) - len(self.slots)))
 
 
-  def assign_at(self, distance: int, name: Token, value: object):
-    print("assign_at", distance, name)
-    self.ancestor(distance).values[name.lexeme] = value
+  def get_global(self, name: Token, slot: int) -> object:
+    value = self.slots[slot]
+    if value is not UNDEFINED:
+      return value
 
+    raise ExecutionError(name, f"Undefined variable '{name.lexeme}'.")
 
-  def ancestor(self, distance: int) -> "Environment":
-    environment = self
-    for _ in range(distance):
-      # redundant check just meant to satisfy the type-checker
-      if environment.enclosing is None:
-        break
 
-      environment = environment.enclosing
+  def assign_global(self, name: Token, slot: int, value: object):
+    if self.slots[slot] is not UNDEFINED:
+      self.slots[slot] = value
+      return
 
-    return environment
+    raise ExecutionError(name, f"Undefined variable '{name.lexeme}'.")
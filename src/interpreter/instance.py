@@ -1,24 +1,59 @@
 from errors.executionerror import ExecutionError
 from scanner.token import Token
-from typing import Dict, TYPE_CHECKING
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
-  from interpreter.callable import ClassObj
+  from interpreter.callable import ClassObj, FunctionObj
+
+
+class Shape:
+  # a field layout shared by every instance that got the same fields in the
+  # same order: where each field sits in their values, and the shapes that
+  # adding one more field leads to
+  __slots__ = ("slots", "transitions")
+
+  def __init__(self, slots: Optional[Dict[str, int]] = None):
+    self.slots: Dict[str, int] = slots or {}
+    self.transitions: Dict[str, Shape] = {}
+
+
+  def with_field(self, name: str) -> "Shape":
+    shape = self.transitions.get(name)
+    if shape is None:
+      shape = Shape({**self.slots, name: len(self.slots)})
+      self.transitions[name] = shape
+
+    return shape
 
 
 class Instance:
+  __slots__ = ("class_obj", "shape", "values")
+
   def __init__(self, class_obj: "ClassObj"):
     self.class_obj = class_obj
-    self.fields: Dict[str, object] = {}
+    # every class starts its instances off from a shape of its own
+    self.shape = class_obj.shape
+    self.values: List[object] = []
 
 
   def get(self, name: Token):
-    if name.lexeme in self.fields:
-      return self.fields[name.lexeme]
+    slot, method = self.look_up(name)
+    if method is None:
+      return self.values[slot]
+
+    return method.bind(self)
+
+
+  def look_up(self, name: Token) -> Tuple[int, Optional["FunctionObj"]]:
+    # fields shadow methods; either answer holds for as long as the
+    # instance keeps its shape
+    slot = self.shape.slots.get(name.lexeme)
+    if slot is not None:
+      return slot, None
 
     method = self.class_obj.find_method(name.lexeme)
     if method is not None:
-      return method.bind(self)
+      return 0, method
 
     raise ExecutionError(
       name, f"Undefined property '{name.lexeme}'."
@@ -26,7 +61,13 @@ class Instance:
 
 
   def set(self, name: Token, value: object):
-    self.fields[name.lexeme] = value
+    slot = self.shape.slots.get(name.lexeme)
+    if slot is not None:
+      self.values[slot] = value
+      return
+
+    self.shape = self.shape.with_field(name.lexeme)
+    self.values.append(value)
 
 
   def __repr__(self) -> str:
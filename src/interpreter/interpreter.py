@@ -1,42 +1,60 @@
 from interpreter.callable import Callable, ClassObj, FunctionObj
-from interpreter.environment import Environment
+from interpreter.completion import Completion, RETURN, TAIL_CALL
+from interpreter.environment import Cell, Environment
 from interpreter.instance import Instance
+from interpreter.stringify import stringify
 from errors.executionerror import ExecutionError
-from errors.returntrickery import ReturnTrickery
+from jit.jit import Jit
+from jit.translator import DEOPTIMIZED
 from logger.logger import Logger
 from natives.clock import ClockFn
 from parser.expr import (
-  Assign, Binary, Call, Expr, Get, Grouping, Literal,
-  Logical, Set, Super, This, Unary, Variable, Visitor as ExprVisitor
+  Assign, Binary, Call, CELL, Expr, Get, Grouping, Literal, LOCAL,
+  Logical, Set, Super, This, Unary, UPVALUE, Variable,
+  Visitor as ExprVisitor
 )
 from parser.stmt import (
-  Block, Class, Expression, Function, If, Let, Print, Return,
-  Stmt, Visitor as StmtVisitor, While
+  Block, Class, Expression, Function, If, Import, Let, Print,
+  Return, Stmt, Visitor as StmtVisitor, While
 )
 from scanner.token import Token
 from scanner.tokentype import TokenType
-from typing import Any, cast, Dict, List
+from typing import Any, cast, Dict, List, Optional, Tuple, Union
 
 
-class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
+class Interpreter(ExprVisitor[Any], StmtVisitor[Optional[Completion]]):
   def __init__(self):
     self.universe = Environment()
-    self.environment: Environment = self.universe
-    self.locals: Dict[Expr, int] = {}
-
     self.universe.define("clock", ClockFn())
+    self.jit = Jit()
+
+    # locals of the running call, and the cells its closure captured
+    self.frame: List[object] = [None]
+    self.upvalues: List[Cell] = []
 
 
   def interpret(self, statements: List[Stmt]):
+    self.universe.reserve_globals()
+
     try:
       for statement in statements:
         self._execute(statement)
     except ExecutionError as e:
       Logger.execution_error(e)
+      # the error skipped restoring the frames of the calls it left
+      self.frame, self.upvalues = [None], []
 
 
-  def visit_block_stmt(self, stmt: Block):
-    self.execute_block(stmt.statements, Environment(self.environment))
+  def visit_block_stmt(self, stmt: Block) -> Optional[Completion]:
+    if stmt.frame_size:
+      return self.execute_frame(
+        stmt.statements, [None] * stmt.frame_size, self.upvalues
+      )
+
+    for statement in stmt.statements:
+      completion = self._execute(statement)
+      if completion is not None:
+        return completion
 
 
   def visit_class_stmt(self, stmt: Class):
@@ -49,25 +67,23 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
           stmt.super_class.name, "Superclass must be a class."
         )
 
-    self.environment.define(stmt.name.lexeme, None)
+    self._declare(stmt, None)
 
-    if stmt.super_class is not None:
-      self.environment = Environment(self.environment)
-      self.environment.define("super", super_class)
+    frame = self.frame
+    if super_class is not None:
+      if stmt.frame_size:
+        frame = [None] * stmt.frame_size
+      # only ever read by the methods, through their upvalues
+      frame[stmt.super_slot] = Cell(super_class)
 
     methods: Dict[str, FunctionObj] = {}
     for method in stmt.methods:
-      function = FunctionObj(
-        method, self.environment, method.name.lexeme == "construct"
+      function = self._closure(
+        method, frame, method.name.lexeme == "construct"
       )
       methods[method.name.lexeme] = function
 
-    class_obj = ClassObj(stmt.name.lexeme, super_class, methods)
-
-    if super_class is not None:
-      self.environment = self.environment.enclosing # type: ignore
-
-    self.environment.assign(stmt.name, class_obj)
+    self._initialize(stmt, ClassObj(stmt.name.lexeme, super_class, methods))
 
 
   def visit_expression_stmt(self, stmt: Expression):
@@ -75,15 +91,25 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
 
 
   def visit_function_stmt(self, stmt: Function):
-    function = FunctionObj(stmt, self.environment, False)
-    self.environment.define(stmt.name.lexeme, function)
+    if stmt.access != CELL:
+      self._declare(stmt, self._closure(stmt, self.frame, False))
+      return
 
+    # the cell has to exist before the closure, which captures it to recurse
+    self._declare(stmt, None)
+    self._initialize(stmt, self._closure(stmt, self.frame, False))
 
-  def visit_if_stmt(self, stmt: If):
+
+  def visit_if_stmt(self, stmt: If) -> Optional[Completion]:
     if self._is_truthy(self._evaluate(stmt.condition)):
-      self._execute(stmt.then_branch)
+      return self._execute(stmt.then_branch)
     elif stmt.else_branch != None:
-      self._execute(stmt.else_branch)
+      return self._execute(stmt.else_branch)
+
+
+  def visit_import_stmt(self, stmt: Import):
+    # ModuleLoader.link has already put the module's statements in its place
+    pass
 
 
   def visit_let_stmt(self, stmt: Let):
@@ -91,35 +117,66 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
     if stmt.initializer is not None:
       value = self._evaluate(stmt.initializer)
 
-    self.environment.define(stmt.name.lexeme, value)
+    self._declare(stmt, value)
 
 
   def visit_print_stmt(self, stmt: Print):
     value = self._evaluate(stmt.expression)
-    print(self._stringify(value))
+    print(stringify(value))
 
 
-  def visit_return_stmt(self, stmt: Return):
+  def visit_return_stmt(self, stmt: Return) -> Completion:
     value = None
-    if stmt.value is not None:
+    if isinstance(stmt.value, Call) and stmt.value.tail:
+      function, receiver, arguments = self._call_target(stmt.value)
+
+      if type(function) is FunctionObj:
+        if receiver is None:
+          receiver = function.receiver
+        return Completion(TAIL_CALL, (function, receiver, arguments))
+
+      value = self._call(function, receiver, arguments)
+    elif stmt.value is not None:
       value = self._evaluate(stmt.value)
 
-    raise ReturnTrickery(value)
+    return Completion(RETURN, value)
 
 
-  def visit_while_stmt(self, stmt: While):
+  def visit_while_stmt(self, stmt: While) -> Optional[Completion]:
+    if stmt.compiled is not None:
+      completion = stmt.compiled(self, self.frame, self.upvalues)
+      if completion is not DEOPTIMIZED:
+        return completion
+      self.jit.deoptimized(stmt)
+
     while self._is_truthy(self._evaluate(stmt.condition)):
-      self._execute(stmt.body)
+      completion = self._execute(stmt.body)
+      if completion is not None:
+        return completion
+
+      stmt.iterations += 1
+      if stmt.iterations == self.jit.threshold:
+        # the rest of the loop runs specialized, if its guards hold
+        self.jit.compile_loop(stmt, self.frame)
+        if stmt.compiled is not None:
+          completion = stmt.compiled(self, self.frame, self.upvalues)
+          if completion is not DEOPTIMIZED:
+            return completion
+          self.jit.deoptimized(stmt)
 
 
   def visit_assign_expr(self, expr: Assign) -> Any:
     value = self._evaluate(expr.value)
 
-    distance = self.locals.get(expr)
-    if distance is not None:
-      self.environment.assign_at(distance, expr.name, value)
+    access = expr.access
+    if access == LOCAL:
+      self.frame[expr.slot] = value
+    elif access == CELL:
+      cast(Cell, self.frame[expr.slot]).value = value
+    elif access == UPVALUE:
+      self.upvalues[expr.slot].value = value
     else:
-      self.universe.assign(expr.name, value)
+      self.universe.assign_global(expr.name, expr.slot, value)
 
     return value
 
@@ -128,6 +185,26 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
     left = self._evaluate(expr.left)
     right = self._evaluate(expr.right)
 
+    if expr.numeric:
+      # the type inferrer proved both operands are numbers
+      match expr.operator.type:
+        case TokenType.PLUS:
+          return left + right
+        case TokenType.MINUS:
+          return left - right
+        case TokenType.STAR:
+          return left * right
+        case TokenType.SLASH:
+          return left / right
+        case TokenType.LESS:
+          return left < right
+        case TokenType.LESS_EQUAL:
+          return left <= right
+        case TokenType.GREATER:
+          return left > right
+        case TokenType.GREATER_EQUAL:
+          return left >= right
+
     match expr.operator.type:
       case TokenType.GREATER:
         self._check_number_operands(expr.operator, left, right)
@@ -180,35 +257,18 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
 
 
   def visit_calL_expr(self, expr: Call) -> Any:
-    callee = self._evaluate(expr.callee)
-
-    arguments: List[object] = []
-    for argument in expr.arguments:
-      arguments.append(self._evaluate(argument))
-
-    if not isinstance(callee, Callable):
-      raise ExecutionError(
-        expr.paren, "Can only call functions and classes."
-      )
-
-    function = callee # type cast
-    if len(arguments) != function.arity():
-      raise ExecutionError(
-        expr.paren,
-        f"Expected {function.arity()} arguments but got {len(arguments)}."
-      )
-
+    function, receiver, arguments = self._call_target(expr)
+    if receiver is not None:
+      return cast(FunctionObj, function).invoke(self, receiver, arguments)
     return function.call(self, arguments)
 
 
   def visit_get_expr(self, expr: Get) -> Any:
-    obj = self._evaluate(expr.obj)
-    if isinstance(obj, Instance):
-      return obj.get(expr.name)
+    value, receiver = self._property(expr)
+    if receiver is None:
+      return value
 
-    raise ExecutionError(
-      expr.name, "Only instances have properties."
-    )
+    return cast(FunctionObj, value).bind(receiver)
 
 
   def visit_grouping_expr(self, expr: Grouping) -> Any:
@@ -239,29 +299,30 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
       raise ExecutionError(expr.name, "Only instances have fields.")
 
     value = self._evaluate(expr.value)
-    obj.set(expr.name, value)
+
+    shape = obj.shape
+    if shape is not expr.shape:
+      # as for Get, but a missing field is added through the transition
+      index = shape.slots.get(expr.name.lexeme)
+      expr.index = len(shape.slots) if index is None else index
+      expr.next_shape = None
+      if index is None:
+        expr.next_shape = shape.with_field(expr.name.lexeme)
+      expr.shape = shape
+      expr.misses += 1
+
+    if expr.next_shape is None:
+      obj.values[expr.index] = value
+    else:
+      obj.shape = expr.next_shape
+      obj.values.append(value)
 
     return value
 
 
   def visit_super_expr(self, expr: Super) -> Any:
-    distance = self.locals[expr]
-    super_class = cast(
-      ClassObj, self.environment.get_at(distance, "super")
-    )
-
-    obj = cast(
-      Instance, self.environment.get_at(distance - 1, "this")
-    )
-
-    method = super_class.find_method(expr.method.lexeme)
-
-    if method is None:
-      raise ExecutionError(
-        expr.method, f"Undefined property '{expr.method.lexeme}'."
-      )
-
-    return method.bind(obj)
+    method, receiver = self._super_method(expr)
+    return method.bind(receiver)
 
 
   def visit_this_expr(self, expr: This) -> Any:
@@ -271,6 +332,11 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
   def visit_unary_expr(self, expr: Unary) -> Any:
     right = self._evaluate(expr.right)
 
+    if expr.numeric:
+      if expr.operator.type == TokenType.MINUS:
+        return -right
+      return right
+
     match expr.operator.type:
       case TokenType.MINUS:
         self._check_number_operand(expr.operator, right)
@@ -288,34 +354,156 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
     return self._look_up_variable(expr.name, expr)
 
 
-  def _look_up_variable(self, name: Token, expr: Expr) -> object:
-    distance = self.locals.get(expr)
-    if distance is not None:
-      return self.environment.get_at(distance, name.lexeme)
+  def _call_target(
+    self, expr: Call
+  ) -> Tuple[Callable, Optional[Instance], List[object]]:
+    # the checked callee and arguments of a call; a method called right
+    # where it's looked up is never bound, it gets its receiver passed
+    # along instead
+    receiver: Optional[Instance] = None
+    if isinstance(expr.callee, Get):
+      callee, receiver = self._property(expr.callee)
+    elif isinstance(expr.callee, Super):
+      callee, receiver = self._super_method(expr.callee)
+    else:
+      callee = self._evaluate(expr.callee)
+
+    arguments: List[object] = []
+    for argument in expr.arguments:
+      arguments.append(self._evaluate(argument))
+
+    if not isinstance(callee, Callable):
+      raise ExecutionError(
+        expr.paren, "Can only call functions and classes."
+      )
+
+    function = callee # type cast
+    if len(arguments) != function.arity():
+      raise ExecutionError(
+        expr.paren,
+        f"Expected {function.arity()} arguments but got {len(arguments)}."
+      )
 
-    return self.universe.get(name)
+    return function, receiver, arguments
 
 
-  def _execute(self, stmt: Stmt):
-    stmt.accept(self)
+  def _call(
+    self,
+    function: Callable,
+    receiver: Optional[Instance],
+    arguments: List[object]
+  ) -> object:
+    if receiver is not None:
+      return cast(FunctionObj, function).invoke(self, receiver, arguments)
+    return function.call(self, arguments)
 
 
-  def resolve(self, expr: Expr, depth: int):
-    self.locals[expr] = depth
+  def _property(self, expr: Get) -> Tuple[object, Optional[Instance]]:
+    # a field's value, or a method along with the instance to bind it to
+    obj = self._evaluate(expr.obj)
+    if not isinstance(obj, Instance):
+      raise ExecutionError(
+        expr.name, "Only instances have properties."
+      )
 
+    if obj.shape is not expr.shape:
+      # the site's inline cache missed, it now expects this shape
+      expr.index, expr.function = obj.look_up(expr.name)
+      expr.shape = obj.shape
+      expr.misses += 1
 
-  def execute_block(
-    self, statements: List[Stmt], environment: Environment
-  ):
-    previous = self.environment
+    if expr.function is None:
+      return obj.values[expr.index], None
+    return expr.function, obj
 
-    try:
-      self.environment = environment
 
-      for statement in statements:
-        self._execute(statement)
-    finally:
-      self.environment = previous
+  def _super_method(self, expr: Super) -> Tuple[FunctionObj, Instance]:
+    super_class = cast(
+      ClassObj, self._look_up_variable(expr.keyword, expr)
+    )
+    obj = cast(
+      Instance, self._look_up_variable(expr.this.keyword, expr.this)
+    )
+
+    if super_class is not expr.class_obj:
+      # a class declared in a function is a new class every call
+      method = super_class.find_method(expr.method.lexeme)
+
+      if method is None:
+        raise ExecutionError(
+          expr.method, f"Undefined property '{expr.method.lexeme}'."
+        )
+
+      expr.function = method
+      expr.class_obj = super_class
+      expr.misses += 1
+
+    return expr.function, obj
+
+
+  def _look_up_variable(
+    self, name: Token, expr: Union[Super, This, Variable]
+  ) -> object:
+    access = expr.access
+    if access == LOCAL:
+      return self.frame[expr.slot]
+    if access == CELL:
+      return cast(Cell, self.frame[expr.slot]).value
+    if access == UPVALUE:
+      return self.upvalues[expr.slot].value
+
+    return self.universe.get_global(name, expr.slot)
+
+
+  def _declare(self, stmt: Union[Class, Function, Let], value: object):
+    if stmt.access == LOCAL:
+      self.frame[stmt.slot] = value
+    elif stmt.access == CELL:
+      self.frame[stmt.slot] = Cell(value)
+    else:
+      self.universe.define(stmt.name.lexeme, value)
+
+
+  def _initialize(self, stmt: Union[Class, Function], value: object):
+    # fills in a variable _declare left empty
+    if stmt.access == LOCAL:
+      self.frame[stmt.slot] = value
+    elif stmt.access == CELL:
+      cast(Cell, self.frame[stmt.slot]).value = value
+    else:
+      self.universe.define(stmt.name.lexeme, value)
+
+
+  def _closure(
+    self, declaration: Function, frame: List[object], is_initializer: bool
+  ) -> FunctionObj:
+    upvalues = [
+      cast(Cell, frame[index]) if is_local else self.upvalues[index]
+      for is_local, index in declaration.upvalues
+    ]
+    return FunctionObj(declaration, upvalues, is_initializer)
+
+
+  def _execute(self, stmt: Stmt) -> Optional[Completion]:
+    return stmt.accept(self)
+
+
+  def execute_frame(
+    self, statements: List[Stmt], frame: List[object], upvalues: List[Cell]
+  ) -> Optional[Completion]:
+    previous_frame, previous_upvalues = self.frame, self.upvalues
+    self.frame = frame
+    self.upvalues = upvalues
+
+    completion = None
+    for statement in statements:
+      completion = statement.accept(self)
+      if completion is not None:
+        break
+
+    self.frame = previous_frame
+    self.upvalues = previous_upvalues
+    return completion
 
 
   def _evaluate(self, expr: Expr) -> Any:
@@ -332,24 +520,6 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
     return True
 
 
-  def _stringify(self, obj: Any) -> str:
-    if obj is None:
-      return TokenType.VOID.value
-
-    if isinstance(obj, float):
-      text = str(obj)
-      if text.endswith(".0"):
-        text = text[ : -2]
-      return text
-
-    if isinstance(obj, bool):
-      if obj == True:
-        return TokenType.TRUE.value
-      return TokenType.FALSE.value
-
-    return obj.__repr__()
-
-
   def _check_number_operand(self, operator: Token, operand: Any):
     if isinstance(operand, float):
       return
@@ -0,0 +1,20 @@
+from scanner.tokentype import TokenType
+
+
+def stringify(value: object) -> str:
+  # how print shows a value, the same whichever engine runs the program
+  if value is None:
+    return TokenType.VOID.value
+
+  if isinstance(value, float):
+    text = str(value)
+    if text.endswith(".0"):
+      text = text[ : -2]
+    return text
+
+  if isinstance(value, bool):
+    if value:
+      return TokenType.TRUE.value
+    return TokenType.FALSE.value
+
+  return value.__repr__()
@@ -0,0 +1,91 @@
+from errors.untranslatable import Untranslatable
+from jit.translator import Translator
+from parser.stmt import Function, While
+from typing import Dict, List, TextIO, Tuple
+
+
+# calls a function gets walked, or iterations a loop does, before it is
+# compiled
+THRESHOLD = 1000
+
+
+class Jit:
+  # the tree-walker's second tier: function bodies that keep getting
+  # called are compiled to Python code objects, those with constructs the
+  # translator doesn't cover stay with the tree-walker. Loops that keep
+  # going are specialized for the number slots of the frame they got hot
+  # in, behind guards that hand the loop back to the tree-walker
+  def __init__(self, threshold: int = THRESHOLD):
+    # 0 leaves every function and loop to the tree-walker
+    self.threshold = threshold
+    self.compiled: List[Function] = []
+    self.rejected: List[Tuple[Function, Untranslatable]] = []
+    # guarded slots of every compiled loop, and how often guards failed
+    self.loops: Dict[While, List[int]] = {}
+    self.deoptimizations: Dict[While, int] = {}
+    self.rejected_loops: List[Tuple[While, Untranslatable]] = []
+
+
+  def compile(self, declaration: Function):
+    try:
+      declaration.compiled = Translator().translate(declaration)
+      self.compiled.append(declaration)
+    except Untranslatable as e:
+      self.rejected.append((declaration, e))
+
+
+  def compile_loop(self, loop: While, frame: List[object]):
+    try:
+      loop.compiled, self.loops[loop] = Translator().translate_loop(
+        loop, frame
+      )
+      self.deoptimizations[loop] = 0
+    except Untranslatable as e:
+      self.rejected_loops.append((loop, e))
+
+
+  def deoptimized(self, loop: While):
+    self.deoptimizations[loop] += 1
+
+
+  def report(self, file: TextIO):
+    for declaration in self.compiled:
+      print(
+        f"jit: compiled '{declaration.name.lexeme}' "
+        f"[line {declaration.name.line}]",
+        file = file
+      )
+
+    for declaration, reason in self.rejected:
+      print(
+        f"jit: walking '{declaration.name.lexeme}' "
+        f"[line {declaration.name.line}], {reason.construct} "
+        f"[line {reason.token.line}] can't be compiled",
+        file = file
+      )
+
+    for loop, guarded in self.loops.items():
+      print(
+        f"jit: compiled loop [line {_line(loop)}], "
+        f"{len(guarded)} slots guarded to be numbers, "
+        f"{self.deoptimizations[loop]} deoptimizations",
+        file = file
+      )
+
+    for loop, reason in self.rejected_loops:
+      print(
+        f"jit: walking loop [line {_line(loop)}], {reason.construct} "
+        f"[line {reason.token.line}] can't be compiled",
+        file = file
+      )
+
+    print(
+      f"jit: {len(self.compiled)} functions and {len(self.loops)} loops "
+      f"compiled, {len(self.rejected) + len(self.rejected_loops)} left to "
+      f"the tree-walker, after {self.threshold} calls or iterations",
+      file = file
+    )
+
+
+def _line(loop: While) -> int:
+  return loop.keyword.line if loop.keyword is not None else 0
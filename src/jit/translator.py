@@ -0,0 +1,558 @@
+from errors.executionerror import ExecutionError
+from errors.untranslatable import Untranslatable
+from interpreter.callable import Callable as CallableObj, FunctionObj
+from interpreter.completion import Completion, RETURN, TAIL_CALL
+from interpreter.environment import Cell, Environment, UNDEFINED
+from interpreter.stringify import stringify
+from math import isfinite
+from parser.expr import (
+  Assign, Binary, Call, CELL, Expr, Get, Grouping, Literal, LOCAL,
+  Logical, Set, Super, This, Unary, UPVALUE, Variable,
+  Visitor as ExprVisitor
+)
+from parser.stmt import (
+  Block, Class, Expression, Function, If, Import, Let, Print,
+  Return, Stmt, Visitor as StmtVisitor, While
+)
+from scanner.token import Token
+from scanner.tokentype import TokenType
+from typing import (
+  Any, Callable, cast, Dict, List, MutableSet, Optional, Tuple,
+  TYPE_CHECKING
+)
+
+if TYPE_CHECKING:
+  from interpreter.interpreter import Interpreter
+
+
+# Python's spelling of the operators that map onto one directly
+OPERATORS = {
+  TokenType.PLUS: "+", TokenType.MINUS: "-",
+  TokenType.STAR: "*", TokenType.SLASH: "/",
+  TokenType.GREATER: ">", TokenType.GREATER_EQUAL: ">=",
+  TokenType.LESS: "<", TokenType.LESS_EQUAL: "<=",
+  TokenType.BANG_EQUAL: "!=", TokenType.EQUAL_EQUAL: "=="
+}
+
+# operators whose result is a number whenever they don't raise
+ARITHMETIC = (TokenType.MINUS, TokenType.SLASH, TokenType.STAR)
+
+# what a specialized loop gives back when its guards don't hold, the
+# tree-walker runs the loop instead
+DEOPTIMIZED = object()
+
+# operators whose result is a bool whenever they don't raise
+COMPARISONS = (
+  TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL,
+  TokenType.GREATER, TokenType.GREATER_EQUAL,
+  TokenType.LESS, TokenType.LESS_EQUAL
+)
+
+
+class Translator(ExprVisitor[str], StmtVisitor[None]):
+  # writes a function declaration, or a single loop, out as the source of
+  # a Python function, frame slots becoming Python locals v0 (the
+  # receiver), v1 and on. Operands known to be numbers, because the type
+  # inferrer proved it or a loop's guards hold, get native float
+  # operators, the rest are guarded by type checks that fall back to
+  # raising the tree-walker's errors. Whatever can't be written this way
+  # raises Untranslatable
+  def __init__(self):
+    self.lines: List[str] = []
+    self.depth = 1
+    # constants the source refers to by name, helpers included
+    self.namespace: Dict[str, object] = {
+      "_add": _add, "_assign_global": _assign_global, "_call": _call,
+      "_fail": _fail, "_returned": _returned, "_store": _store,
+      "_tail_call": _tail_call, "_undefined": _undefined,
+      "Completion": Completion, "DEOPTIMIZED": DEOPTIMIZED,
+      "RETURN": RETURN, "stringify": stringify, "UNDEFINED": UNDEFINED
+    }
+    self.temporaries = 0
+    # set while translating a loop, which runs inside the tree-walker's
+    # frame rather than being called with one of its own
+    self.in_loop = False
+    # slots holding nothing but numbers
+    self.numbers: MutableSet[int] = set()
+    # frame slots read and written, to be loaded and stored around a loop
+    self.used: MutableSet[int] = set()
+    self.written: MutableSet[int] = set()
+    # set inside a block that gets a frame of its own
+    self.own_frame = False
+
+
+  def translate(self, declaration: Function) -> Callable[..., object]:
+    if declaration.cells:
+      raise Untranslatable(declaration.name, "captured parameters")
+
+    params = "".join(
+      f", v{slot}" for slot in range(len(declaration.params) + 1)
+    )
+    self.lines.append(f"def compiled(interpreter, upvalues{params}):")
+    self._emit("slots = interpreter.universe.slots")
+    self._translate_all(declaration.body)
+
+    name = declaration.name
+    source = "\n".join(self.lines)
+    code = compile(source, f"<tnt {name.lexeme}, line {name.line}>", "exec")
+    exec(code, self.namespace)
+    return cast(Callable[..., object], self.namespace["compiled"])
+
+
+  def translate_loop(
+    self, loop: While, frame: List[object]
+  ) -> Tuple[Callable[..., object], List[int]]:
+    # specializes the loop for the types its frame holds right now; the
+    # slots that hold numbers and are only ever given numbers by the loop
+    # are guarded once on the way in and are numbers throughout
+    writes: Dict[int, List[Optional[Expr]]] = {}
+    declared: MutableSet[int] = set()
+    _local_writes(loop, writes, declared)
+
+    self.numbers = declared | {
+      slot for slot, value in enumerate(frame) if type(value) is float
+    }
+    while True:
+      ruled_out = {
+        slot for slot in self.numbers
+        if any(
+          value is None or not self._is_number(value)
+          for value in writes.get(slot, [])
+        )
+      }
+      if not ruled_out:
+        break
+      self.numbers -= ruled_out
+
+    self.in_loop = True
+    loop.accept(self)
+
+    guarded = sorted((self.numbers & self.used) - declared)
+    header = ["def compiled(interpreter, frame, upvalues):"]
+    if guarded:
+      checks = " or ".join(
+        f"type(frame[{slot}]) is not float" for slot in guarded
+      )
+      header += [f"  if {checks}:", "    return DEOPTIMIZED"]
+    header.append("  slots = interpreter.universe.slots")
+    header += [f"  v{slot} = frame[{slot}]" for slot in sorted(self.used)]
+
+    self.lines = header + self.lines
+    for slot in sorted(self.written):
+      self._emit(f"frame[{slot}] = v{slot}")
+
+    line = loop.keyword.line if loop.keyword is not None else 0
+    source = "\n".join(self.lines)
+    code = compile(source, f"<tnt loop, line {line}>", "exec")
+    exec(code, self.namespace)
+    return cast(Callable[..., object], self.namespace["compiled"]), guarded
+
+
+  def visit_block_stmt(self, stmt: Block):
+    # slots already keep the scopes apart
+    own_frame = self.own_frame
+    self.own_frame = own_frame or stmt.frame_size > 0
+
+    self._translate_all(stmt.statements)
+
+    self.own_frame = own_frame
+
+
+  def visit_class_stmt(self, stmt: Class):
+    raise Untranslatable(stmt.name, "class declarations")
+
+
+  def visit_expression_stmt(self, stmt: Expression):
+    self._emit(self._translate(stmt.expression))
+
+
+  def visit_function_stmt(self, stmt: Function):
+    raise Untranslatable(stmt.name, "function declarations")
+
+
+  def visit_if_stmt(self, stmt: If):
+    self._emit(f"if {self._condition(stmt.condition)}:")
+    self._nested(stmt.then_branch)
+
+    if stmt.else_branch is not None:
+      self._emit("else:")
+      self._nested(stmt.else_branch)
+
+
+  def visit_import_stmt(self, stmt: Import):
+    raise Untranslatable(stmt.keyword, "imports")
+
+
+  def visit_let_stmt(self, stmt: Let):
+    if stmt.access != LOCAL:
+      raise Untranslatable(stmt.name, "captured locals")
+
+    value = "None"
+    if stmt.initializer is not None:
+      value = self._translate(stmt.initializer)
+
+    self._emit(f"{self._local(stmt.slot, True)} = {value}")
+
+
+  def visit_print_stmt(self, stmt: Print):
+    value = self._translate(stmt.expression)
+    self._emit(f"print(stringify({value}))")
+
+
+  def visit_return_stmt(self, stmt: Return):
+    value = "None"
+    if stmt.value is not None:
+      value = self._translate(stmt.value)
+
+    if not self.in_loop:
+      self._emit(f"return {value}")
+    elif isinstance(stmt.value, Call) and stmt.value.tail:
+      self._emit(f"return _returned({value})")
+    else:
+      self._emit(f"return Completion(RETURN, {value})")
+
+
+  def visit_while_stmt(self, stmt: While):
+    self._emit(f"while {self._condition(stmt.condition)}:")
+    self._nested(stmt.body)
+
+
+  def visit_assign_expr(self, expr: Assign) -> str:
+    value = self._translate(expr.value)
+
+    if expr.access == LOCAL:
+      return f"({self._local(expr.slot, True)} := {value})"
+    if expr.access == UPVALUE:
+      return f"_store(upvalues[{expr.slot}], {value})"
+    if expr.access == CELL:
+      raise Untranslatable(expr.name, "captured locals")
+
+    name = self._constant(expr.name)
+    return (
+      f"_assign_global(interpreter.universe, {name}, {expr.slot}, {value})"
+    )
+
+
+  def visit_binary_expr(self, expr: Binary) -> str:
+    left = self._translate(expr.left)
+    right = self._translate(expr.right)
+    operator = expr.operator
+    symbol = OPERATORS[operator.type]
+
+    if (
+      expr.numeric
+      or operator.type in (TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL)
+      or self._is_number(expr.left) and self._is_number(expr.right)
+    ):
+      return f"({left} {symbol} {right})"
+
+    # the checks run once both operands are in, as they do when walking
+    # the tree; pure operands are read again rather than held on to
+    evaluated = ""
+    if not self._is_pure(expr.left) or not self._is_pure(expr.right):
+      a, b = self._temporary(), self._temporary()
+      evaluated = f"(({a} := {left}), ({b} := {right})) and "
+      left, right = a, b
+
+    checks = [
+      f"type({value}) is float"
+      for operand, value in ((expr.left, left), (expr.right, right))
+      if not self._is_number(operand)
+    ]
+    guard = evaluated + (" and ".join(checks) or "True")
+
+    token = self._constant(operator)
+    fallback = f"_fail({token}, 'Operands must be numbers.')"
+    if operator.type == TokenType.PLUS:
+      fallback = f"_add({token}, {left}, {right})"
+
+    return f"({left} {symbol} {right} if {guard} else {fallback})"
+
+
+  def visit_calL_expr(self, expr: Call) -> str:
+    callee = self._translate(expr.callee)
+    arguments = "".join(
+      f", {self._translate(argument)}" for argument in expr.arguments
+    )
+    paren = self._constant(expr.paren)
+
+    # a tail call is handed back to FunctionObj.invoke, as the tree-walker
+    # does, for the compiled frame not to stay on the stack under it
+    call = "_tail_call" if expr.tail else "_call"
+    return f"{call}(interpreter, {paren}, {callee}{arguments})"
+
+
+  def visit_get_expr(self, expr: Get) -> str:
+    raise Untranslatable(expr.name, "property access")
+
+
+  def visit_grouping_expr(self, expr: Grouping) -> str:
+    return self._translate(expr.expression)
+
+
+  def visit_literal_expr(self, expr: Literal) -> str:
+    value = expr.value
+    if isinstance(value, float) and not isfinite(value):
+      return self._constant(value)
+
+    return f"({value!r})"
+
+
+  def visit_logical_expr(self, expr: Logical) -> str:
+    left = self._translate(expr.left)
+    right = self._translate(expr.right)
+    value = self._temporary()
+    truthy = f"({value} := {left}) is not None and {value} is not False"
+
+    if expr.operator.type == TokenType.OR:
+      return f"({value} if {truthy} else {right})"
+    return f"({right} if {truthy} else {value})"
+
+
+  def visit_set_expr(self, expr: Set) -> str:
+    raise Untranslatable(expr.name, "property access")
+
+
+  def visit_super_expr(self, expr: Super) -> str:
+    raise Untranslatable(expr.keyword, "super")
+
+
+  def visit_this_expr(self, expr: This) -> str:
+    if expr.access != LOCAL:
+      raise Untranslatable(expr.keyword, "captured receivers")
+
+    return self._local(expr.slot)
+
+
+  def visit_unary_expr(self, expr: Unary) -> str:
+    right = self._translate(expr.right)
+    operator = expr.operator
+
+    if operator.type == TokenType.BANG:
+      value = self._temporary()
+      return f"(({value} := {right}) is None or {value} is False)"
+
+    symbol = OPERATORS[operator.type]
+    if expr.numeric or self._is_number(expr.right):
+      return f"({symbol}{right})"
+
+    value = self._temporary()
+    token = self._constant(operator)
+    return (
+      f"({symbol}{value} if type({value} := {right}) is float "
+      f"else _fail({token}, 'Operand must be a number.'))"
+    )
+
+
+  def visit_variable_expr(self, expr: Variable) -> str:
+    if expr.access == LOCAL:
+      return self._local(expr.slot)
+    if expr.access == UPVALUE:
+      return f"upvalues[{expr.slot}].value"
+    if expr.access == CELL:
+      raise Untranslatable(expr.name, "captured locals")
+
+    value = self._temporary()
+    name = self._constant(expr.name)
+    return (
+      f"({value} if ({value} := slots[{expr.slot}]) is not UNDEFINED "
+      f"else _undefined({name}))"
+    )
+
+
+  def _translate_all(self, statements: List[Stmt]):
+    for statement in statements:
+      statement.accept(self)
+
+
+  def _nested(self, stmt: Stmt):
+    lines = len(self.lines)
+
+    self.depth += 1
+    stmt.accept(self)
+    if len(self.lines) == lines:
+      self._emit("pass")
+    self.depth -= 1
+
+
+  def _translate(self, expr: Expr) -> str:
+    return expr.accept(self)
+
+
+  def _condition(self, expr: Expr) -> str:
+    # Python can branch on comparisons as they are, anything else is tested
+    # for TNT's truthiness
+    condition = self._translate(expr)
+    if (
+      isinstance(expr, Binary) and expr.operator.type in COMPARISONS
+      or isinstance(expr, Unary) and expr.operator.type == TokenType.BANG
+    ):
+      return condition
+
+    value = self._temporary()
+    return f"({value} := {condition}) is not None and {value} is not False"
+
+
+  def _is_pure(self, expr: Expr) -> bool:
+    # reading it can neither raise nor change anything
+    while isinstance(expr, Grouping):
+      expr = expr.expression
+
+    return (
+      isinstance(expr, Literal)
+      or isinstance(expr, (Variable, This)) and expr.access == LOCAL
+    )
+
+
+  def _is_number(self, expr: Expr) -> bool:
+    # whether expr evaluates to a number whenever it doesn't raise
+    while isinstance(expr, Grouping):
+      expr = expr.expression
+
+    if isinstance(expr, Literal):
+      return isinstance(expr.value, float)
+    if isinstance(expr, Variable):
+      return (
+        expr.access == LOCAL and not self.own_frame
+        and expr.slot in self.numbers
+      )
+    if isinstance(expr, Assign):
+      return self._is_number(expr.value)
+    if isinstance(expr, Unary):
+      return expr.operator.type != TokenType.BANG
+    if isinstance(expr, Binary):
+      if expr.operator.type == TokenType.PLUS:
+        return self._is_number(expr.left) and self._is_number(expr.right)
+      return expr.operator.type in ARITHMETIC
+
+    return False
+
+
+  def _local(self, slot: int, writing: bool = False) -> str:
+    # locals of a block with a frame of its own are never in a loop's frame
+    if self.own_frame:
+      return f"b{slot}"
+
+    self.used.add(slot)
+    if writing:
+      self.written.add(slot)
+    return f"v{slot}"
+
+
+  def _emit(self, line: str):
+    self.lines.append("  " * self.depth + line)
+
+
+  def _constant(self, value: object) -> str:
+    name = f"k{len(self.namespace)}"
+    self.namespace[name] = value
+    return name
+
+
+  def _temporary(self) -> str:
+    self.temporaries += 1
+    return f"t{self.temporaries}"
+
+
+def _add(operator: Token, left: Any, right: Any) -> str:
+  # the rest of TNT's +, for when the operands weren't both numbers
+  if type(left) is str and type(right) is str:
+    return left + right
+
+  raise ExecutionError(
+    operator, "Operands must be two numbers or two strings."
+  )
+
+
+def _assign_global(
+  universe: Environment, name: Token, slot: int, value: object
+) -> object:
+  universe.assign_global(name, slot, value)
+  return value
+
+
+def _call(
+  interpreter: "Interpreter", paren: Token, callee: object, *arguments: Any
+) -> object:
+  if type(callee) is FunctionObj and callee.declaration.compiled is not None:
+    if len(arguments) == len(callee.declaration.params):
+      value = callee.declaration.compiled(
+        interpreter, callee.upvalues, callee.receiver, *arguments
+      )
+      if callee.is_initializer:
+        return callee.receiver
+      if type(value) is not Completion:
+        return value
+
+      function, receiver, arguments = value.value
+      return function.invoke(interpreter, receiver, arguments)
+
+  if not isinstance(callee, CallableObj):
+    raise ExecutionError(paren, "Can only call functions and classes.")
+
+  if len(arguments) != callee.arity():
+    raise ExecutionError(
+      paren,
+      f"Expected {callee.arity()} arguments but got {len(arguments)}."
+    )
+
+  return callee.call(interpreter, list(arguments))
+
+
+def _fail(operator: Token, message: str):
+  raise ExecutionError(operator, message)
+
+
+def _returned(value: object) -> Completion:
+  # what a return leaves a loop with, tail calls are completions already
+  if type(value) is Completion:
+    return value
+
+  return Completion(RETURN, value)
+
+
+def _store(cell: Cell, value: object) -> object:
+  cell.value = value
+  return value
+
+
+def _tail_call(
+  interpreter: "Interpreter", paren: Token, callee: object, *arguments: Any
+) -> object:
+  if type(callee) is FunctionObj and len(arguments) == callee.arity():
+    return Completion(TAIL_CALL, (callee, callee.receiver, arguments))
+
+  return _call(interpreter, paren, callee, *arguments)
+
+
+def _undefined(name: Token):
+  raise ExecutionError(name, f"Undefined variable '{name.lexeme}'.")
+
+
+def _local_writes(
+  node: object,
+  writes: Dict[int, List[Optional[Expr]]],
+  declared: MutableSet[int]
+):
+  # every value given to a frame slot under node, by slot, and which slots
+  # are declared there; blocks with a frame of their own don't write to
+  # it, nor do the bodies of functions declared under node
+  if isinstance(node, list):
+    for element in node:
+      _local_writes(element, writes, declared)
+    return
+  if not isinstance(node, (Expr, Stmt)):
+    return
+  if isinstance(node, Block) and node.frame_size:
+    return
+  if isinstance(node, Function):
+    return
+
+  if isinstance(node, Let) and node.access == LOCAL:
+    writes.setdefault(node.slot, []).append(node.initializer)
+    declared.add(node.slot)
+  elif isinstance(node, Assign) and node.access == LOCAL:
+    writes.setdefault(node.slot, []).append(node.value)
+
+  for name in type(node).__slots__:
+    _local_writes(getattr(node, name), writes, declared)
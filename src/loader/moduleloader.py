@@ -0,0 +1,192 @@
+import io
+import os
+from cache.programcache import ProgramCache
+from concurrent.futures import (
+  FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+)
+from contextlib import redirect_stdout
+from logger.logger import Logger
+from parser.parser import Parser
+from parser.stmt import Import, Stmt
+from resolver.resolver import Resolver
+from resolver.typeinferrer import TypeInferrer
+from scanner.fastscanner import FastScanner
+from typing import Dict, List, Optional, Set
+
+
+class Module:
+  def __init__(
+    self,
+    path: str,
+    statements: List[Stmt],
+    output: str = "",
+    had_error: bool = False
+  ):
+    self.path = path
+    self.statements = statements
+    # whatever the front end reported, replayed once the module is linked
+    # so that diagnostics come out in import order
+    self.output = output
+    self.had_error = had_error
+
+    self.imports: Dict[Import, str] = {}
+    if not had_error:
+      self.imports = module_paths(statements, os.path.dirname(path))
+
+
+class ModuleLoader:
+  # finds every module a program imports, directly or not, and links them
+  # all into one program; modules that aren't cached go through the front
+  # end concurrently in worker processes
+  def __init__(self, cached: bool = True):
+    self.cached = cached
+    # with a single core the pool would only add pickling on top
+    self.workers = os.cpu_count() or 1
+    self.modules: Dict[str, Module] = {}
+    # modules that already ran, importing them again does nothing
+    self.linked: Set[str] = set()
+
+
+  def link(
+    self, statements: List[Stmt], path: Optional[str] = None
+  ) -> Optional[List[Stmt]]:
+    # replaces the first import of every module with the module's own
+    # statements, or returns None if any of them can't be used
+    directory = os.getcwd()
+    if path is not None:
+      directory = os.path.dirname(os.path.abspath(path))
+      self.linked.add(os.path.realpath(path))
+
+    imports = module_paths(statements, directory)
+    if not imports:
+      return statements
+
+    self._load(list(imports.values()))
+
+    linked = set(self.linked)
+    program: List[Stmt] = []
+    self._splice(statements, imports, program, linked)
+
+    if Logger.encountered_error:
+      return None
+
+    self.linked = linked
+    return program
+
+
+  def _load(self, paths: List[str]):
+    pool: Optional[ProcessPoolExecutor] = None
+    running: Dict[Future, str] = {}
+    waiting = list(paths)
+
+    try:
+      while waiting or running:
+        while waiting:
+          path = waiting.pop()
+          if path in self.modules or path in running.values():
+            continue
+
+          module = self._load_cached(path)
+          if module is None and self.workers == 1:
+            module = front_end(path, self.cached)
+
+          if module is not None:
+            self.modules[path] = module
+            waiting.extend(module.imports.values())
+          elif self.workers > 1 and os.path.isfile(path):
+            if pool is None:
+              pool = ProcessPoolExecutor(self.workers)
+            running[pool.submit(front_end, path, self.cached)] = path
+
+        if not running:
+          break
+
+        done, _ = wait(running, return_when = FIRST_COMPLETED)
+        for future in done:
+          path = running.pop(future)
+          module = future.result()
+          if module is not None:
+            self.modules[path] = module
+            waiting.extend(module.imports.values())
+    finally:
+      if pool is not None:
+        pool.shutdown()
+
+
+  def _load_cached(self, path: str) -> Optional[Module]:
+    if not self.cached:
+      return None
+
+    program = ProgramCache(path).load()
+    if program is None:
+      return None
+
+    return Module(path, program)
+
+
+  def _splice(
+    self,
+    statements: List[Stmt],
+    imports: Dict[Import, str],
+    program: List[Stmt],
+    linked: Set[str]
+  ):
+    for statement in statements:
+      if not isinstance(statement, Import):
+        program.append(statement)
+        continue
+
+      path = imports[statement]
+      if path in linked:
+        continue
+      linked.add(path)
+
+      module = self.modules.get(path)
+      if module is None:
+        Logger.error(
+          statement.path, f"Can't open module '{statement.path.literal}'."
+        )
+        continue
+
+      print(module.output, end = "")
+      if module.had_error:
+        Logger.encountered_error = True
+        continue
+
+      self._splice(module.statements, module.imports, program, linked)
+
+
+def module_paths(statements: List[Stmt], directory: str) -> Dict[Import, str]:
+  # module paths are relative to the importing file
+  return {
+    statement: os.path.realpath(
+      os.path.join(directory, str(statement.path.literal))
+    )
+    for statement in statements if isinstance(statement, Import)
+  }
+
+
+def front_end(path: str, cached: bool) -> Optional[Module]:
+  # usually runs in a worker process, everything it would print is handed
+  # back along with the module
+  output = io.StringIO()
+  encountered_error = Logger.encountered_error
+  Logger.encountered_error = False
+
+  try:
+    with redirect_stdout(output), open(path) as file:
+      statements = Parser(FastScanner(file).iter_tokens()).parse()
+      if not Logger.encountered_error:
+        Resolver().resolve(statements)
+  except OSError:
+    return None
+  finally:
+    had_error = Logger.encountered_error
+    Logger.encountered_error = encountered_error
+
+  if not had_error:
+    TypeInferrer().infer(statements)
+    if cached:
+      ProgramCache(path).store(statements)
+
+  return Module(path, statements, output.getvalue(), had_error)
@@ -5,6 +5,10 @@ from typing import Tuple
 class Repl:
   def __init__(self, rgb: Tuple[int, int, int], prompt_text: str):
     self.prompt_text = Repl.get_ansi_prompt(rgb, prompt_text)
+    # same width as the main prompt so continued lines stay aligned
+    self.continuation_text = Repl.get_ansi_prompt(
+      rgb, "." * len(prompt_text)
+    )
     Repl.configure_readline()
 
   @staticmethod
@@ -18,5 +22,5 @@ class Repl:
     readline.parse_and_bind('Control-u: unix-line-discard')
     readline.parse_and_bind('Control-k: kill-line')
 
-  def prompt(self) -> str:
-    return input(self.prompt_text)
+  def prompt(self, continued: bool = False) -> str:
+    return input(self.continuation_text if continued else self.prompt_text)
@@ -0,0 +1,362 @@
+from parser.expr import (
+  Assign, Binary, Call, Expr, Get, Grouping, Literal,
+  Logical, Set, Super, This, Unary, Variable, Visitor as ExprVisitor
+)
+from parser.stmt import (
+  Block, Class, Expression, Function, If, Import, Let, Print,
+  Return, Stmt, Visitor as StmtVisitor, While
+)
+from scanner.tokentype import TokenType
+from typing import Any, Callable, Dict, List, Optional
+
+
+# only operations that can't fail at runtime are folded, anything that
+# would raise is left in place to raise with the right token
+NUMBER_OPERATIONS: Dict[TokenType, Callable[[float, float], Any]] = {
+  TokenType.PLUS: lambda left, right: left + right,
+  TokenType.MINUS: lambda left, right: left - right,
+  TokenType.STAR: lambda left, right: left * right,
+  TokenType.SLASH: lambda left, right: left / right,
+  TokenType.GREATER: lambda left, right: left > right,
+  TokenType.GREATER_EQUAL: lambda left, right: left >= right,
+  TokenType.LESS: lambda left, right: left < right,
+  TokenType.LESS_EQUAL: lambda left, right: left <= right,
+}
+
+
+class Optimizer(ExprVisitor[Expr], StmtVisitor[Optional[Stmt]]):
+  # rewrites resolved programs in place; nodes the resolver annotated are
+  # never replaced, only dropped whole, so its results stay valid for
+  # whatever survives
+  def __init__(self):
+    self.folded_constants = 0
+    self.pruned_branches = 0
+    self.dead_statements = 0
+
+
+  def optimize(self, statements: List[Stmt]) -> List[Stmt]:
+    return self._optimize_all(statements)
+
+
+  def visit_block_stmt(self, stmt: Block) -> Optional[Stmt]:
+    stmt.statements = self._optimize_all(stmt.statements)
+    return stmt
+
+
+  def visit_class_stmt(self, stmt: Class) -> Optional[Stmt]:
+    for method in stmt.methods:
+      method.body = self._optimize_all(method.body)
+    return stmt
+
+
+  def visit_expression_stmt(self, stmt: Expression) -> Optional[Stmt]:
+    stmt.expression = self._optimize(stmt.expression)
+    return stmt
+
+
+  def visit_function_stmt(self, stmt: Function) -> Optional[Stmt]:
+    stmt.body = self._optimize_all(stmt.body)
+    return stmt
+
+
+  def visit_if_stmt(self, stmt: If) -> Optional[Stmt]:
+    stmt.condition = self._optimize(stmt.condition)
+
+    if isinstance(stmt.condition, Literal):
+      self.pruned_branches += 1
+      if self._is_truthy(stmt.condition.value):
+        return self._optimize_stmt(stmt.then_branch)
+      if stmt.else_branch is not None:
+        return self._optimize_stmt(stmt.else_branch)
+      return None
+
+    stmt.then_branch = self._optimize_stmt(stmt.then_branch) or Block([])
+    if stmt.else_branch is not None:
+      stmt.else_branch = self._optimize_stmt(stmt.else_branch)
+
+    return stmt
+
+
+  def visit_import_stmt(self, stmt: Import) -> Optional[Stmt]:
+    return stmt
+
+
+  def visit_let_stmt(self, stmt: Let) -> Optional[Stmt]:
+    if stmt.initializer is not None:
+      stmt.initializer = self._optimize(stmt.initializer)
+    return stmt
+
+
+  def visit_print_stmt(self, stmt: Print) -> Optional[Stmt]:
+    stmt.expression = self._optimize(stmt.expression)
+    return stmt
+
+
+  def visit_return_stmt(self, stmt: Return) -> Optional[Stmt]:
+    if stmt.value is not None:
+      stmt.value = self._optimize(stmt.value)
+    return stmt
+
+
+  def visit_while_stmt(self, stmt: While) -> Optional[Stmt]:
+    stmt.condition = self._optimize(stmt.condition)
+
+    if (
+      isinstance(stmt.condition, Literal) and
+      not self._is_truthy(stmt.condition.value)
+    ):
+      self.pruned_branches += 1
+      return None
+
+    stmt.body = self._optimize_stmt(stmt.body) or Block([])
+    return stmt
+
+
+  def visit_assign_expr(self, expr: Assign) -> Expr:
+    expr.value = self._optimize(expr.value)
+    return expr
+
+
+  def visit_binary_expr(self, expr: Binary) -> Expr:
+    expr.left = self._optimize(expr.left)
+    expr.right = self._optimize(expr.right)
+
+    if not (
+      isinstance(expr.left, Literal) and isinstance(expr.right, Literal)
+    ):
+      return expr
+
+    left, right = expr.left.value, expr.right.value
+    operator = expr.operator.type
+
+    if operator == TokenType.EQUAL_EQUAL:
+      return self._fold(left == right)
+    if operator == TokenType.BANG_EQUAL:
+      return self._fold(left != right)
+
+    if type(left) is float and type(right) is float:
+      if operator == TokenType.SLASH and right == 0:
+        return expr
+      return self._fold(NUMBER_OPERATIONS[operator](left, right))
+
+    if (
+      operator == TokenType.PLUS and
+      isinstance(left, str) and isinstance(right, str)
+    ):
+      return self._fold(left + right)
+
+    return expr
+
+
+  def visit_calL_expr(self, expr: Call) -> Expr:
+    expr.callee = self._optimize(expr.callee)
+    expr.arguments = [
+      self._optimize(argument) for argument in expr.arguments
+    ]
+    return expr
+
+
+  def visit_get_expr(self, expr: Get) -> Expr:
+    expr.obj = self._optimize(expr.obj)
+    return expr
+
+
+  def visit_grouping_expr(self, expr: Grouping) -> Expr:
+    # parentheses only matter to the parser
+    return self._optimize(expr.expression)
+
+
+  def visit_literal_expr(self, expr: Literal) -> Expr:
+    return expr
+
+
+  def visit_logical_expr(self, expr: Logical) -> Expr:
+    expr.left = self._optimize(expr.left)
+    expr.right = self._optimize(expr.right)
+
+    if not isinstance(expr.left, Literal):
+      return expr
+
+    self.folded_constants += 1
+    if self._is_truthy(expr.left.value) == (
+      expr.operator.type == TokenType.OR
+    ):
+      return expr.left
+    return expr.right
+
+
+  def visit_set_expr(self, expr: Set) -> Expr:
+    expr.obj = self._optimize(expr.obj)
+    expr.value = self._optimize(expr.value)
+    return expr
+
+
+  def visit_super_expr(self, expr: Super) -> Expr:
+    return expr
+
+
+  def visit_this_expr(self, expr: This) -> Expr:
+    return expr
+
+
+  def visit_unary_expr(self, expr: Unary) -> Expr:
+    expr.right = self._optimize(expr.right)
+
+    if not isinstance(expr.right, Literal):
+      return expr
+
+    value = expr.right.value
+    match expr.operator.type:
+      case TokenType.BANG:
+        return self._fold(not self._is_truthy(value))
+      case TokenType.MINUS if type(value) is float:
+        return self._fold(-value)
+      case TokenType.PLUS if type(value) is float:
+        return self._fold(value)
+      case _:
+        return expr
+
+
+  def visit_variable_expr(self, expr: Variable) -> Expr:
+    return expr
+
+
+  def _optimize_all(self, statements: List[Stmt]) -> List[Stmt]:
+    optimized: List[Stmt] = []
+
+    for index, statement in enumerate(statements):
+      result = self._optimize_stmt(statement)
+      if result is None or (
+        isinstance(result, Block) and not result.statements
+      ):
+        continue
+
+      optimized.append(result)
+      if isinstance(result, Return):
+        # nothing behind a return in the same block can ever run
+        self.dead_statements += len(statements) - index - 1
+        break
+
+    return optimized
+
+
+  def _optimize_stmt(self, stmt: Stmt) -> Optional[Stmt]:
+    return stmt.accept(self)
+
+
+  def _optimize(self, expr: Expr) -> Expr:
+    return expr.accept(self)
+
+
+  def _fold(self, value: Any) -> Expr:
+    self.folded_constants += 1
+    return Literal(value)
+
+
+  def _is_truthy(self, obj: Any) -> bool:
+    return obj is not None and obj is not False
+
+
+class NodeCounter(ExprVisitor[int], StmtVisitor[int]):
+  def count(self, statements: List[Stmt]) -> int:
+    return sum(statement.accept(self) for statement in statements)
+
+
+  def visit_block_stmt(self, stmt: Block) -> int:
+    return 1 + self.count(stmt.statements)
+
+
+  def visit_class_stmt(self, stmt: Class) -> int:
+    count = 1 + sum(method.accept(self) for method in stmt.methods)
+    if stmt.super_class is not None:
+      count += stmt.super_class.accept(self)
+    return count
+
+
+  def visit_expression_stmt(self, stmt: Expression) -> int:
+    return 1 + stmt.expression.accept(self)
+
+
+  def visit_function_stmt(self, stmt: Function) -> int:
+    return 1 + self.count(stmt.body)
+
+
+  def visit_if_stmt(self, stmt: If) -> int:
+    count = 1 + stmt.condition.accept(self) + stmt.then_branch.accept(self)
+    if stmt.else_branch is not None:
+      count += stmt.else_branch.accept(self)
+    return count
+
+
+  def visit_import_stmt(self, stmt: Import) -> int:
+    return 1
+
+
+  def visit_let_stmt(self, stmt: Let) -> int:
+    if stmt.initializer is None:
+      return 1
+    return 1 + stmt.initializer.accept(self)
+
+
+  def visit_print_stmt(self, stmt: Print) -> int:
+    return 1 + stmt.expression.accept(self)
+
+
+  def visit_return_stmt(self, stmt: Return) -> int:
+    if stmt.value is None:
+      return 1
+    return 1 + stmt.value.accept(self)
+
+
+  def visit_while_stmt(self, stmt: While) -> int:
+    return 1 + stmt.condition.accept(self) + stmt.body.accept(self)
+
+
+  def visit_assign_expr(self, expr: Assign) -> int:
+    return 1 + expr.value.accept(self)
+
+
+  def visit_binary_expr(self, expr: Binary) -> int:
+    return 1 + expr.left.accept(self) + expr.right.accept(self)
+
+
+  def visit_calL_expr(self, expr: Call) -> int:
+    return 1 + expr.callee.accept(self) + sum(
+      argument.accept(self) for argument in expr.arguments
+    )
+
+
+  def visit_get_expr(self, expr: Get) -> int:
+    return 1 + expr.obj.accept(self)
+
+
+  def visit_grouping_expr(self, expr: Grouping) -> int:
+    return 1 + expr.expression.accept(self)
+
+
+  def visit_literal_expr(self, expr: Literal) -> int:
+    return 1
+
+
+  def visit_logical_expr(self, expr: Logical) -> int:
+    return 1 + expr.left.accept(self) + expr.right.accept(self)
+
+
+  def visit_set_expr(self, expr: Set) -> int:
+    return 1 + expr.obj.accept(self) + expr.value.accept(self)
+
+
+  def visit_super_expr(self, expr: Super) -> int:
+    return 1
+
+
+  def visit_this_expr(self, expr: This) -> int:
+    return 1
+
+
+  def visit_unary_expr(self, expr: Unary) -> int:
+    return 1 + expr.right.accept(self)
+
+
+  def visit_variable_expr(self, expr: Variable) -> int:
+    return 1
@@ -1,12 +1,43 @@
 from abc import ABC, abstractmethod
 from scanner.token import Token
-from typing import List, Protocol, TypeVar, Union
+from scanner.tokentype import TokenType
+from typing import Any, Dict, List, Optional, Protocol, TypeVar, Union
 
 
 ReturnType = TypeVar("ReturnType", covariant = True)
 
+# how the interpreter reaches a variable, as the resolver decided: by its
+# slot in the universe, in the running frame, through a cell in that slot
+# once some closure captured it, or through a cell the running closure
+# carries
+GLOBAL = 0
+LOCAL = 1
+CELL = 2
+UPVALUE = 3
+
+# global slots are numbered per process, in the order names are first met;
+# every program resolved in the process shares the numbering
+GLOBAL_SLOTS: Dict[str, int] = {}
+
+
+def global_slot(name: str) -> int:
+  slot = GLOBAL_SLOTS.get(name)
+  if slot is None:
+    slot = GLOBAL_SLOTS[name] = len(GLOBAL_SLOTS)
+
+  return slot
+
 
 class Expr(ABC):
+  # nodes carry no __dict__, programs are made of a great many of them
+  __slots__ = ()
+
+  def __reduce__(self):
+    # every node takes its slots, in order, as constructor arguments
+    return (
+      type(self), tuple(getattr(self, name) for name in self.__slots__)
+    )
+
   @abstractmethod
   def accept(self, visitor: "Visitor[ReturnType]") -> ReturnType:
     ...
@@ -28,44 +59,91 @@ class Visitor(Protocol[ReturnType]):
 
 
 class Assign(Expr):
-  def __init__(self, name: Token, value: Expr):
+  __slots__ = ("name", "value", "access", "slot")
+
+  def __init__(
+    self, name: Token, value: Expr, access: int = GLOBAL, slot: int = 0
+  ):
     self.name = name
     self.value = value
+    # where the resolver found the variable
+    self.access = access
+    self.slot = slot
+
+  def __reduce__(self):
+    if self.access != GLOBAL:
+      return super().__reduce__()
+    return (_global_node, (Assign, self.name, self.value))
 
   def accept(self, visitor: Visitor[ReturnType]) -> ReturnType:
     return visitor.visit_assign_expr(self)
 
 
 class Binary(Expr):
-  def __init__(self, left: Expr, operator: Token, right: Expr):
+  __slots__ = ("left", "operator", "right", "numeric")
+
+  def __init__(
+    self, left: Expr, operator: Token, right: Expr, numeric: bool = False
+  ):
     self.left = left
     self.operator = operator
     self.right = right
+    # set once the type inferrer has proved both operands are numbers
+    self.numeric = numeric
 
   def accept(self, visitor: Visitor[ReturnType]) -> ReturnType:
     return visitor.visit_binary_expr(self)
 
 
 class Call(Expr):
-  def __init__(self, callee: Expr, paren: Token, arguments: List[Expr]):
+  __slots__ = ("callee", "paren", "arguments", "tail")
+
+  def __init__(
+    self,
+    callee: Expr,
+    paren: Token,
+    arguments: List[Expr],
+    tail: bool = False
+  ):
     self.callee = callee
     self.paren = paren
     self.arguments = arguments
+    # set by the resolver when the call's value is returned as it is, the
+    # caller's frame isn't needed any more by the time it runs
+    self.tail = tail
 
   def accept(self, visitor: Visitor[ReturnType]) -> ReturnType:
     return visitor.visit_calL_expr(self)
 
 
 class Get(Expr):
-  def __init__(self, obj: Expr, name: Token):
+  __slots__ = ("obj", "name", "shape", "index", "function", "misses")
+
+  def __init__(
+    self,
+    obj: Expr,
+    name: Token,
+    shape: Any = None,
+    index: int = 0,
+    function: Any = None,
+    misses: int = 0
+  ):
     self.obj = obj
     self.name = name
+    # inline cache: for instances of this shape the name is the field at
+    # index, or the method function when that is set
+    self.shape = shape
+    self.index = index
+    self.function = function
+    self.misses = misses
 
   def accept(self, visitor: Visitor[ReturnType]) -> ReturnType:
     return visitor.visit_get_expr(self)
 
 
 class Grouping(Expr):
+  __slots__ = ("expression",)
+
   def __init__(self, expression: Expr):
     self.expression = expression
 
@@ -74,6 +152,8 @@ class Grouping(Expr):
 
 
 class Literal(Expr):
+  __slots__ = ("value",)
+
   def __init__(self, value: Union[str, float, bool, None]):
     self.value = value
 
@@ -82,6 +162,8 @@ class Literal(Expr):
 
 
 class Logical(Expr):
+  __slots__ = ("left", "operator", "right")
+
   def __init__(self, left: Expr, operator: Token, right: Expr):
     self.left = left
     self.operator = operator
@@ -92,44 +174,116 @@ class Logical(Expr):
 
 
 class Set(Expr):
-  def __init__(self, obj: Expr, name: Token, value: Expr):
+  __slots__ = (
+    "obj", "name", "value", "shape", "index", "next_shape", "misses"
+  )
+
+  def __init__(
+    self,
+    obj: Expr,
+    name: Token,
+    value: Expr,
+    shape: Any = None,
+    index: int = 0,
+    next_shape: Any = None,
+    misses: int = 0
+  ):
     self.obj = obj
     self.name = name
     self.value = value
+    # inline cache: instances of this shape have the field at index, or
+    # get it appended there and move on to next_shape when that is set
+    self.shape = shape
+    self.index = index
+    self.next_shape = next_shape
+    self.misses = misses
 
   def accept(self, visitor: Visitor[ReturnType]) -> ReturnType:
     return visitor.visit_set_expr(self)
 
 
 class Super(Expr):
-  def __init__(self, keyword: Token, method: Token):
+  __slots__ = (
+    "keyword", "method", "access", "slot", "this", "class_obj", "function",
+    "misses"
+  )
+
+  def __init__(
+    self,
+    keyword: Token,
+    method: Token,
+    access: int = GLOBAL,
+    slot: int = 0,
+    this: Optional["This"] = None,
+    class_obj: Any = None,
+    function: Any = None,
+    misses: int = 0
+  ):
     self.keyword = keyword
     self.method = method
+    # where the resolver found 'super'
+    self.access = access
+    self.slot = slot
+    # the receiver the method gets bound to, resolved like any other 'this'
+    self.this = this or This(
+      Token(TokenType.THIS, "this", None, keyword.line)
+    )
+    # inline cache: the method function found when 'super' was class_obj
+    self.class_obj = class_obj
+    self.function = function
+    self.misses = misses
 
   def accept(self, visitor: Visitor[ReturnType]) -> ReturnType:
     return visitor.visit_super_expr(self)
 
 
 class This(Expr):
-  def __init__(self, keyword: Token):
+  __slots__ = ("keyword", "access", "slot")
+
+  def __init__(self, keyword: Token, access: int = GLOBAL, slot: int = 0):
     self.keyword = keyword
+    # where the resolver found 'this'
+    self.access = access
+    self.slot = slot
 
   def accept(self, visitor: Visitor[ReturnType]) -> ReturnType:
     return visitor.visit_this_expr(self)
 
 
 class Unary(Expr):
-  def __init__(self, operator: Token, right: Expr):
+  __slots__ = ("operator", "right", "numeric")
+
+  def __init__(self, operator: Token, right: Expr, numeric: bool = False):
     self.operator = operator
     self.right = right
+    # set once the type inferrer has proved the operand is a number
+    self.numeric = numeric
 
   def accept(self, visitor: Visitor[ReturnType]) -> ReturnType:
     return visitor.visit_unary_expr(self)
 
 
 class Variable(Expr):
-  def __init__(self, name: Token):
+  __slots__ = ("name", "access", "slot")
+
+  def __init__(self, name: Token, access: int = GLOBAL, slot: int = 0):
     self.name = name
+    # where the resolver found the variable
+    self.access = access
+    self.slot = slot
+
+  def __reduce__(self):
+    if self.access != GLOBAL:
+      return super().__reduce__()
+    return (_global_node, (Variable, self.name))
 
   def accept(self, visitor: Visitor[ReturnType]) -> ReturnType:
     return visitor.visit_variable_expr(self)
+
+
+def _global_node(node_class: type, *fields: object) -> Expr:
+  # a global's slot number doesn't survive the trip to another process,
+  # the name is numbered again wherever the node is unpickled
+  node = node_class(*fields)
+  node.slot = global_slot(node.name.lexeme)
+  return node
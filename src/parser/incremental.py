@@ -0,0 +1,149 @@
+from logger.logger import Logger
+from parser.parser import Parser
+from parser.stmt import Stmt
+from scanner.fastscanner import FastScanner, TOKEN_PATTERN
+from scanner.token import Token
+from typing import Dict, Iterator, List, Optional
+
+
+class Unit:
+  # a run of source text holding exactly one top-level declaration (plus the
+  # whitespace and comments in front of it), or the trailing text of a file
+  def __init__(self, start: int, end: int, line: int):
+    self.start = start
+    self.end = end
+    self.line = line
+    self.tokens: List[Token] = []
+    self.statements: List[Stmt] = []
+    self.had_error = False
+
+
+class IncrementalParser:
+  # keeps a program split into top-level units so an edit only rescans and
+  # reparses the units it touches; every other unit keeps its tokens and
+  # Stmt subtrees, which are just shifted to their new lines
+  def __init__(self, source: str = ""):
+    self.source = ""
+    self.units: List[Unit] = [Unit(0, 0, 1)]
+    self.reparsed_units = 0
+    self.reused_units = 0
+
+    self.edit(0, 0, source)
+
+
+  def statements(self) -> List[Stmt]:
+    return [
+      statement for unit in self.units for statement in unit.statements
+    ]
+
+
+  def had_error(self) -> bool:
+    return any(unit.had_error for unit in self.units)
+
+
+  def edit(self, start: int, end: int, text: str) -> List[Stmt]:
+    # replaces source[start : end] with text and returns the statements that
+    # had to be parsed again (the ones that still need resolving)
+    source = self.source[ : start] + text + self.source[end : ]
+    delta = len(text) - (end - start)
+
+    # a unit that ends right where the edit starts is affected as well, the
+    # edit may glue an 'else' or more tokens onto its last statement
+    first = 0
+    while first + 1 < len(self.units) and self.units[first + 1].start < start:
+      first += 1
+
+    # boundaries behind the edit where the old and new text line up again
+    sync_points: Dict[int, int] = {
+      unit.end + delta: index
+      for index, unit in enumerate(self.units)
+      if index >= first and unit.end >= end
+    }
+
+    new_units: List[Unit] = []
+    line = self.units[first].line
+    unit_start = self.units[first].start
+    last = len(self.units) - 1
+
+    for boundary in self._boundaries(source, unit_start):
+      unit = self._parse_unit(source, unit_start, boundary, line)
+      new_units.append(unit)
+      line += source.count("\n", unit_start, boundary)
+      unit_start = boundary
+
+      if boundary >= start + len(text) and boundary in sync_points:
+        last = sync_points[boundary]
+        break
+
+    reused = self.units[last + 1 : ]
+    if reused:
+      line_delta = line - reused[0].line
+      for unit in reused:
+        unit.start += delta
+        unit.end += delta
+        unit.line += line_delta
+
+        if line_delta != 0:
+          for token in unit.tokens:
+            token.line += line_delta
+
+    self.source = source
+    self.units[first : last + 1] = new_units
+    self.reparsed_units = len(new_units)
+    self.reused_units = len(self.units) - len(new_units)
+
+    return [
+      statement for unit in new_units for statement in unit.statements
+    ]
+
+
+  def _boundaries(self, source: str, start: int) -> Iterator[int]:
+    # yields the offsets right after each top-level terminator: a ';' or
+    # '}' outside of any brackets that isn't followed by an 'else'
+    depth = 0
+    pending: Optional[int] = None
+
+    for match in TOKEN_PATTERN.finditer(source, start):
+      lexeme = match.group()
+      if lexeme == "\n" or lexeme.startswith("//"):
+        continue
+
+      if pending is not None:
+        if lexeme != "else":
+          yield pending
+        pending = None
+
+      if lexeme == "(" or lexeme == "{":
+        depth += 1
+      elif lexeme == ")" or lexeme == "}":
+        depth = max(depth - 1, 0)
+        if lexeme == "}" and depth == 0:
+          pending = match.end()
+      elif lexeme == ";" and depth == 0:
+        pending = match.end()
+      elif lexeme == "\"":
+        break # unterminated string, it runs to the end of the source
+
+    if pending is not None and pending != len(source):
+      yield pending
+
+    yield len(source)
+
+
+  def _parse_unit(
+    self, source: str, start: int, end: int, line: int
+  ) -> Unit:
+    unit = Unit(start, end, line)
+
+    scanner = FastScanner(source[start : end])
+    scanner.line = line
+
+    encountered_error = Logger.encountered_error
+    Logger.encountered_error = False
+
+    unit.tokens = scanner.scan_tokens()
+    unit.statements = Parser(unit.tokens).parse()
+    unit.had_error = Logger.encountered_error
+
+    Logger.encountered_error = encountered_error or unit.had_error
+    return unit
@@ -1,3 +1,4 @@
+from enum import auto, IntEnum
 from logger.logger import Logger
 from parser.expr import (
   Assign, Binary, Call, Expr, Get, Grouping, Literal,
@@ -5,17 +6,20 @@ from parser.expr import (
 )
 from parser.stmt import (
   Block, Class, Expression, Function,
-  If, Let, Print, Return, Stmt, While
+  If, Import, Let, Print, Return, Stmt, While
 )
 from scanner.token import Token
 from scanner.tokentype import TokenType
-from typing import List
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 
 class Parser:
-  def __init__(self, tokens: List[Token]):
-    self.tokens = tokens
-    self.current = 0
+  def __init__(self, tokens: Iterable[Token]):
+    # tokens are pulled lazily, only the current and the previous token are
+    # ever held, so the token source can be a generator
+    self.tokens = iter(tokens)
+    self.current_token: Token = next(self.tokens)
+    self.previous_token: Optional[Token] = None
 
 
   def parse(self) -> List[Stmt]:
@@ -37,6 +41,9 @@ class Parser:
       if self.match(TokenType.LET):
         return self._var_declaration()
 
+      if self.match(TokenType.IMPORT):
+        return self._import_declaration()
+
       return self.statement()
     except ParseError:
       self.synchronize()
@@ -102,6 +109,14 @@ class Parser:
     return Class(name, super_class, methods)
 
 
+  def _import_declaration(self) -> Stmt:
+    keyword = self.previous()
+    path = self.consume(TokenType.STRING, "Expect module path after 'import'.")
+    self.consume(TokenType.SEMICOLON, "Expect ';' after module path.")
+
+    return Import(keyword, path)
+
+
   def _var_declaration(self) -> Stmt:
     name = self.consume(
       TokenType.IDENTIFIER,
@@ -143,6 +158,7 @@ class Parser:
 
 
   def _for_statement(self) -> Stmt: # lots of desugaring
+    keyword = self.previous()
     self.consume(TokenType.LEFT_PAREN, "Expect '(' after 'for'.")
 
     initializer = None
@@ -170,7 +186,7 @@ class Parser:
 
     if condition == None:
       condition = Literal(True)
-    body = While(condition, body)
+    body = While(condition, body, keyword)
 
     if initializer != None:
       body = Block([initializer, body])
@@ -214,13 +230,14 @@ class Parser:
 
 
   def _while_statement(self) -> Stmt:
+    keyword = self.previous()
     self.consume(TokenType.LEFT_PAREN, "Expect '(' after 'while'.")
     condition = self.expression()
 
     self.consume(TokenType.RIGHT_PAREN, "Expect ')' after condition.")
     body = self.statement()
 
-    return While(condition, body)
+    return While(condition, body, keyword)
 
 
   def _expression_statement(self) -> Stmt:
@@ -244,7 +261,7 @@ class Parser:
 
 
   def assignment(self) -> Expr:
-    expr = self._or()
+    expr = self._parse_precedence(Precedence.OR)
 
     if self.match(TokenType.EQUAL):
       equals = self.previous()
@@ -262,134 +279,85 @@ class Parser:
     return expr
 
 
-  def _or(self) -> Expr:
-    expr = self._and()
-
-    while self.match(TokenType.OR):
-      operator = self.previous()
-      right = self._and()
-      expr = Logical(expr, operator, right)
-
-    return expr
-
-
-  def _and(self) -> Expr:
-    expr = self.equality()
-
-    while self.match(TokenType.AND):
-      operator = self.previous()
-      right = self.equality()
-      expr = Logical(expr, operator, right)
-
-    return expr
-
-
-  def equality(self) -> Expr:
-    expr = self.comparison()
-
-    while self.match(TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL):
-      operator = self.previous()
-      right = self.comparison()
-      expr = Binary(expr, operator, right)
-
-    return expr
-
-
-  def comparison(self) -> Expr:
-    expr = self.term()
+  def _parse_precedence(self, precedence: int) -> Expr:
+    # parses an operand, then keeps folding it into infix operators that
+    # bind at least as tightly as the given level
+    prefix = PREFIX_RULES.get(self.current_token.type)
+    if prefix is None:
+      Logger.error(self.peek(), "Expect expression.")
+      raise ParseError
 
-    while self.match(
-      TokenType.GREATER, TokenType.GREATER_EQUAL,
-      TokenType.LESS, TokenType.LESS_EQUAL
-    ):
-      operator = self.previous()
-      right = self.term()
-      expr = Binary(expr, operator, right)
+    self.advance()
+    expr = prefix(self)
 
-    return expr
+    while True:
+      rule = INFIX_RULES.get(self.current_token.type)
+      if rule is None or rule[1] < precedence:
+        return expr
 
+      self.advance()
+      expr = rule[0](self, expr)
 
-  def term(self) -> Expr:
-    expr = self.factor()
 
-    while self.match(TokenType.MINUS, TokenType.PLUS):
-      operator = self.previous()
-      right = self.factor()
-      expr = Binary(expr, operator, right)
+  def _binary(self, left: Expr) -> Expr:
+    operator = self.previous()
+    right = self._parse_precedence(INFIX_RULES[operator.type][1] + 1)
+    return Binary(left, operator, right)
 
-    return expr
 
+  def _logical(self, left: Expr) -> Expr:
+    operator = self.previous()
+    right = self._parse_precedence(INFIX_RULES[operator.type][1] + 1)
+    return Logical(left, operator, right)
 
-  def factor(self) -> Expr:
-    expr = self.unary()
 
-    while self.match(TokenType.SLASH, TokenType.STAR):
-      operator = self.previous()
-      right = self.unary()
-      expr = Binary(expr, operator, right)
+  def _unary(self) -> Expr:
+    operator = self.previous()
+    right = self._parse_precedence(Precedence.UNARY)
+    return Unary(operator, right)
 
-    return expr
 
+  def _call(self, callee: Expr) -> Expr:
+    return self._finish_call(callee)
 
-  def unary(self) -> Expr:
-    if self.match(TokenType.BANG, TokenType.MINUS, TokenType.PLUS):
-      operator = self.previous()
-      right = self.unary()
-      return Unary(operator, right)
 
-    return self.call()
+  def _dot(self, obj: Expr) -> Expr:
+    name = self.consume(TokenType.IDENTIFIER, "Expect property name after '.'.")
+    return Get(obj, name)
 
 
-  def call(self) -> Expr:
-    expr = self.primary()
+  def _keyword_literal(self) -> Expr:
+    return Literal(KEYWORD_LITERALS[self.previous().type])
 
-    while True:
-      if self.match(TokenType.LEFT_PAREN):
-        expr = self._finish_call(expr)
-      elif self.match(TokenType.DOT):
-        name = self.consume(TokenType.IDENTIFIER, "Expect property name after '.'.")
-        expr = Get(expr, name)
-      else:
-        break
 
-    return expr
+  def _literal(self) -> Expr:
+    return Literal(self.previous().literal)
 
 
-  def primary(self) -> Expr:
-    if self.match(TokenType.FALSE):
-      return Literal(False)
-    if self.match(TokenType.TRUE):
-      return Literal(True)
-    if self.match(TokenType.VOID):
-      return Literal(None)
+  def _super(self) -> Expr:
+    keyword = self.previous()
+    self.consume(TokenType.DOT, "Expect '.' after 'super'.")
 
-    if self.match(TokenType.NUMBER, TokenType.STRING):
-      return Literal(self.previous().literal)
+    method = self.consume(
+      TokenType.IDENTIFIER, "Expect superclass method name."
+    )
+    return Super(keyword, method)
 
-    if self.match(TokenType.SUPER):
-      keyword = self.previous()
-      self.consume(TokenType.DOT, "Expect '.' after 'super'.")
 
-      method = self.consume(
-        TokenType.IDENTIFIER, "Expect superclass method name."
-      )
-      return Super(keyword, method)
+  def _this(self) -> Expr:
+    return This(self.previous())
 
-    if self.match(TokenType.THIS):
-      return This(self.previous())
 
-    if self.match(TokenType.IDENTIFIER):
-      return Variable(self.previous())
+  def _variable(self) -> Expr:
+    return Variable(self.previous())
 
-    if self.match(TokenType.LEFT_PAREN):
-      expr = self.expression()
-      self.consume(
-        TokenType.RIGHT_PAREN, "Expect ')' after expression"
-      )
-      return Grouping(expr)
 
-    Logger.error(self.peek(), "Expect expression.")
-    raise ParseError
+  def _grouping(self) -> Expr:
+    expr = self.expression()
+    self.consume(
+      TokenType.RIGHT_PAREN, "Expect ')' after expression"
+    )
+    return Grouping(expr)
 
 
   def synchronize(self):
@@ -406,6 +374,8 @@ class Parser:
           return
         case TokenType.LET:
           return
+        case TokenType.IMPORT:
+          return
         case TokenType.FOR:
           return
         case TokenType.IF:
@@ -440,7 +410,8 @@ class Parser:
 
   def advance(self) -> Token:
     if not self.is_at_end():
-      self.current += 1
+      self.previous_token = self.current_token
+      self.current_token = next(self.tokens)
 
     return self.previous()
 
@@ -450,11 +421,11 @@ class Parser:
 
 
   def peek(self) -> Token:
-    return self.tokens[self.current]
+    return self.current_token
 
 
   def previous(self) -> Token:
-    return self.tokens[self.current - 1]
+    return self.previous_token # type: ignore
 
 
   def consume(self, token_type: TokenType, message: str) -> Token:
@@ -486,3 +457,59 @@ class Parser:
 class ParseError(RuntimeError):
   def __init__(self, *args: object):
     super().__init__(*args)
+
+
+class Precedence(IntEnum):
+  # loosest to tightest, assignment is right-associative and handled on its
+  # own in Parser.assignment
+  ASSIGNMENT = auto()
+  OR = auto()
+  AND = auto()
+  EQUALITY = auto()
+  COMPARISON = auto()
+  TERM = auto()
+  FACTOR = auto()
+  UNARY = auto()
+  CALL = auto()
+
+
+KEYWORD_LITERALS: Dict[TokenType, object] = {
+  TokenType.FALSE: False,
+  TokenType.TRUE: True,
+  TokenType.VOID: None,
+}
+
+# token type that starts an operand -> how to parse it
+PREFIX_RULES: Dict[TokenType, Callable[[Parser], Expr]] = {
+  TokenType.BANG: Parser._unary,
+  TokenType.MINUS: Parser._unary,
+  TokenType.PLUS: Parser._unary,
+  TokenType.FALSE: Parser._keyword_literal,
+  TokenType.TRUE: Parser._keyword_literal,
+  TokenType.VOID: Parser._keyword_literal,
+  TokenType.NUMBER: Parser._literal,
+  TokenType.STRING: Parser._literal,
+  TokenType.SUPER: Parser._super,
+  TokenType.THIS: Parser._this,
+  TokenType.IDENTIFIER: Parser._variable,
+  TokenType.LEFT_PAREN: Parser._grouping,
+}
+
+# token type that follows an operand -> how to parse the rest, and how
+# tightly it binds (all of these are left-associative)
+INFIX_RULES: Dict[TokenType, Tuple[Callable[[Parser, Expr], Expr], int]] = {
+  TokenType.OR: (Parser._logical, Precedence.OR),
+  TokenType.AND: (Parser._logical, Precedence.AND),
+  TokenType.BANG_EQUAL: (Parser._binary, Precedence.EQUALITY),
+  TokenType.EQUAL_EQUAL: (Parser._binary, Precedence.EQUALITY),
+  TokenType.GREATER: (Parser._binary, Precedence.COMPARISON),
+  TokenType.GREATER_EQUAL: (Parser._binary, Precedence.COMPARISON),
+  TokenType.LESS: (Parser._binary, Precedence.COMPARISON),
+  TokenType.LESS_EQUAL: (Parser._binary, Precedence.COMPARISON),
+  TokenType.MINUS: (Parser._binary, Precedence.TERM),
+  TokenType.PLUS: (Parser._binary, Precedence.TERM),
+  TokenType.SLASH: (Parser._binary, Precedence.FACTOR),
+  TokenType.STAR: (Parser._binary, Precedence.FACTOR),
+  TokenType.LEFT_PAREN: (Parser._call, Precedence.CALL),
+  TokenType.DOT: (Parser._dot, Precedence.CALL),
+}
@@ -1,13 +1,22 @@
 from abc import ABC, abstractmethod
-from parser.expr import Expr, Variable
+from parser.expr import Expr, GLOBAL, Variable
 from scanner.token import Token
-from typing import List, Optional, Protocol, TypeVar
+from typing import Callable, List, Optional, Protocol, Tuple, TypeVar
 
 
 ReturnType = TypeVar("ReturnType", covariant = True)
 
 
 class Stmt(ABC):
+  # nodes carry no __dict__, programs are made of a great many of them
+  __slots__ = ()
+
+  def __reduce__(self):
+    # every node takes its slots, in order, as constructor arguments
+    return (
+      type(self), tuple(getattr(self, name) for name in self.__slots__)
+    )
+
   @abstractmethod
   def accept(self, visitor: "Visitor[ReturnType]") -> ReturnType:
     ...
@@ -23,9 +32,12 @@ class Visitor(Protocol[ReturnType]):
   def visit_function_stmt(self, stmt: "Function") -> ReturnType: ...
   def visit_return_stmt(self, stmt: "Return") -> ReturnType: ...
   def visit_class_stmt(self, stmt: "Class") -> ReturnType: ...
+  def visit_import_stmt(self, stmt: "Import") -> ReturnType: ...
 
 
 class Expression(Stmt):
+  __slots__ = ("expression",)
+
   def __init__(self, expression: Expr):
     self.expression = expression
 
@@ -34,6 +46,8 @@ class Expression(Stmt):
 
 
 class Print(Stmt):
+  __slots__ = ("expression",)
+
   def __init__(self, expression: Expr):
     self.expression = expression
 
@@ -42,6 +56,8 @@ class Print(Stmt):
 
 
 class Return(Stmt):
+  __slots__ = ("keyword", "value")
+
   def __init__(self, keyword: Token, value: Optional[Expr]):
     self.keyword = keyword
     self.value = value
@@ -51,50 +67,115 @@ class Return(Stmt):
 
 
 class Let(Stmt):
-  def __init__(self, name: Token, initializer: Optional[Expr]):
+  __slots__ = ("name", "initializer", "access", "slot")
+
+  def __init__(
+    self,
+    name: Token,
+    initializer: Optional[Expr],
+    access: int = GLOBAL,
+    slot: int = 0
+  ):
     self.name = name
     self.initializer = initializer
+    # where the resolver put the variable
+    self.access = access
+    self.slot = slot
 
   def accept(self, visitor: Visitor[ReturnType]) -> ReturnType:
     return visitor.visit_let_stmt(self)
 
 
 class Block(Stmt):
-  def __init__(self, statements: List[Stmt]):
+  __slots__ = ("statements", "frame_size")
+
+  def __init__(self, statements: List[Stmt], frame_size: int = 0):
     self.statements = statements
+    # only set on blocks outside any function that aren't inside another
+    # block, those run in a frame of their own
+    self.frame_size = frame_size
 
   def accept(self, visitor: Visitor[ReturnType]) -> ReturnType:
     return visitor.visit_block_stmt(self)
 
 
 class Class(Stmt):
+  __slots__ = (
+    "name", "super_class", "methods", "access", "slot", "super_slot",
+    "frame_size"
+  )
+
   def __init__(
     self,
     name: Token,
     super_class: Optional[Variable],
-    methods: List["Function"]
+    methods: List["Function"],
+    access: int = GLOBAL,
+    slot: int = 0,
+    super_slot: int = 0,
+    frame_size: int = 0
   ):
     self.name = name
     self.super_class = super_class
     self.methods = methods
+    # where the resolver put the class, and the cell its methods find
+    # 'super' in
+    self.access = access
+    self.slot = slot
+    self.super_slot = super_slot
+    # as for Block, when the scope holding 'super' needs a frame of its own
+    self.frame_size = frame_size
 
   def accept(self, visitor: Visitor[ReturnType]) -> ReturnType:
     return visitor.visit_class_stmt(self)
 
 
 class Function(Stmt):
+  __slots__ = (
+    "name", "params", "body", "access", "slot", "frame_size", "upvalues",
+    "cells", "calls", "compiled"
+  )
+
   def __init__(
-    self, name: Token, params: List[Token], body: List[Stmt]
+    self,
+    name: Token,
+    params: List[Token],
+    body: List[Stmt],
+    access: int = GLOBAL,
+    slot: int = 0,
+    frame_size: int = 0,
+    upvalues: Optional[List[Tuple[bool, int]]] = None,
+    cells: Optional[List[int]] = None,
+    calls: int = 0,
+    compiled: Optional[Callable[..., object]] = None
   ):
     self.name = name
     self.params = params
     self.body = body
+    # where the resolver put the function
+    self.access = access
+    self.slot = slot
+    # slot 0 of a call's frame is the receiver, the parameters follow
+    self.frame_size = frame_size
+    # what the closure captures when it's created, (True, slot) for a cell
+    # in the enclosing frame and (False, index) for one of the enclosing
+    # closure's own upvalues
+    self.upvalues = upvalues or []
+    # receiver and parameter slots that closures capture, they are moved
+    # into cells when the call starts
+    self.cells = cells or []
+    # counted by the tree-walker until the jit compiles the body, which it
+    # then calls instead
+    self.calls = calls
+    self.compiled = compiled
 
   def accept(self, visitor: Visitor[ReturnType]) -> ReturnType:
     return visitor.visit_function_stmt(self)
 
 
 class If(Stmt):
+  __slots__ = ("condition", "then_branch", "else_branch")
+
   def __init__(
     self, condition: Expr, then_branch: Stmt, else_branch: Optional[Stmt]
   ):
@@ -107,9 +188,35 @@ class If(Stmt):
 
 
 class While(Stmt):
-  def __init__(self, condition: Expr, body: Stmt):
+  __slots__ = ("condition", "body", "keyword", "iterations", "compiled")
+
+  def __init__(
+    self,
+    condition: Expr,
+    body: Stmt,
+    keyword: Optional[Token] = None,
+    iterations: int = 0,
+    compiled: Optional[Callable[..., object]] = None
+  ):
     self.condition = condition
     self.body = body
+    # the while or for the loop was written with
+    self.keyword = keyword
+    # as for Function, iterations the tree-walker counts until the jit
+    # specializes the loop
+    self.iterations = iterations
+    self.compiled = compiled
 
   def accept(self, visitor: Visitor[ReturnType]) -> ReturnType:
     return visitor.visit_while_stmt(self)
+
+
+class Import(Stmt):
+  __slots__ = ("keyword", "path")
+
+  def __init__(self, keyword: Token, path: Token):
+    self.keyword = keyword
+    self.path = path
+
+  def accept(self, visitor: Visitor[ReturnType]) -> ReturnType:
+    return visitor.visit_import_stmt(self)
@@ -1,16 +1,20 @@
 from enum import auto, Enum
-from interpreter.interpreter import Interpreter
 from logger.logger import Logger
 from parser.expr import (
-  Assign, Binary, Call, Expr, Get, Grouping, Literal,
-  Logical, Set, Super, This, Unary, Variable, Visitor as ExprVisitor
+  Assign, Binary, Call, CELL, Expr, GLOBAL, Get, global_slot, Grouping,
+  Literal, LOCAL, Logical, Set, Super, This, Unary, UPVALUE, Variable,
+  Visitor as ExprVisitor
 )
 from parser.stmt import (
-  Block, Class, Expression, Function, If, Let, Print,
+  Block, Class, Expression, Function, If, Import, Let, Print,
   Return, Stmt, Visitor as StmtVisitor, While
 )
 from scanner.token import Token
-from typing import cast, Dict, List
+from typing import cast, Dict, List, Optional, Tuple, Union
+
+
+# every node that names a variable, or declares one
+Binding = Union[Assign, Class, Function, Let, Super, This, Variable]
 
 
 class ClassType(Enum):
@@ -26,27 +30,61 @@ class FunctionType(Enum):
   METHOD = auto()
 
 
+class Local:
+  # a local variable while its scope is open; the nodes naming it from its
+  # own function are kept so they can all be switched over to a cell once
+  # some closure turns out to capture it
+  def __init__(self, slot: int):
+    self.slot = slot
+    self.captured = False
+    self.uses: List[Binding] = []
+
+
+class FunctionScope:
+  # frame layout of the function being resolved, or of the code outside
+  # any function; the scopes from base on are its own
+  def __init__(self, enclosing: Optional["FunctionScope"], base: int):
+    self.enclosing = enclosing
+    self.base = base
+    # slot 0 always holds the receiver
+    self.next_slot = 1
+    self.frame_size = 1
+    self.upvalues: List[Tuple[bool, int]] = []
+
+
 class Resolver(ExprVisitor[None], StmtVisitor[None]):
-  def __init__(self, interpreter: Interpreter):
-    self.interpreter = interpreter
+  # leaves on every node that names or declares a variable how the
+  # interpreter reaches it: a global slot, a slot in the running frame, a
+  # cell in that slot, or an upvalue of the running closure
+  def __init__(self):
     # stack of local scopes only
     self.scopes: List[Dict[str, bool]] = []
+    # parallel to scopes, the variables every scope declares, and the
+    # first frame slot it handed out
+    self.locals: List[Dict[str, Local]] = []
+    self.marks: List[int] = []
 
+    self.function = FunctionScope(None, 0)
     self.current_function = FunctionType.NONE
     self.current_class = ClassType.NONE
 
 
   def visit_block_stmt(self, stmt: Block):
+    outermost = self._is_outermost()
+
     self._begin_scope()
     self.resolve(stmt.statements)
     self._end_scope()
 
+    if outermost:
+      stmt.frame_size = self._take_frame()
+
 
   def visit_class_stmt(self, stmt: Class):
     enclosing_class = self.current_class
     self.current_class = ClassType.CLASS
 
-    self._declare(stmt.name)
+    self._declare(stmt.name, stmt)
     self._define(stmt.name)
 
     if (
@@ -61,12 +99,10 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
       self.current_class = ClassType.SUBCLASS
       self.resolve(stmt.super_class)
 
+    outermost = self._is_outermost()
     if stmt.super_class is not None:
       self._begin_scope()
-      self.scopes[-1]["super"] = True
-
-    self._begin_scope()
-    self.scopes[-1]["this"] = True
+      stmt.super_slot = self._add_local("super", True).slot
 
     for method in stmt.methods:
       declaration = FunctionType.METHOD
@@ -75,11 +111,12 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
 
       self._resolve_function(method, declaration)
 
-    self._end_scope()
-
     if stmt.super_class is not None:
       self._end_scope()
 
+      if outermost:
+        stmt.frame_size = self._take_frame()
+
     self.current_class = enclosing_class
 
 
@@ -88,7 +125,7 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
 
 
   def visit_function_stmt(self, stmt: Function):
-    self._declare(stmt.name)
+    self._declare(stmt.name, stmt)
     self._define(stmt.name)
 
     self._resolve_function(stmt, FunctionType.FUNCTION)
@@ -102,8 +139,15 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
       self.resolve(stmt.else_branch)
 
 
+  def visit_import_stmt(self, stmt: Import):
+    # imported modules run in the global scope, wherever they're imported
+    # from, so imports can't hide in blocks or function bodies
+    if self.scopes:
+      Logger.error(stmt.keyword, "Can only import at top level.")
+
+
   def visit_let_stmt(self, stmt: Let):
-    self._declare(stmt.name)
+    self._declare(stmt.name, stmt)
 
     if stmt.initializer is not None:
       self.resolve(stmt.initializer)
@@ -127,6 +171,8 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
           stmt.keyword, "Can't return a value from an initializer."
         )
 
+      if isinstance(stmt.value, Call):
+        stmt.value.tail = True
       self.resolve(stmt.value)
 
 
@@ -186,6 +232,7 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
       )
 
     self._resolve_local(expr, expr.keyword)
+    self._resolve_local(expr.this, expr.this.keyword)
 
 
   def visit_this_expr(self, expr: This):
@@ -217,14 +264,33 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
 
   def _begin_scope(self):
     self.scopes.append({})
+    self.locals.append({})
+    self.marks.append(self.function.next_slot)
 
 
   def _end_scope(self):
     self.scopes.pop()
+    self.locals.pop()
+    # slots of a closed scope are free for the next one, anything captured
+    # from them lives on in its cell
+    self.function.next_slot = self.marks.pop()
 
 
-  def _declare(self, name: Token):
+  def _is_outermost(self) -> bool:
+    return self.function.enclosing is None and len(self.scopes) == 0
+
+
+  def _take_frame(self) -> int:
+    # every outermost scope outside a function gets a frame of its own,
+    # the next one starts counting again
+    size = self.function.frame_size
+    self.function.frame_size = self.function.next_slot
+    return size
+
+
+  def _declare(self, name: Token, declaration: Optional[Binding] = None):
     if len(self.scopes) == 0:
+      global_slot(name.lexeme)
       return
 
     scope = self.scopes[-1]
@@ -232,7 +298,9 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
       Logger.error(name, "Already a variable with this name in this scope.")
 
     # false means not ready yet
-    scope[name.lexeme] = False
+    local = self._add_local(name.lexeme, False)
+    if declaration is not None:
+      self._use(local, declaration)
 
 
   def _define(self, name: Token):
@@ -242,11 +310,72 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
     self.scopes[-1][name.lexeme] = True
 
 
-  def _resolve_local(self, expr: Expr, name: Token):
+  def _add_local(self, name: str, ready: bool) -> Local:
+    function = self.function
+    local = Local(function.next_slot)
+    function.next_slot += 1
+    function.frame_size = max(function.frame_size, function.next_slot)
+
+    self.locals[-1][name] = local
+    self.scopes[-1][name] = ready
+    return local
+
+
+  def _use(self, local: Local, node: Binding):
+    node.access = CELL if local.captured else LOCAL
+    node.slot = local.slot
+    local.uses.append(node)
+
+
+  def _capture(self, local: Local):
+    if local.captured:
+      return
+
+    local.captured = True
+    for node in local.uses:
+      node.access = CELL
+
+
+  def _resolve_local(
+    self, expr: Union[Assign, Super, This, Variable], name: Token
+  ):
     for i in range(len(self.scopes) - 1, -1, -1):
-      if name.lexeme in self.scopes[i]:
-        self.interpreter.resolve(expr, len(self.scopes) - 1 - i)
-        return
+      local = self.locals[i].get(name.lexeme)
+      if local is None:
+        continue
+
+      if i >= self.function.base:
+        self._use(local, expr)
+      else:
+        expr.access = UPVALUE
+        expr.slot = self._resolve_upvalue(self.function, local, i)
+      return
+
+    expr.access = GLOBAL
+    expr.slot = global_slot(name.lexeme)
+
+
+  def _resolve_upvalue(
+    self, function: FunctionScope, local: Local, scope: int
+  ) -> int:
+    enclosing = cast(FunctionScope, function.enclosing)
+    if scope >= enclosing.base:
+      self._capture(local)
+      return self._add_upvalue(function, True, local.slot)
+
+    index = self._resolve_upvalue(enclosing, local, scope)
+    return self._add_upvalue(function, False, index)
+
+
+  def _add_upvalue(
+    self, function: FunctionScope, is_local: bool, index: int
+  ) -> int:
+    upvalue = (is_local, index)
+    if upvalue in function.upvalues:
+      return function.upvalues.index(upvalue)
+
+    function.upvalues.append(upvalue)
+    return len(function.upvalues) - 1
 
 
   def _resolve_function(
@@ -254,17 +383,31 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
   ):
     enclosing_function = self.current_function
     self.current_function = func_type
+    self.function = FunctionScope(self.function, len(self.scopes))
 
     self._begin_scope()
 
+    arguments: List[Local] = []
+    if func_type in (FunctionType.METHOD, FunctionType.INITIALIZER):
+      # the receiver's slot is already there, it only needs a name
+      receiver = self.locals[-1]["this"] = Local(0)
+      self.scopes[-1]["this"] = True
+      arguments.append(receiver)
+
     for param in function.params:
       self._declare(param)
       self._define(param)
+      arguments.append(self.locals[-1][param.lexeme])
 
     self.resolve(function.body)
 
+    function.frame_size = self.function.frame_size
+    function.upvalues = self.function.upvalues
+    function.cells = [local.slot for local in arguments if local.captured]
+
     self._end_scope()
 
+    self.function = cast(FunctionScope, self.function.enclosing)
     self.current_function = enclosing_function
 
 
@@ -0,0 +1,219 @@
+from parser.expr import (
+  Assign, Binary, Call, Expr, Get, Grouping, Literal, LOCAL,
+  Logical, Set, Super, This, Unary, Variable, Visitor as ExprVisitor
+)
+from parser.stmt import (
+  Block, Class, Expression, Function, If, Import, Let, Print,
+  Return, Stmt, Visitor as StmtVisitor, While
+)
+from scanner.tokentype import TokenType
+from typing import Dict, List, MutableSet, Optional, Union
+
+
+# operators that produce a number whenever they don't raise
+ARITHMETIC = (TokenType.MINUS, TokenType.SLASH, TokenType.STAR)
+
+# operators whose number-only operand checks the interpreter can skip
+CHECKED = (
+  TokenType.PLUS, TokenType.MINUS, TokenType.SLASH, TokenType.STAR,
+  TokenType.GREATER, TokenType.GREATER_EQUAL,
+  TokenType.LESS, TokenType.LESS_EQUAL
+)
+
+
+class TypeInferrer(ExprVisitor[bool], StmtVisitor[None]):
+  # runs over resolved programs and marks the Binary and Unary nodes whose
+  # operands are always numbers; expressions answer whether they always
+  # evaluate to one. A local qualifies when it isn't captured and every
+  # value it's ever given is a number, which is assumed of all of them
+  # until the program has been walked without ruling out any more
+  def __init__(self):
+    # the current function's scopes, naming each local's declaration,
+    # or None for parameters, functions and classes
+    self.scopes: List[Dict[str, Optional[Let]]] = []
+    self.ruled_out: MutableSet[Let] = set()
+
+
+  def infer(self, statements: List[Stmt]):
+    while True:
+      ruled_out = len(self.ruled_out)
+      self._infer_all(statements)
+
+      if len(self.ruled_out) == ruled_out:
+        return
+
+
+  def visit_block_stmt(self, stmt: Block):
+    self.scopes.append({})
+    self._infer_all(stmt.statements)
+    self.scopes.pop()
+
+
+  def visit_class_stmt(self, stmt: Class):
+    self._declare(stmt.name.lexeme, None)
+
+    if stmt.super_class is not None:
+      self._infer(stmt.super_class)
+
+    for method in stmt.methods:
+      self._infer_function(method)
+
+
+  def visit_expression_stmt(self, stmt: Expression):
+    self._infer(stmt.expression)
+
+
+  def visit_function_stmt(self, stmt: Function):
+    self._declare(stmt.name.lexeme, None)
+    self._infer_function(stmt)
+
+
+  def visit_if_stmt(self, stmt: If):
+    self._infer(stmt.condition)
+    stmt.then_branch.accept(self)
+
+    if stmt.else_branch is not None:
+      stmt.else_branch.accept(self)
+
+
+  def visit_import_stmt(self, stmt: Import):
+    return
+
+
+  def visit_let_stmt(self, stmt: Let):
+    number = False
+    if stmt.initializer is not None:
+      number = self._infer(stmt.initializer)
+
+    if stmt.access != LOCAL:
+      self._declare(stmt.name.lexeme, None)
+      return
+
+    if not number:
+      self.ruled_out.add(stmt)
+    self._declare(stmt.name.lexeme, stmt)
+
+
+  def visit_print_stmt(self, stmt: Print):
+    self._infer(stmt.expression)
+
+
+  def visit_return_stmt(self, stmt: Return):
+    if stmt.value is not None:
+      self._infer(stmt.value)
+
+
+  def visit_while_stmt(self, stmt: While):
+    self._infer(stmt.condition)
+    stmt.body.accept(self)
+
+
+  def visit_assign_expr(self, expr: Assign) -> bool:
+    number = self._infer(expr.value)
+
+    declaration = self._declaration(expr)
+    if declaration is not None and not number:
+      self.ruled_out.add(declaration)
+
+    return number
+
+
+  def visit_binary_expr(self, expr: Binary) -> bool:
+    left = self._infer(expr.left)
+    right = self._infer(expr.right)
+    operator = expr.operator.type
+
+    expr.numeric = left and right and operator in CHECKED
+
+    if operator == TokenType.PLUS:
+      return left and right
+    return operator in ARITHMETIC
+
+
+  def visit_calL_expr(self, expr: Call) -> bool:
+    self._infer(expr.callee)
+    for argument in expr.arguments:
+      self._infer(argument)
+
+    return False
+
+
+  def visit_get_expr(self, expr: Get) -> bool:
+    self._infer(expr.obj)
+    return False
+
+
+  def visit_grouping_expr(self, expr: Grouping) -> bool:
+    return self._infer(expr.expression)
+
+
+  def visit_literal_expr(self, expr: Literal) -> bool:
+    return type(expr.value) is float
+
+
+  def visit_logical_expr(self, expr: Logical) -> bool:
+    # either operand can be the result
+    left = self._infer(expr.left)
+    right = self._infer(expr.right)
+    return left and right
+
+
+  def visit_set_expr(self, expr: Set) -> bool:
+    self._infer(expr.obj)
+    return self._infer(expr.value)
+
+
+  def visit_super_expr(self, expr: Super) -> bool:
+    return False
+
+
+  def visit_this_expr(self, expr: This) -> bool:
+    return False
+
+
+  def visit_unary_expr(self, expr: Unary) -> bool:
+    right = self._infer(expr.right)
+    operator = expr.operator.type
+
+    expr.numeric = right and operator != TokenType.BANG
+    return operator != TokenType.BANG
+
+
+  def visit_variable_expr(self, expr: Variable) -> bool:
+    declaration = self._declaration(expr)
+    return declaration is not None and declaration not in self.ruled_out
+
+
+  def _infer_all(self, statements: List[Stmt]):
+    for statement in statements:
+      statement.accept(self)
+
+
+  def _infer_function(self, function: Function):
+    enclosing = self.scopes
+    self.scopes = [{param.lexeme: None for param in function.params}]
+
+    self._infer_all(function.body)
+
+    self.scopes = enclosing
+
+
+  def _infer(self, expr: Expr) -> bool:
+    return expr.accept(self)
+
+
+  def _declare(self, name: str, declaration: Optional[Let]):
+    if self.scopes:
+      self.scopes[-1][name] = declaration
+
+
+  def _declaration(self, expr: Union[Assign, Variable]) -> Optional[Let]:
+    # only uncaptured locals; anything else can change behind our back
+    if expr.access != LOCAL:
+      return None
+
+    for scope in reversed(self.scopes):
+      if expr.name.lexeme in scope:
+        return scope[expr.name.lexeme]
+
+    return None
@@ -0,0 +1,164 @@
+import mmap
+import re
+from logger.logger import Logger
+from scanner.fastscanner import (
+  CHAR_CLASSES, COMMENT, DIGIT, FIXED_LEXEMES, IDENTIFIER_START, QUOTE
+)
+from scanner.token import Token
+from scanner.tokentype import TokenType
+from sys import intern
+from typing import Dict, Generator, Iterator, List, Union
+
+
+# FastScanner's TOKEN_PATTERN over raw bytes; newlines and non-ASCII
+# characters get spelled out so lines and error messages come out exactly as
+# they would from the decoded text of a universal-newlines file
+BYTES_TOKEN_PATTERN = re.compile(rb"""
+    \r\n? | \n
+  | [A-Za-z_][A-Za-z0-9_]*
+  | //[^\r\n]*
+  | != | == | >= | <=
+  | [0-9]+(?:\.[0-9]+)?
+  | "[^"]*"
+  | [\xc0-\xff][\x80-\xbf]*
+  | [^ \t]
+""", re.VERBOSE)
+
+NEWLINE_PATTERN = re.compile(rb"\r\n?|\n")
+
+
+BYTES_FIXED_LEXEMES: Dict[bytes, TokenType] = {
+  lexeme.encode(): token_type for lexeme, token_type in FIXED_LEXEMES.items()
+}
+
+BYTES_CHAR_CLASSES: Dict[int, int] = {
+  ord(char): char_class for char, char_class in CHAR_CLASSES.items()
+}
+
+
+class MappedScanner:
+  # scans a script straight out of a memory-mapped file; only the lexemes
+  # that end up in tokens are ever decoded, never the file as a whole
+  def __init__(self, path: str, chunk_size: int = 1 << 16):
+    self.chunk_size = chunk_size
+    self.tokens: List[Token] = []
+    self.line = 1
+    # identifiers repeat a lot, decode each spelling once
+    self.names: Dict[bytes, str] = {}
+
+    self.file = open(path, "rb")
+    self.source: Union[mmap.mmap, bytes] = b""
+    try:
+      self.source = mmap.mmap(
+        self.file.fileno(), 0, access = mmap.ACCESS_READ
+      )
+    except ValueError: # empty files can't be mapped
+      pass
+
+
+  def __enter__(self) -> "MappedScanner":
+    return self
+
+
+  def __exit__(self, *exc_info: object):
+    self.close()
+
+
+  def close(self):
+    if isinstance(self.source, mmap.mmap):
+      self.source.close()
+    self.file.close()
+
+
+  def scan_tokens(self) -> List[Token]:
+    self.tokens.extend(self.iter_tokens())
+    return self.tokens
+
+
+  def iter_tokens(self) -> Iterator[Token]:
+    source = self.source
+    size = len(source)
+
+    start, min_end = 0, 0
+    while True:
+      # windows always end on a line break, the only place where no token
+      # except a string can be split
+      end = max(start + self.chunk_size, min_end)
+      newline = source.find(b"\n", end) if end < size else -1
+      final = newline == -1
+      end = size if final else newline + 1
+
+      resume = yield from self._scan(start, end, final)
+      if final:
+        break
+
+      start, min_end = resume, 0
+      if resume < end:
+        # a string is still open, grow the next window up to where it closes
+        closing = source.find(b"\"", resume + 1)
+        min_end = size if closing == -1 else closing + 1
+
+    yield Token(TokenType.EOF, "", None, self.line)
+
+
+  def _scan(
+    self, start: int, end: int, final: bool
+  ) -> Generator[Token, None, int]:
+    # returns how far the window was consumed, see FastScanner._scan
+    source = self.source
+    fixed_lexemes = BYTES_FIXED_LEXEMES
+    char_classes = BYTES_CHAR_CLASSES
+    names = self.names
+    line = self.line
+
+    for lexeme in BYTES_TOKEN_PATTERN.findall(source, start, end):
+      if lexeme == b"\n" or lexeme == b"\r\n" or lexeme == b"\r":
+        line += 1
+        continue
+
+      token_type = fixed_lexemes.get(lexeme)
+      if token_type is not None:
+        # operator and keyword spellings are their token type's value
+        yield Token(token_type, token_type.value, None, line)
+        continue
+
+      char_class = char_classes.get(lexeme[0])
+      if char_class == IDENTIFIER_START:
+        name = names.get(lexeme)
+        if name is None:
+          name = names[lexeme] = intern(lexeme.decode("ascii"))
+        yield Token(TokenType.IDENTIFIER, name, None, line)
+      elif char_class == DIGIT:
+        yield Token(
+          TokenType.NUMBER, lexeme.decode("ascii"), float(lexeme), line
+        )
+      elif char_class == QUOTE:
+        if len(lexeme) == 1:
+          quote = source.rfind(b"\"", start, end)
+          if not final:
+            self.line = line
+            return quote
+
+          self.line = line + len(NEWLINE_PATTERN.findall(source, quote, end))
+          Logger.error(self.line, "Unterminated string.")
+          return end
+
+        text = self._decode_text(lexeme)
+        line += text.count("\n")
+        yield Token(TokenType.STRING, text, text[1 : -1], line)
+      elif char_class == COMMENT:
+        pass
+      else:
+        Logger.error(line, f"Unexpected character {lexeme.decode()}.")
+
+    self.line = line
+    return end
+
+
+  def _decode_text(self, lexeme: bytes) -> str:
+    # the same newline translation open() applies in text mode
+    text = lexeme.decode()
+    if "\r" in text:
+      text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+    return text
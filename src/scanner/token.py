@@ -3,6 +3,9 @@ from typing import Optional, Union
 
 
 class Token:
+  # no per-token __dict__, a program holds on to every one of these
+  __slots__ = ("type", "lexeme", "literal", "line")
+
   def __init__(
     self,
     token_type: TokenType,
@@ -18,5 +21,9 @@ class Token:
   def to_string(self): # remove this method
     return f"{self.type} {self.lexeme} {self.literal}"
 
+  def __reduce__(self):
+    # pickles as a plain constructor call instead of slot-by-slot state
+    return (Token, (self.type, self.lexeme, self.literal, self.line))
+
   def __repr__(self):
     return f"Token({self.type}, {self.lexeme}, {self.literal}, {self.line})"
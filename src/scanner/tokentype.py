@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Optional
+from typing import Dict, Optional
 
 
 class TokenType(Enum):
@@ -39,6 +39,7 @@ class TokenType(Enum):
   FOR = "for"
   FUNCTION = "function"
   IF = "if"
+  IMPORT = "import"
   LET = "let"
   OR = "or"
   PRINT = "print"
@@ -55,23 +56,26 @@ class TokenType(Enum):
 
   @staticmethod
   def key_words(key: str) -> Optional["TokenType"]:
-    reserved_words = {
-      "and": TokenType.AND,
-      "class": TokenType.CLASS,
-      "else": TokenType.ELSE,
-      "false": TokenType.FALSE,
-      "for": TokenType.FOR,
-      "function": TokenType.FUNCTION,
-      "if": TokenType.IF,
-      "let": TokenType.LET,
-      "or": TokenType.OR,
-      "print": TokenType.PRINT,
-      "return": TokenType.RETURN,
-      "super": TokenType.SUPER,
-      "this": TokenType.THIS,
-      "true": TokenType.TRUE,
-      "void": TokenType.VOID,
-      "while": TokenType.WHILE,
-    }
+    return KEY_WORDS.get(key, None)
 
-    return reserved_words.get(key, None)
+
+# built once at import time instead of on every identifier
+KEY_WORDS: Dict[str, TokenType] = {
+  "and": TokenType.AND,
+  "class": TokenType.CLASS,
+  "else": TokenType.ELSE,
+  "false": TokenType.FALSE,
+  "for": TokenType.FOR,
+  "function": TokenType.FUNCTION,
+  "if": TokenType.IF,
+  "import": TokenType.IMPORT,
+  "let": TokenType.LET,
+  "or": TokenType.OR,
+  "print": TokenType.PRINT,
+  "return": TokenType.RETURN,
+  "super": TokenType.SUPER,
+  "this": TokenType.THIS,
+  "true": TokenType.TRUE,
+  "void": TokenType.VOID,
+  "while": TokenType.WHILE,
+}
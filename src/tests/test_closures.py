@@ -0,0 +1,106 @@
+# usage (from src/): python -m unittest tests.test_closures
+
+from closures.engine import ClosureEngine
+from contextlib import redirect_stdout
+from interpreter.interpreter import Interpreter
+from io import StringIO
+from logger.logger import Logger
+from parser.parser import Parser
+from resolver.resolver import Resolver
+from resolver.typeinferrer import TypeInferrer
+from scanner.fastscanner import FastScanner
+from typing import Union
+from unittest import main, TestCase
+from vm.vm import VM
+
+
+Engine = Union[ClosureEngine, Interpreter, VM]
+
+
+def _run(engine: Engine, source: str) -> str:
+  statements = Parser(FastScanner(source).scan_tokens()).parse()
+  Resolver().resolve(statements)
+  TypeInferrer().infer(statements)
+
+  output = StringIO()
+  with redirect_stdout(output):
+    engine.interpret(statements)
+  return output.getvalue()
+
+
+class ClosureEngineTest(TestCase):
+  def assert_same_output(self, source: str):
+    # the tree-walker is the reference, the VM is held to it as well
+    expected = _run(Interpreter(), source)
+    self.assertEqual(_run(VM(), source), expected)
+    self.assertEqual(_run(ClosureEngine(), source), expected)
+
+
+  def test_values_print_alike(self):
+    self.assert_same_output("""
+function f() {}
+class A { m() {} }
+let a = A();
+print void; print 1; print 1.5; print -0; print 100000000000000000000000;
+print true; print false; print "s";
+print f; print A; print a; print a.m; print clock;
+""")
+
+
+  def test_method_call_reads_field_before_arguments(self):
+    self.assert_same_output("""
+function f1(x) { return "f1"; }
+function f2(x) { return "f2"; }
+class A { construct() { this.f = f1; } }
+let a = A();
+print a.f(a.f = f2);
+""")
+
+
+  def test_method_call_site_entered_again_by_its_arguments(self):
+    self.assert_same_output("""
+class B { m(x) { return x; } }
+class C { m(x) { return "c" + x; } }
+function run(o, other, depth) {
+  return o.m(depth > 0 and run(other, o, 0) or "z");
+}
+print run(B(), C(), 1);
+""")
+
+
+  def test_tail_calls_run_deeper_than_python_recursion(self):
+    self.assert_same_output("""
+function count(n, total) {
+  if (n == 0) return total;
+  return count(n - 1, total + n);
+}
+class Counter {
+  down(n) {
+    if (n == 0) return "done";
+    return this.down(n - 1);
+  }
+}
+print count(5000, 0);
+print Counter().down(5000);
+""")
+
+
+  def test_runaway_recursion_is_a_runtime_error(self):
+    # the tree-walker runs out of Python stack, the VM is the reference
+    source = """
+function deep(n) {
+  if (n == 0) return 0;
+  return 1 + deep(n - 1);
+}
+print deep(100000);
+"""
+    try:
+      output = _run(ClosureEngine(), source)
+      self.assertEqual(output, "Stack overflow.\n[line 4]\n")
+      self.assertEqual(output, _run(VM(), source))
+    finally:
+      Logger.encountered_runtime_error = False
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,117 @@
+# usage (from src/): python -m unittest tests.test_incremental
+
+from parser.expr import Expr
+from parser.incremental import IncrementalParser
+from parser.parser import Parser
+from parser.stmt import Stmt
+from scanner.fastscanner import FastScanner
+from scanner.token import Token
+from typing import List
+from unittest import main, TestCase
+
+
+SOURCE = """let a = 1;
+
+function f(x) {
+  if (x > a) return x;
+  else return a;
+}
+
+class Point {
+  construct(x) {
+    this.x = x;
+  }
+}
+
+print f(2);
+"""
+
+
+def _dump(node: object) -> object:
+  # the whole tree as plain values, tokens with the lines they point at
+  if isinstance(node, list):
+    return [_dump(element) for element in node]
+  if isinstance(node, Token):
+    return (node.type, node.lexeme, node.literal, node.line)
+  if isinstance(node, (Expr, Stmt)):
+    return (
+      type(node).__name__,
+      [_dump(getattr(node, name)) for name in type(node).__slots__]
+    )
+
+  return node
+
+
+def _parse(source: str) -> List[Stmt]:
+  return Parser(FastScanner(source).scan_tokens()).parse()
+
+
+class IncrementalParserTest(TestCase):
+  def setUp(self):
+    self.parser = IncrementalParser(SOURCE)
+
+
+  def _edit(self, old: str, new: str) -> List[Stmt]:
+    start = self.parser.source.index(old)
+    return self.parser.edit(start, start + len(old), new)
+
+
+  def _assert_matches_full_parse(self):
+    self.assertEqual(
+      _dump(self.parser.statements()), _dump(_parse(self.parser.source))
+    )
+
+
+  def test_initial_parse_matches_full_parse(self):
+    self._assert_matches_full_parse()
+
+
+  def test_untouched_statements_are_reused(self):
+    before = self.parser.statements()
+    reparsed = self._edit("return x;", "return x * 2;")
+
+    after = self.parser.statements()
+    self.assertEqual(len(reparsed), 1)
+    self.assertIsNot(after[1], before[1])
+    for index in (0, 2, 3):
+      self.assertIs(after[index], before[index])
+    self._assert_matches_full_parse()
+
+
+  def test_statements_behind_new_lines_are_shifted(self):
+    before = self.parser.statements()
+    self._edit("let a = 1;", "let a = 1;\nlet b = 2;\n")
+
+    after = self.parser.statements()
+    self.assertEqual(len(after), len(before) + 1)
+    self.assertIs(after[-1], before[-1])
+    self._assert_matches_full_parse()
+
+
+  def test_edits_across_declarations(self):
+    self._edit("}\n\nclass", "} print a;\nclass")
+    self._assert_matches_full_parse()
+
+    self._edit("else return a;", "")
+    self._assert_matches_full_parse()
+
+    self._edit("let a = 1;\n\n", "")
+    self._assert_matches_full_parse()
+
+    end = len(self.parser.source)
+    self.parser.edit(end, end, "print a;\n")
+    self._assert_matches_full_parse()
+
+
+  def test_edit_gluing_an_else_reparses_the_if(self):
+    parser = IncrementalParser("if (true) print 1;\nprint 2;\n")
+    parser.edit(18, 19, " else ")
+
+    self.assertEqual(len(parser.statements()), 1)
+    self.assertEqual(
+      _dump(parser.statements()), _dump(_parse(parser.source))
+    )
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,71 @@
+# usage (from src/): python -m unittest tests.test_programcache
+
+import os
+from cache.programcache import ProgramCache
+from parser.parser import Parser
+from resolver.resolver import Resolver
+from scanner.fastscanner import FastScanner
+from tempfile import TemporaryDirectory
+from unittest import main, TestCase
+
+
+SOURCE = """
+function add(a, b) {
+  return a + b;
+}
+print add(1, 2);
+"""
+
+
+class ProgramCacheTest(TestCase):
+  def setUp(self):
+    self.directory = TemporaryDirectory()
+    self.script = os.path.join(self.directory.name, "script.tnt")
+    with open(self.script, "w") as file:
+      file.write(SOURCE)
+
+    statements = Parser(FastScanner(SOURCE).scan_tokens()).parse()
+    Resolver().resolve(statements)
+    cache = ProgramCache(self.script)
+    cache.store(statements)
+    self.entry_path = cache.entry_path
+
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+
+  def test_stored_entry_loads(self):
+    self.assertIsNotNone(ProgramCache(self.script).load())
+
+
+  def test_truncated_entry_is_a_miss(self):
+    with open(self.entry_path, "rb") as file:
+      entry = file.read()
+
+    header = entry.index(b"\n") + 1
+    # every cut through the payload, the header still matches
+    for end in range(header, len(entry), 7):
+      with open(self.entry_path, "wb") as file:
+        file.write(entry[:end])
+
+      self.assertIsNone(ProgramCache(self.script).load())
+
+
+  def test_corrupted_entry_is_a_miss(self):
+    with open(self.entry_path, "rb") as file:
+      entry = bytearray(file.read())
+
+    header = entry.index(b"\n") + 1
+    for index in range(header, len(entry), 5):
+      damaged = entry.copy()
+      damaged[index] ^= 0xff
+      with open(self.entry_path, "wb") as file:
+        file.write(damaged)
+
+      # anything but a Python error escaping load
+      ProgramCache(self.script).load()
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,46 @@
+# usage (from src/): python -m unittest tests.test_vm
+
+from contextlib import redirect_stdout
+from io import StringIO
+from math import copysign
+from optimizer.optimizer import Optimizer
+from parser.parser import Parser
+from parser.stmt import Stmt
+from resolver.resolver import Resolver
+from scanner.fastscanner import FastScanner
+from typing import List
+from unittest import main, TestCase
+from vm.compiler import Compiler
+from vm.vm import VM
+
+
+def _front_end(source: str) -> List[Stmt]:
+  # folded, so -0 reaches the compiler as a literal like 0 does
+  statements = Parser(FastScanner(source).scan_tokens()).parse()
+  Resolver().resolve(statements)
+  return Optimizer().optimize(statements)
+
+
+class ConstantPoolTest(TestCase):
+  def test_signed_zeros_get_their_own_constants(self):
+    code = Compiler().compile(_front_end("print 0; print -0;"))
+    zeros = [
+      copysign(1.0, value) for value in code.constants
+      if type(value) is float and value == 0
+    ]
+
+    self.assertEqual(sorted(zeros), [-1.0, 1.0])
+
+
+  def test_signed_zeros_print_as_written(self):
+    output = StringIO()
+    with redirect_stdout(output):
+      VM().interpret(
+        _front_end("print -0; let z = -0; print z; print 0 * 1;")
+      )
+
+    self.assertEqual(output.getvalue().split(), ["-0", "-0", "0"])
+
+
+if __name__ == "__main__":
+  main()
@@ -1,33 +1,135 @@
+from argparse import ArgumentParser, Namespace
+from cache.programcache import ProgramCache
+from closures.engine import ClosureEngine
 from interpreter.interpreter import Interpreter
+from jit.jit import THRESHOLD
+from loader.moduleloader import ModuleLoader
 from logger.logger import Logger
 from logger.repl import Repl
+from optimizer.optimizer import NodeCounter, Optimizer
 from parser.parser import Parser
 from resolver.resolver import Resolver
-from scanner.scanner import Scanner
-from sys import argv, exit
+from resolver.typeinferrer import TypeInferrer
+from scanner.fastscanner import FastScanner, TOKEN_PATTERN
+from scanner.mappedscanner import MappedScanner
+from scanner.token import Token
+from sys import exit, stderr
+from parser.stmt import Stmt
+from typing import Iterable, List, Optional, TextIO, Union
+from vm.vm import VM
 # from tools.astprinter import AstPrinter
 
 
 interpreter = Interpreter()
+# one resolver for the whole process, REPL entries build on its state
+resolver = Resolver()
+loader = ModuleLoader()
+machine = VM()
+closure_engine = ClosureEngine()
+# whatever executes resolved programs, picked with --engine
+engine: Union[Interpreter, VM, ClosureEngine] = interpreter
+# set by --optimize and --optimizer-stats
+optimizing = False
+optimizer_stats = False
+# set by --jit-report
+jit_report = False
+
+
+class UsageParser(ArgumentParser):
+  def error(self, message: str):
+    self.print_usage()
+    print(f"{self.prog}: error: {message}")
+    exit(64)
 
 
-def main():
-  if len(argv) > 2:
-    print("Usage: thanatos [script]")
-    exit(64)
+def parse_arguments() -> Namespace:
+  parser = UsageParser(prog = "thanatos")
+  parser.add_argument("script", nargs = "?")
+  parser.add_argument(
+    "--mmap", action = "store_true",
+    help = "memory-map the script and scan it as raw bytes"
+  )
+  parser.add_argument(
+    "--engine", choices = ("tree", "vm", "closure"), default = "tree",
+    help = (
+      "walk the syntax tree, compile to bytecode for the VM or compile "
+      "to Python closures"
+    )
+  )
+  parser.add_argument(
+    "--no-cache", action = "store_true",
+    help = "neither read nor write the __tntcache__ entry of the script"
+  )
+  parser.add_argument(
+    "-O", "--optimize", action = "store_true",
+    help = "fold constants and drop dead code before running"
+  )
+  parser.add_argument(
+    "--optimizer-stats", action = "store_true",
+    help = "optimize and print node counts before and after to stderr"
+  )
+  parser.add_argument(
+    "--jit-threshold", type = int, default = THRESHOLD, metavar = "CALLS",
+    help = (
+      "calls, or loop iterations, after which the tree-walker compiles a "
+      "function or specializes a loop to Python code, 0 never compiles"
+    )
+  )
+  parser.add_argument(
+    "--jit-report", action = "store_true",
+    help = (
+      "print which functions and loops the tree-walker compiled to stderr"
+    )
+  )
+
+  return parser.parse_args()
 
-  if len(argv) == 2:
-    run_file(argv[1])
+
+def main():
+  global engine, jit_report, optimizing, optimizer_stats
+
+  arguments = parse_arguments()
+  if arguments.engine == "vm":
+    engine = machine
+  elif arguments.engine == "closure":
+    engine = closure_engine
+  optimizer_stats = arguments.optimizer_stats
+  interpreter.jit.threshold = arguments.jit_threshold
+  jit_report = arguments.jit_report
+  loader.cached = not arguments.no_cache
+  optimizing = arguments.optimize or optimizer_stats
+
+  if arguments.script is not None:
+    run_file(arguments.script, arguments.mmap, not arguments.no_cache)
   else:
     run_repl()
 
 
-def run_file(path: str):
-  file_contents = None
-  with open(path) as file:
-    file_contents = file.read()
+def run_file(path: str, mapped: bool = False, cached: bool = True):
+  cache = ProgramCache(path) if cached else None
+
+  program = cache.load() if cache is not None else None
+  if program is not None:
+    statements = program
+  elif mapped:
+    with MappedScanner(path) as scanner:
+      statements = front_end(scanner.iter_tokens())
+  else:
+    with open(path) as file:
+      statements = front_end(FastScanner(file).iter_tokens())
+
+  if statements is not None:
+    if program is None and cache is not None:
+      # runtime errors don't depend on the cache, only clean front end
+      # results are worth keeping
+      cache.store(statements)
+    statements = loader.link(statements, path)
+
+  if statements is not None:
+    engine.interpret(optimize(statements))
 
-  run(file_contents)
+  if jit_report:
+    interpreter.jit.report(stderr)
 
   if Logger.encountered_error:
     exit(65)
@@ -38,33 +140,108 @@ def run_file(path: str):
 def run_repl():
   repl = Repl((184, 146, 255), "tnt ϟ")
 
+  # lines are collected until they form complete declarations, an empty
+  # line submits whatever is there to get its errors reported
+  entry = ""
+
   while True:
     try:
-      line = repl.prompt()
-      run(line)
-      Logger.encountered_error = False
+      line = repl.prompt(continued = entry != "")
     except KeyboardInterrupt:
+      print()
+      if entry == "":
+        break
+      entry = ""
+      continue
+    except EOFError:
       print()
       break
 
+    entry += line + "\n"
+    if line.strip() != "" and needs_more_input(entry):
+      continue
+
+    run(entry)
+    Logger.encountered_error = False
+    entry = ""
 
-def run(source: str):
-  scanner = Scanner(source)
-  tokens = scanner.scan_tokens()
 
+def needs_more_input(source: str) -> bool:
+  # an entry typed so far is still open when a bracket or string isn't
+  # closed yet, or when it doesn't end in a ';' or '}' terminator
+  depth = 0
+  last: Optional[str] = None
+
+  for lexeme in TOKEN_PATTERN.findall(source):
+    if lexeme == "\n" or lexeme.startswith("//"):
+      continue
+
+    if lexeme == "(" or lexeme == "{":
+      depth += 1
+    elif lexeme == ")" or lexeme == "}":
+      depth = max(depth - 1, 0)
+    elif lexeme == "\"":
+      return True
+
+    last = lexeme
+
+  return last is not None and (depth > 0 or last not in (";", "}"))
+
+
+def run(source: Union[str, TextIO]):
+  run_tokens(FastScanner(source).iter_tokens())
+
+
+def run_tokens(tokens: Iterable[Token]):
+  statements = front_end(tokens)
+  if statements is not None:
+    statements = loader.link(statements)
+
+  if statements is not None:
+    engine.interpret(optimize(statements))
+
+
+def front_end(tokens: Iterable[Token]) -> Optional[List[Stmt]]:
+  # the parser pulls tokens as the scanner reads them, so a script is never
+  # held in memory as one string or one token list
   parser = Parser(tokens)
   statements = parser.parse()
 
   if Logger.encountered_error:
-    return
+    return None
 
-  resolver = Resolver(interpreter)
   resolver.resolve(statements)
 
   if Logger.encountered_error:
-    return
-
-  interpreter.interpret(statements)
+    return None
+
+  TypeInferrer().infer(statements)
+  return statements
+
+
+def optimize(statements: List[Stmt]) -> List[Stmt]:
+  # runs on resolved programs, so code that gets dropped still had its
+  # diagnostics reported
+  if not optimizing:
+    return statements
+
+  optimizer = Optimizer()
+  if not optimizer_stats:
+    return optimizer.optimize(statements)
+
+  counter = NodeCounter()
+  before = counter.count(statements)
+  statements = optimizer.optimize(statements)
+  after = counter.count(statements)
+
+  print(
+    f"optimizer: {before} -> {after} nodes, "
+    f"{optimizer.folded_constants} constants folded, "
+    f"{optimizer.pruned_branches} branches pruned, "
+    f"{optimizer.dead_statements} unreachable statements dropped",
+    file = stderr
+  )
+  return statements
 
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+# usage (from src/): python -m tools.astmemory [copies]
+#
+# compares the slotted AST nodes with the same classes rebuilt the way they
+# used to be, with a __dict__ per node
+
+import tracemalloc
+from optimizer.optimizer import NodeCounter
+from parser import expr, stmt
+from parser.expr import Expr
+from parser.parser import Parser
+from parser.stmt import Stmt
+from scanner.fastscanner import FastScanner
+from sys import argv
+from time import perf_counter
+from tools import parserbench, scannerbench
+from typing import Callable, Dict, List, Tuple
+
+
+def _dict_classes() -> Dict[type, type]:
+  classes: Dict[type, type] = {}
+  for module, base in ((expr, Expr), (stmt, Stmt)):
+    for node_class in base.__subclasses__():
+      if node_class.__module__ == module.__name__:
+        classes[node_class] = type(node_class.__name__, (base,), {
+          "__init__": node_class.__init__, "accept": node_class.accept
+        })
+
+  return classes
+
+
+def _copy(node: object, classes: Dict[type, type]) -> object:
+  if isinstance(node, list):
+    return [_copy(element, classes) for element in node]
+  if not isinstance(node, (Expr, Stmt)):
+    return node
+
+  node_class = type(node)
+  return classes.get(node_class, node_class)(*(
+    _copy(getattr(node, name), classes) for name in node_class.__slots__
+  ))
+
+
+def _measure(build: Callable[[], object]) -> Tuple[int, object]:
+  # tokens already exist when this runs, only the nodes are counted
+  tracemalloc.start()
+  tree = build()
+  retained, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+
+  return retained, tree
+
+
+def _traverse(statements: List[Stmt]) -> float:
+  best = float("inf")
+  for _ in range(3):
+    begin = perf_counter()
+    NodeCounter().count(statements)
+    best = min(best, perf_counter() - begin)
+
+  return best
+
+
+def main():
+  copies = int(argv[1]) if len(argv) > 1 else 500
+  source = (scannerbench.SAMPLE + parserbench.SAMPLE) * copies
+  statements = Parser(FastScanner(source).scan_tokens()).parse()
+  count = NodeCounter().count(statements)
+
+  classes = _dict_classes()
+  before, dict_tree = _measure(lambda: _copy(statements, classes))
+  after, slot_tree = _measure(lambda: _copy(statements, {}))
+
+  print(f"{count} nodes")
+  for name, retained, tree in (
+    ("dict nodes", before, dict_tree), ("slot nodes", after, slot_tree)
+  ):
+    seconds = _traverse(tree) # type: ignore
+    print(
+      f"{name}: {retained / count:6.1f} bytes/node  "
+      f"visit all {seconds * 1000:7.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,95 @@
+# usage (from src/): python -m tools.closurebench [n]
+#
+# the same resolved programs run by the tree-walker and by the closure
+# compiler: recursive calls, a numeric loop and method calls
+
+from closures.engine import ClosureEngine
+from interpreter.interpreter import Interpreter
+from parser.parser import Parser
+from parser.stmt import Stmt
+from resolver.resolver import Resolver
+from resolver.typeinferrer import TypeInferrer
+from scanner.fastscanner import FastScanner
+from sys import argv
+from time import perf_counter
+from typing import Callable, List
+
+
+WORKLOADS = {
+  "fib": """
+function fib(n) {
+  if (n < 2) return n;
+  return fib(n - 1) + fib(n - 2);
+}
+fib(%d);
+""",
+  "loop": """
+function run(n) {
+  let total = 0;
+  for (let i = 0; i < n * 1000; i = i + 1) {
+    total = total + i * 2 - 1;
+  }
+  return total;
+}
+run(%d);
+""",
+  "methods": """
+class Counter {
+  construct() {
+    this.count = 0;
+  }
+
+  add(step) {
+    this.count = this.count + step;
+  }
+}
+
+function run(n) {
+  let counter = Counter();
+  for (let i = 0; i < n * 500; i = i + 1) {
+    counter.add(1);
+  }
+  return counter.count;
+}
+run(%d);
+"""
+}
+
+
+def _time(run: Callable[[], None]) -> float:
+  best = float("inf")
+  for _ in range(3):
+    begin = perf_counter()
+    run()
+    best = min(best, perf_counter() - begin)
+
+  return best
+
+
+def _front_end(source: str) -> List[Stmt]:
+  statements = Parser(FastScanner(source).scan_tokens()).parse()
+  Resolver().resolve(statements)
+  TypeInferrer().infer(statements)
+  return statements
+
+
+def main():
+  n = int(argv[1]) if len(argv) > 1 else 22
+
+  for name, source in WORKLOADS.items():
+    statements = _front_end(source % n)
+    interpreter, engine = Interpreter(), ClosureEngine()
+    # the walker on its own, without the jit taking over hot functions
+    interpreter.jit.threshold = 0
+
+    # the closure engine compiles the program again on every run
+    tree = _time(lambda: interpreter.interpret(statements))
+    closures = _time(lambda: engine.interpret(statements))
+    print(
+      f"{name:8} tree-walker {tree:7.3f} s  "
+      f"closures {closures:7.3f} s  ({tree / closures:.2f}x)"
+    )
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,183 @@
+# usage (from src/): python -m tools.envbench [operations]
+#
+# local variable reads and writes through flat frames and cells, against
+# the chained slot environments they replaced and the name-keyed ones
+# before those
+
+from interpreter.environment import Cell
+from interpreter.interpreter import Interpreter
+from parser.parser import Parser
+from resolver.resolver import Resolver
+from scanner.fastscanner import FastScanner
+from sys import argv
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+NAMES = ["alpha", "beta", "gamma", "delta", "total", "index", "step", "x"]
+
+WORKLOAD = """
+function run(n) {
+  let total = 0;
+  let step = 1;
+  for (let i = 0; i < n; i = i + 1) {
+    let x = i;
+    {
+      let y = x + step;
+      total = total + y - x;
+    }
+  }
+  return total;
+}
+run(%d);
+"""
+
+
+class DictEnvironment:
+  # the environment layout before slots (minus its debug print), kept for
+  # comparison
+  def __init__(self, enclosing: Optional["DictEnvironment"] = None):
+    self.values: Dict[str, object] = {}
+    self.enclosing = enclosing
+
+
+  def get_at(self, distance: int, name: str) -> object:
+    return self.ancestor(distance).values.get(name)
+
+
+  def assign_at(self, distance: int, name: str, value: object):
+    self.ancestor(distance).values[name] = value
+
+
+  def ancestor(self, distance: int) -> "DictEnvironment":
+    environment = self
+    for _ in range(distance):
+      if environment.enclosing is None:
+        break
+
+      environment = environment.enclosing
+
+    return environment
+
+
+class SlotEnvironment:
+  # the chained environments from before flat frames
+  def __init__(self, enclosing: Optional["SlotEnvironment"] = None):
+    self.slots: List[object] = []
+    self.enclosing = enclosing
+
+
+  def get_at(self, distance: int, slot: int) -> object:
+    if distance == 0:
+      return self.slots[slot]
+
+    return self.ancestor(distance).slots[slot]
+
+
+  def assign_at(self, distance: int, slot: int, value: object):
+    if distance == 0:
+      self.slots[slot] = value
+    else:
+      self.ancestor(distance).slots[slot] = value
+
+
+  def ancestor(self, distance: int) -> "SlotEnvironment":
+    environment = self
+    for _ in range(distance):
+      if environment.enclosing is None:
+        break
+
+      environment = environment.enclosing
+
+    return environment
+
+
+def _dict_chain(depth: int) -> DictEnvironment:
+  environment = DictEnvironment()
+  for _ in range(depth + 1):
+    environment = DictEnvironment(environment)
+    for name in NAMES:
+      environment.values[name] = 1.0
+
+  return environment
+
+
+def _slot_chain(depth: int) -> SlotEnvironment:
+  environment = SlotEnvironment()
+  for _ in range(depth + 1):
+    environment = SlotEnvironment(environment)
+    environment.slots.extend(1.0 for _ in NAMES)
+
+  return environment
+
+
+def _time(run: Callable[[], None]) -> float:
+  best = float("inf")
+  for _ in range(3):
+    begin = perf_counter()
+    run()
+    best = min(best, perf_counter() - begin)
+
+  return best
+
+
+def _accesses(operations: int) -> List[Tuple[int, int]]:
+  # (distance, slot) pairs shaped like loop code: mostly the innermost
+  # scope, sometimes one or two levels out
+  return [
+    (index % 7 // 3, index % len(NAMES)) for index in range(operations)
+  ]
+
+
+def main():
+  operations = int(argv[1]) if len(argv) > 1 else 1_000_000
+  accesses = _accesses(operations)
+  named = [(distance, NAMES[slot]) for distance, slot in accesses]
+
+  dict_environment = _dict_chain(2)
+  slot_environment = _slot_chain(2)
+  # a frame holds all of a call's blocks, only captured variables (here
+  # every one past distance 0) go through a cell
+  frame: List[object] = [1.0] * len(NAMES)
+  cells = [Cell(1.0) for _ in NAMES]
+
+  def dict_loop():
+    for distance, name in named:
+      dict_environment.assign_at(
+        distance, name, dict_environment.get_at(distance, name)
+      )
+
+  def slot_loop():
+    for distance, slot in accesses:
+      slot_environment.assign_at(
+        distance, slot, slot_environment.get_at(distance, slot)
+      )
+
+  def frame_loop():
+    for distance, slot in accesses:
+      if distance == 0:
+        frame[slot] = frame[slot]
+      else:
+        cell = cells[slot]
+        cell.value = cell.value
+
+  before = _time(dict_loop)
+  print(f"{operations} reads and writes at distance 0-2")
+  print(f"dict environments: {before:7.3f} s")
+  for name, loop in (
+    ("slot environments", slot_loop), ("frames and cells ", frame_loop)
+  ):
+    after = _time(loop)
+    print(f"{name}: {after:7.3f} s  ({before / after:.2f}x)")
+
+  interpreter = Interpreter()
+  statements = Parser(FastScanner(WORKLOAD % 100_000).scan_tokens()).parse()
+  Resolver().resolve(statements)
+  print(
+    f"tree-walker loop, 100000 iterations: "
+    f"{_time(lambda: interpreter.interpret(statements)):7.3f} s"
+  )
+
+
+if __name__ == "__main__":
+  main()
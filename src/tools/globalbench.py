@@ -0,0 +1,103 @@
+# usage (from src/): python -m tools.globalbench [calls]
+#
+# global function calls in a tight loop, first as bare lookups in the
+# slot-indexed universe against the name-keyed one it replaced, then
+# through the tree-walker
+
+from errors.executionerror import ExecutionError
+from interpreter.environment import Environment
+from interpreter.interpreter import Interpreter
+from parser.expr import global_slot
+from parser.parser import Parser
+from resolver.resolver import Resolver
+from scanner.fastscanner import FastScanner
+from scanner.token import Token
+from scanner.tokentype import TokenType
+from sys import argv
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+
+NAMES = ["clock", "add", "twice", "fib", "Point", "total", "limit", "step"]
+
+WORKLOAD = """
+function add(a, b) {
+  return a + b;
+}
+
+function twice(x) {
+  return add(x, x);
+}
+
+let total = 0;
+for (let i = 0; i < %d; i = i + 1) {
+  total = add(total, twice(1));
+}
+"""
+
+
+class NamedUniverse:
+  # the universe before global slots, kept for comparison
+  def __init__(self):
+    self.values: Dict[str, object] = {}
+
+
+  def get(self, name: Token) -> object:
+    if name.lexeme in self.values:
+      return self.values[name.lexeme]
+
+    raise ExecutionError(name, f"Undefined variable '{name.lexeme}'.")
+
+
+def _time(run: Callable[[], None]) -> float:
+  best = float("inf")
+  for _ in range(3):
+    begin = perf_counter()
+    run()
+    best = min(best, perf_counter() - begin)
+
+  return best
+
+
+def _uses(calls: int) -> List[Tuple[Token, int]]:
+  tokens = [Token(TokenType.IDENTIFIER, name, None, 1) for name in NAMES]
+  return [
+    (tokens[index % len(NAMES)], global_slot(NAMES[index % len(NAMES)]))
+    for index in range(calls)
+  ]
+
+
+def main():
+  calls = int(argv[1]) if len(argv) > 1 else 100_000
+  uses = _uses(calls * 10)
+
+  named = NamedUniverse()
+  universe = Environment()
+  for name in NAMES:
+    named.values[name] = 1.0
+    universe.define(name, 1.0)
+
+  def named_loop():
+    for name, _ in uses:
+      named.get(name)
+
+  def slot_loop():
+    for name, slot in uses:
+      universe.get_global(name, slot)
+
+  before, after = _time(named_loop), _time(slot_loop)
+  print(f"{len(uses)} global reads")
+  print(f"named universe: {before:7.3f} s")
+  print(f"slot universe:  {after:7.3f} s  ({before / after:.2f}x)")
+
+  interpreter = Interpreter()
+  statements = Parser(FastScanner(WORKLOAD % calls).scan_tokens()).parse()
+  Resolver().resolve(statements)
+  print(
+    f"tree-walker, {calls} iterations of add(total, twice(1)): "
+    f"{_time(lambda: interpreter.interpret(statements)):7.3f} s"
+  )
+
+
+if __name__ == "__main__":
+  main()
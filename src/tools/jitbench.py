@@ -0,0 +1,96 @@
+# usage (from src/): python -m tools.jitbench [n]
+#
+# call-heavy programs on the tree-walker with its jit off and on, followed
+# by what the jit did with their functions
+
+from interpreter.interpreter import Interpreter
+from jit.jit import THRESHOLD
+from parser.parser import Parser
+from parser.stmt import Stmt
+from resolver.resolver import Resolver
+from resolver.typeinferrer import TypeInferrer
+from scanner.fastscanner import FastScanner
+from sys import argv, stdout
+from time import perf_counter
+from typing import List
+
+
+WORKLOADS = {
+  "fib": """
+function fib(n) {
+  if (n < 2) return n;
+  return fib(n - 1) + fib(n - 2);
+}
+fib(%d);
+""",
+  "step": """
+function step(x, y) {
+  let d = x * x - y;
+  if (d < 0) d = -d;
+  return d / (y + 1);
+}
+
+let total = 0;
+for (let i = 0; i < %d * 2000; i = i + 1) {
+  total = total + step(i, total);
+}
+""",
+  "point": """
+class Point {
+  construct(x) {
+    this.x = x;
+  }
+}
+
+function norm(point) {
+  return point.x * point.x;
+}
+
+let total = 0;
+for (let i = 0; i < %d * 1000; i = i + 1) {
+  total = total + norm(Point(i));
+}
+"""
+}
+
+
+def _front_end(source: str) -> List[Stmt]:
+  statements = Parser(FastScanner(source).scan_tokens()).parse()
+  Resolver().resolve(statements)
+  TypeInferrer().infer(statements)
+  return statements
+
+
+def _run(source: str, threshold: int) -> Interpreter:
+  # a fresh tree each run, call counts and compiled bodies live on it
+  interpreter = Interpreter()
+  interpreter.jit.threshold = threshold
+  interpreter.interpret(_front_end(source))
+  return interpreter
+
+
+def main():
+  n = int(argv[1]) if len(argv) > 1 else 22
+
+  for name, source in WORKLOADS.items():
+    source = source % n
+    times: List[float] = []
+    for threshold in (0, THRESHOLD):
+      best = float("inf")
+      for _ in range(3):
+        begin = perf_counter()
+        interpreter = _run(source, threshold)
+        best = min(best, perf_counter() - begin)
+      times.append(best)
+
+    walked, tiered = times
+    print(
+      f"{name:6} walked {walked:7.3f} s  "
+      f"jit after {THRESHOLD} calls {tiered:7.3f} s  "
+      f"({walked / tiered:.2f}x)"
+    )
+    interpreter.jit.report(stdout)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,97 @@
+# usage (from src/): python -m tools.loopbench [n]
+#
+# hot numeric loops run once, so the jit never sees a call it could count,
+# on the tree-walker with loop specialization off and on, followed by
+# what the jit did with them
+
+from interpreter.interpreter import Interpreter
+from jit.jit import THRESHOLD
+from parser.parser import Parser
+from parser.stmt import Stmt
+from resolver.resolver import Resolver
+from resolver.typeinferrer import TypeInferrer
+from scanner.fastscanner import FastScanner
+from sys import argv, stdout
+from time import perf_counter
+from typing import List
+
+
+WORKLOADS = {
+  "kernel": """
+function kernel(n) {
+  let sum = 0;
+  let x = 0.5;
+  for (let i = 0; i < n * 1000; i = i + 1) {
+    let y = x * i + 3;
+    sum = sum + y * y / (i + 1) - x;
+  }
+  return sum;
+}
+kernel(%d);
+""",
+  "nested": """
+function triangle(n) {
+  let total = 0;
+  for (let i = 0; i < n * 10; i = i + 1) {
+    for (let j = 0; j < i; j = j + 1) {
+      if (j > i / 2) total = total + j;
+      else total = total - 1;
+    }
+  }
+  return total;
+}
+triangle(%d);
+""",
+  "script": """
+{
+  let count = 0;
+  let i = 0;
+  while (i < %d * 1000) {
+    if (i / 3 > count) count = count + 1;
+    i = i + 1;
+  }
+}
+"""
+}
+
+
+def _front_end(source: str) -> List[Stmt]:
+  statements = Parser(FastScanner(source).scan_tokens()).parse()
+  Resolver().resolve(statements)
+  TypeInferrer().infer(statements)
+  return statements
+
+
+def _run(source: str, threshold: int) -> Interpreter:
+  # a fresh tree each run, iteration counts and compiled loops live on it
+  interpreter = Interpreter()
+  interpreter.jit.threshold = threshold
+  interpreter.interpret(_front_end(source))
+  return interpreter
+
+
+def main():
+  n = int(argv[1]) if len(argv) > 1 else 100
+
+  for name, source in WORKLOADS.items():
+    source = source % n
+    times: List[float] = []
+    for threshold in (0, THRESHOLD):
+      best = float("inf")
+      for _ in range(3):
+        begin = perf_counter()
+        interpreter = _run(source, threshold)
+        best = min(best, perf_counter() - begin)
+      times.append(best)
+
+    walked, specialized = times
+    print(
+      f"{name:7} walked {walked:7.3f} s  "
+      f"specialized after {THRESHOLD} iterations {specialized:7.3f} s  "
+      f"({walked / specialized:.2f}x)"
+    )
+    interpreter.jit.report(stdout)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,184 @@
+# usage (from src/): python -m tools.methodbench [iterations]
+#
+# method lookup through flattened method tables against walking up the
+# superclasses, then a method-heavy tree-walker run followed by what its
+# property sites' inline caches went through
+
+from interpreter.interpreter import Interpreter
+from parser.expr import Expr, Get, Set, Super
+from parser.parser import Parser
+from parser.stmt import Stmt
+from resolver.resolver import Resolver
+from resolver.typeinferrer import TypeInferrer
+from scanner.fastscanner import FastScanner
+from sys import argv
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Union
+
+
+DEPTH = 8
+
+WORKLOAD = """
+class Figure {
+  construct(size) {
+    this.size = size;
+  }
+
+  area() {
+    return this.size * this.size;
+  }
+
+  scaled(factor) {
+    return this.area() * factor;
+  }
+}
+
+class Square < Figure {}
+
+class Circle < Figure {
+  area() {
+    return this.size * this.size * 3;
+  }
+}
+
+class Triangle < Figure {
+  construct(size) {
+    super.construct(size);
+    this.half = size / 2;
+  }
+
+  area() {
+    return this.half * this.size;
+  }
+}
+
+function run(n) {
+  let square = Square(2);
+  let figures = Circle(1);
+  let turn = 0;
+  let total = 0;
+
+  for (let i = 0; i < n; i = i + 1) {
+    total = total + square.scaled(2);
+
+    if (turn == 0) figures = Circle(1);
+    if (turn == 1) figures = Triangle(4);
+    if (turn == 2) figures = Square(3);
+    total = total + figures.area();
+
+    turn = turn + 1;
+    if (turn == 3) turn = 0;
+  }
+
+  return total;
+}
+run(%d);
+"""
+
+Site = Union[Get, Set, Super]
+
+
+class Methods:
+  # a class's own methods only, as every class kept them before flattening
+  def __init__(self, super_class: Optional["Methods"], names: List[str]):
+    self.super_class = super_class
+    self.methods: Dict[str, object] = {name: name for name in names}
+
+
+  def find_method(self, name: str) -> Optional[object]:
+    if name in self.methods:
+      return self.methods[name]
+
+    if self.super_class is not None:
+      return self.super_class.find_method(name)
+
+
+def _time(run: Callable[[], None]) -> float:
+  best = float("inf")
+  for _ in range(3):
+    begin = perf_counter()
+    run()
+    best = min(best, perf_counter() - begin)
+
+  return best
+
+
+def _sites(node: object, found: List[Site]):
+  if isinstance(node, list):
+    for element in node:
+      _sites(element, found)
+    return
+  if not isinstance(node, (Expr, Stmt)):
+    return
+
+  if isinstance(node, (Get, Set, Super)):
+    found.append(node)
+  for name in type(node).__slots__:
+    _sites(getattr(node, name), found)
+
+
+def _lookups(iterations: int):
+  chain: Optional[Methods] = None
+  for depth in range(DEPTH):
+    chain = Methods(chain, [f"method{depth}", "shared"])
+  leaf = chain
+  assert leaf is not None
+
+  flat: Dict[str, object] = {}
+  walk: Optional[Methods] = leaf
+  while walk is not None:
+    flat = {**walk.methods, **flat}
+    walk = walk.super_class
+
+  names = [f"method{depth}" for depth in range(DEPTH)] * (iterations // DEPTH)
+
+  def walked():
+    for name in names:
+      leaf.find_method(name)
+
+  def flattened():
+    for name in names:
+      flat.get(name)
+
+  before, after = _time(walked), _time(flattened)
+  print(f"{len(names)} lookups across {DEPTH} levels of superclasses")
+  print(f"walking superclasses: {before:7.3f} s")
+  print(f"flattened table:      {after:7.3f} s  ({before / after:.2f}x)")
+
+
+def main():
+  iterations = int(argv[1]) if len(argv) > 1 else 50_000
+  _lookups(iterations * 10)
+
+  interpreter = Interpreter()
+  statements = Parser(FastScanner(WORKLOAD % iterations).scan_tokens()).parse()
+  Resolver().resolve(statements)
+  TypeInferrer().infer(statements)
+
+  begin = perf_counter()
+  interpreter.interpret(statements)
+  print(
+    f"tree-walker, {iterations} iterations: "
+    f"{perf_counter() - begin:7.3f} s"
+  )
+
+  sites: List[Site] = []
+  _sites(statements, sites)
+  ran = [site for site in sites if site.misses > 0]
+  polymorphic = [site for site in ran if site.misses > 1]
+
+  print(
+    f"{len(sites)} property sites, {len(ran)} ran: "
+    f"{len(ran) - len(polymorphic)} monomorphic, "
+    f"{len(polymorphic)} polymorphic"
+  )
+  for site in sorted(polymorphic, key = lambda site: -site.misses):
+    name = site.method if isinstance(site, Super) else site.name
+    print(
+      f"  line {name.line:3} {type(site).__name__:5} "
+      f"'{name.lexeme}': cache filled {site.misses} times"
+    )
+
+
+if __name__ == "__main__":
+  main()
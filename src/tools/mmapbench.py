@@ -0,0 +1,105 @@
+# usage (from src/): python -m tools.mmapbench [megabytes]
+#
+# every input mode runs in its own interpreter process so that peak RSS
+# numbers don't bleed into each other
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from parser.parser import Parser
+from scanner.fastscanner import FastScanner
+from scanner.mappedscanner import MappedScanner
+from scanner.token import Token
+from time import perf_counter
+from typing import Iterator
+
+
+MODES = ("read", "stream", "mmap")
+
+# data-heavy: long string and number literals, few distinct identifiers
+LINE = (
+  "let record{0} = \"{1}\";"
+  " let weight{0} = {0}.5 * 3.25 + 1024.125;\n"
+)
+
+
+def generate(path: str, megabytes: int):
+  payload = "lorem ipsum dolor sit amet " * 8
+  target = megabytes * 1024 * 1024
+
+  with open(path, "w") as file:
+    file.write("print \"first statement\";\n")
+
+    written, index = 0, 0
+    while written < target:
+      line = LINE.format(index % 1000, payload)
+      file.write(line)
+      written += len(line)
+      index += 1
+
+
+def _tokens(mode: str, path: str) -> Iterator[Token]:
+  if mode == "read":
+    with open(path) as file:
+      source = file.read()
+    yield from FastScanner(source).iter_tokens()
+  elif mode == "stream":
+    with open(path) as file:
+      yield from FastScanner(file).iter_tokens()
+  else:
+    with MappedScanner(path) as scanner:
+      yield from scanner.iter_tokens()
+
+
+def measure(mode: str, path: str):
+  # declarations are parsed and dropped one by one, so what is left is the
+  # cost of getting the source and its tokens into the parser
+  begin = perf_counter()
+  parser = Parser(_tokens(mode, path))
+
+  parser.declaration()
+  first = perf_counter() - begin
+
+  count = 1
+  while not parser.is_at_end():
+    parser.declaration()
+    count += 1
+  total = perf_counter() - begin
+
+  rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+  print(
+    f"{mode:>6}: first statement {first * 1000:9.1f} ms  "
+    f"all {count} statements {total:7.2f} s  peak RSS {rss:8.1f} MiB"
+  )
+
+
+def main():
+  if len(sys.argv) == 4 and sys.argv[1] == "--measure":
+    measure(sys.argv[2], sys.argv[3])
+    return
+
+  megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+  handle, path = tempfile.mkstemp(suffix = ".tnt")
+  os.close(handle)
+  try:
+    generate(path, megabytes)
+    print(f"script: {os.path.getsize(path) / (1024 * 1024):.1f} MiB")
+
+    for mode in MODES:
+      subprocess.run(
+        [sys.executable, "-m", "tools.mmapbench", "--measure", mode, path],
+        check = True
+      )
+
+    # mapped pages count towards RSS while they are resident, but they are
+    # backed by the file and can be dropped by the kernel at any time
+    print("(mmap RSS includes file-backed pages of the mapped script)")
+  finally:
+    os.remove(path)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,45 @@
+# usage (from src/): python -m tools.parserbench [copies]
+#
+# tokens are scanned up front, only Parser.parse is timed
+
+from parser.parser import Parser
+from scanner.fastscanner import FastScanner
+from scanner.token import Token
+from sys import argv
+from time import perf_counter
+from typing import List
+
+
+SAMPLE = """
+// generated workload: expression-heavy code, few statements per operand
+let a = 1; let b = 2.5; let c = "x";
+print a + b * 3 - a / (b + 1) * -a;
+print !(a < b and b <= 3 or a == b) != (a >= 2 or !true);
+let d = ((a + 1) * (b - 2) / (a * b + 4)) - +a * (c == "x" or void == a);
+d = a = b + a * a - b * b / 2 + 1 - 2 + 3 - 4 + 5;
+print point.x * point.x + point.y * point.y + scale(point, 2).length();
+print f(a, b + 1, g(a * 2)(b), h().i.j(k, l).m) + 7 * (8 - 9) / 10;
+if (a > 1 and b < 2 or a == 1 and !(b != 2)) print a * b + c;
+"""
+
+
+def main():
+  copies = int(argv[1]) if len(argv) > 1 else 2000
+  tokens: List[Token] = FastScanner(SAMPLE * copies).scan_tokens()
+
+  best, statements = float("inf"), 0
+  for _ in range(3):
+    begin = perf_counter()
+    statements = len(Parser(tokens).parse())
+    best = min(best, perf_counter() - begin)
+
+  print(f"source: {len(tokens)} tokens, {statements} statements")
+  print(
+    f"Parser: {best:8.3f} s  "
+    f"{len(tokens) / best:12.0f} tokens/s  "
+    f"{statements / best:10.0f} statements/s"
+  )
+
+
+if __name__ == "__main__":
+  main()
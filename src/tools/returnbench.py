@@ -0,0 +1,101 @@
+# usage (from src/): python -m tools.returnbench [n]
+#
+# leaving a function body by raising an exception, as returns used to,
+# against handing a completion back up, then recursive fib on the
+# tree-walker with the jit off
+
+from interpreter.completion import Completion, RETURN
+from interpreter.interpreter import Interpreter
+from parser.parser import Parser
+from resolver.resolver import Resolver
+from resolver.typeinferrer import TypeInferrer
+from scanner.fastscanner import FastScanner
+from sys import argv
+from time import perf_counter
+from typing import Callable, Optional
+
+
+# statements between a function's body and its return statement, as in
+# a return nested in an if in a while
+DEPTH = 3
+
+WORKLOAD = """
+function fib(n) {
+  if (n < 2) return n;
+  return fib(n - 1) + fib(n - 2);
+}
+fib(%d);
+"""
+
+
+class ReturnTrickery(RuntimeError):
+  # how returns used to get out of a function body
+  def __init__(self, value: object):
+    super().__init__()
+    self.value = value
+
+
+def _time(run: Callable[[], None]) -> float:
+  best = float("inf")
+  for _ in range(3):
+    begin = perf_counter()
+    run()
+    best = min(best, perf_counter() - begin)
+
+  return best
+
+
+def _raising(depth: int):
+  if depth == 0:
+    raise ReturnTrickery(1.0)
+
+  try:
+    _raising(depth - 1)
+  finally:
+    pass
+
+
+def _completing(depth: int) -> Optional[Completion]:
+  if depth == 0:
+    return Completion(RETURN, 1.0)
+
+  completion = _completing(depth - 1)
+  if completion is not None:
+    return completion
+
+
+def main():
+  n = int(argv[1]) if len(argv) > 1 else 22
+  returns = 200_000
+
+  def raised():
+    for _ in range(returns):
+      try:
+        _raising(DEPTH)
+      except ReturnTrickery as e:
+        e.value
+
+  def completed():
+    for _ in range(returns):
+      completion = _completing(DEPTH)
+      if completion is not None:
+        completion.value
+
+  before, after = _time(raised), _time(completed)
+  print(f"{returns} returns from {DEPTH} statements deep")
+  print(f"raised:    {before:7.3f} s")
+  print(f"completed: {after:7.3f} s  ({before / after:.2f}x)")
+
+  interpreter = Interpreter()
+  interpreter.jit.threshold = 0
+  statements = Parser(FastScanner(WORKLOAD % n).scan_tokens()).parse()
+  Resolver().resolve(statements)
+  TypeInferrer().infer(statements)
+  print(
+    f"tree-walker, fib({n}): "
+    f"{_time(lambda: interpreter.interpret(statements)):7.3f} s"
+  )
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,77 @@
+# usage (from src/): python -m tools.scannerbench [copies]
+
+from scanner.fastscanner import FastScanner
+from scanner.scanner import Scanner
+from scanner.token import Token
+from sys import argv
+from time import perf_counter
+from typing import Callable, List, Tuple
+
+
+SAMPLE = """
+// generated workload: a bit of everything the scanner has to handle
+class Vector < Base {
+  construct(x, y) {
+    this.x = x;
+    this.y = y;
+  }
+
+  length() {
+    return sqrt(this.x * this.x + this.y * this.y);
+  }
+}
+
+function accumulate(limit) {
+  let total = 0;
+  for (let i = 0; i <= limit; i = i + 1) {
+    if (i != 3 and !(i >= 10) or i == 42) {
+      total = total + i / 2.5 - -1;
+    }
+  }
+  print "total: " + "multi
+line string";
+  return total;
+}
+"""
+
+
+def _signature(tokens: List[Token]) -> List[Tuple[object, ...]]:
+  return [
+    (token.type, token.lexeme, token.literal, token.line)
+    for token in tokens
+  ]
+
+
+def _time(scan: Callable[[], List[Token]]) -> Tuple[float, List[Token]]:
+  best, tokens = float("inf"), []
+  for _ in range(3):
+    begin = perf_counter()
+    tokens = scan()
+    best = min(best, perf_counter() - begin)
+
+  return best, tokens
+
+
+def main():
+  copies = int(argv[1]) if len(argv) > 1 else 2000
+  source = SAMPLE * copies
+  megabytes = len(source) / (1024 * 1024)
+
+  slow, expected = _time(lambda: Scanner(source).scan_tokens())
+  fast, actual = _time(lambda: FastScanner(source).scan_tokens())
+
+  if _signature(expected) != _signature(actual):
+    raise SystemExit("FastScanner output differs from Scanner")
+
+  print(f"source: {megabytes:.2f} MiB, {len(expected)} tokens")
+  for name, seconds in (("Scanner", slow), ("FastScanner", fast)):
+    print(
+      f"{name:>12}: {seconds:8.3f} s  "
+      f"{megabytes / seconds:7.2f} MiB/s  "
+      f"{len(expected) / seconds:12.0f} tokens/s"
+    )
+  print(f"     speedup: {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,119 @@
+# usage (from src/): python -m tools.shapebench [instances]
+#
+# memory and field access of instances laid out by shapes, against the
+# dict of fields every instance used to carry
+
+import tracemalloc
+from interpreter.callable import ClassObj
+from interpreter.instance import Instance
+from interpreter.interpreter import Interpreter
+from parser.parser import Parser
+from resolver.resolver import Resolver
+from resolver.typeinferrer import TypeInferrer
+from scanner.fastscanner import FastScanner
+from scanner.token import Token
+from scanner.tokentype import TokenType
+from sys import argv
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+
+FIELDS = ["x", "y", "z"]
+
+WORKLOAD = """
+class Point {
+  construct(x, y) {
+    this.x = x;
+    this.y = y;
+  }
+}
+
+function run(n) {
+  let total = 0;
+  for (let i = 0; i < n; i = i + 1) {
+    let point = Point(i, 1);
+    point.y = point.x + point.y;
+    total = total + point.y;
+  }
+  return total;
+}
+run(%d);
+"""
+
+
+class DictInstance:
+  # instances before shapes, kept for comparison
+  def __init__(self, class_obj: ClassObj):
+    self.class_obj = class_obj
+    self.fields: Dict[str, object] = {}
+
+
+  def get(self, name: Token):
+    if name.lexeme in self.fields:
+      return self.fields[name.lexeme]
+
+
+  def set(self, name: Token, value: object):
+    self.fields[name.lexeme] = value
+
+
+def _time(run: Callable[[], None]) -> float:
+  best = float("inf")
+  for _ in range(3):
+    begin = perf_counter()
+    run()
+    best = min(best, perf_counter() - begin)
+
+  return best
+
+
+def _build(
+  instance_class: type, count: int, names: List[Token]
+) -> Tuple[int, list]:
+  class_obj = ClassObj("Point", None, {})
+
+  tracemalloc.start()
+  instances = []
+  for _ in range(count):
+    instance = instance_class(class_obj)
+    for name in names:
+      instance.set(name, 1.0)
+    instances.append(instance)
+  retained, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+
+  return retained, instances
+
+
+def main():
+  count = int(argv[1]) if len(argv) > 1 else 100_000
+  names = [Token(TokenType.IDENTIFIER, name, None, 1) for name in FIELDS]
+
+  print(f"{count} instances with {len(FIELDS)} fields")
+  for label, instance_class in (
+    ("dict fields ", DictInstance), ("shaped slots", Instance)
+  ):
+    retained, instances = _build(instance_class, count, names)
+
+    def access():
+      for instance in instances:
+        for name in names:
+          instance.set(name, instance.get(name))
+
+    print(
+      f"{label}: {retained / count:6.1f} bytes/instance  "
+      f"get+set all {_time(access):7.3f} s"
+    )
+
+  interpreter = Interpreter()
+  statements = Parser(FastScanner(WORKLOAD % count).scan_tokens()).parse()
+  Resolver().resolve(statements)
+  TypeInferrer().infer(statements)
+  print(
+    f"tree-walker, {count} points built and read: "
+    f"{_time(lambda: interpreter.interpret(statements)):7.3f} s"
+  )
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,63 @@
+# usage (from src/): python -m tools.tailbench [depth]
+#
+# a loop written as tail recursion on the tree-walker, with and without
+# the jit, run far deeper than Python's recursion limit, next to the same
+# loop written with while
+
+from interpreter.interpreter import Interpreter
+from jit.jit import THRESHOLD
+from parser.parser import Parser
+from resolver.resolver import Resolver
+from resolver.typeinferrer import TypeInferrer
+from scanner.fastscanner import FastScanner
+from sys import argv, getrecursionlimit
+from time import perf_counter
+
+
+RECURSIVE = """
+function count(n, total) {
+  if (n == 0) return total;
+  return count(n - 1, total + n);
+}
+print count(%d, 0);
+"""
+
+ITERATIVE = """
+function count(n, total) {
+  while (n != 0) {
+    total = total + n;
+    n = n - 1;
+  }
+  return total;
+}
+print count(%d, 0);
+"""
+
+
+def _run(source: str, threshold: int) -> float:
+  interpreter = Interpreter()
+  interpreter.jit.threshold = threshold
+  statements = Parser(FastScanner(source).scan_tokens()).parse()
+  Resolver().resolve(statements)
+  TypeInferrer().infer(statements)
+
+  begin = perf_counter()
+  interpreter.interpret(statements)
+  return perf_counter() - begin
+
+
+def main():
+  depth = int(argv[1]) if len(argv) > 1 else 100_000
+  print(f"python recursion limit: {getrecursionlimit()}")
+
+  for label, source, threshold in (
+    ("tail calls, walked  ", RECURSIVE, 0),
+    ("tail calls, jit     ", RECURSIVE, THRESHOLD),
+    ("while loop, walked  ", ITERATIVE, 0)
+  ):
+    elapsed = _run(source % depth, threshold)
+    print(f"{label} {depth} iterations: {elapsed:7.3f} s")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,54 @@
+# usage (from src/): python -m tools.tokenmemory [copies]
+
+import tracemalloc
+from scanner.fastscanner import FastScanner
+from scanner.scanner import Scanner
+from scanner.tokentype import TokenType
+from sys import argv
+from tools.scannerbench import SAMPLE
+from typing import Callable, List, Optional, Union
+
+
+class DictToken:
+  # the token layout before slots and interning, kept for comparison
+  def __init__(
+    self,
+    token_type: TokenType,
+    lexeme: str,
+    literal: Optional[Union[str, float]],
+    line: int
+  ):
+    self.type = token_type
+    self.lexeme = lexeme
+    self.literal = literal
+    self.line = line
+
+
+def _retained_bytes(build: Callable[[], List[object]]) -> int:
+  tracemalloc.start()
+  tokens = build()
+  retained, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+
+  del tokens
+  return retained
+
+
+def main():
+  copies = int(argv[1]) if len(argv) > 1 else 200
+  source = SAMPLE * copies
+  count = len(FastScanner(source).scan_tokens())
+
+  before = _retained_bytes(lambda: [
+    DictToken(token.type, token.lexeme, token.literal, token.line)
+    for token in Scanner(source).scan_tokens()
+  ])
+  after = _retained_bytes(lambda: FastScanner(source).scan_tokens())
+
+  print(f"{count} tokens")
+  print(f"  dict tokens, copied lexemes: {before / count:6.1f} bytes/token")
+  print(f"slot tokens, interned lexemes: {after / count:6.1f} bytes/token")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,458 @@
+from enum import auto, Enum
+from math import copysign
+from parser.expr import (
+  Assign, Binary, Call, Expr, Get, Grouping, Literal,
+  Logical, Set, Super, This, Unary, Variable, Visitor as ExprVisitor
+)
+from parser.stmt import (
+  Block, Class, Expression, Function, If, Import, Let, Print,
+  Return, Stmt, Visitor as StmtVisitor, While
+)
+from scanner.token import Token
+from scanner.tokentype import TokenType
+from typing import Dict, List, Optional, Tuple
+from vm.objects import CodeObject
+from vm.opcode import (
+  ADD, CALL, CHECK_FIELDS, CHECK_SUPERCLASS, CLASS, CLOSE_UPVALUE, CLOSURE,
+  CONSTANT, DEFINE_GLOBAL, DIVIDE, EQUAL, FALSE, GET_GLOBAL, GET_LOCAL,
+  GET_PROPERTY, GET_SUPER, GET_UPVALUE, GREATER, GREATER_EQUAL, INHERIT,
+  JUMP, JUMP_IF_FALSE, LESS, LESS_EQUAL, LOOP, METHOD, MULTIPLY, NEGATE,
+  NIL, NOT, NOT_EQUAL, POP, POSITIVE, PRINT, RETURN, SET_GLOBAL, SET_LOCAL,
+  SET_PROPERTY, SET_UPVALUE, SUBTRACT, TRUE
+)
+
+
+class FunctionKind(Enum):
+  SCRIPT = auto()
+  FUNCTION = auto()
+  METHOD = auto()
+  INITIALIZER = auto()
+
+
+BINARY_OPCODES: Dict[TokenType, int] = {
+  TokenType.PLUS: ADD,
+  TokenType.MINUS: SUBTRACT,
+  TokenType.STAR: MULTIPLY,
+  TokenType.SLASH: DIVIDE,
+  TokenType.LESS: LESS,
+  TokenType.LESS_EQUAL: LESS_EQUAL,
+  TokenType.GREATER: GREATER,
+  TokenType.GREATER_EQUAL: GREATER_EQUAL,
+  TokenType.EQUAL_EQUAL: EQUAL,
+  TokenType.BANG_EQUAL: NOT_EQUAL,
+}
+
+UNARY_OPCODES: Dict[TokenType, int] = {
+  TokenType.BANG: NOT,
+  TokenType.MINUS: NEGATE,
+  TokenType.PLUS: POSITIVE,
+}
+
+
+class Local:
+  def __init__(self, name: str, depth: int):
+    self.name = name
+    self.depth = depth
+    self.is_captured = False
+
+
+class FunctionState:
+  # bookkeeping for the function currently being compiled; locals mirror
+  # the stack slots of its frame, slot 0 holds the callee or 'this'
+  def __init__(
+    self,
+    enclosing: Optional["FunctionState"],
+    kind: FunctionKind,
+    code: CodeObject
+  ):
+    self.enclosing = enclosing
+    self.kind = kind
+    self.code = code
+    self.scope_depth = 0
+    self.upvalues: List[Tuple[bool, int]] = []
+    self.constants: Dict[Tuple[object, ...], int] = {}
+
+    receiver = "this" if kind in (
+      FunctionKind.METHOD, FunctionKind.INITIALIZER
+    ) else ""
+    self.locals: List[Local] = [Local(receiver, 0)]
+
+
+class Compiler(ExprVisitor[None], StmtVisitor[None]):
+  # turns a resolved program into bytecode; scoping follows the same rules
+  # as Resolver, but locals become stack slots and captured locals upvalues
+  def __init__(self):
+    self.state = FunctionState(
+      None, FunctionKind.SCRIPT, CodeObject("script", 0)
+    )
+
+
+  def compile(self, statements: List[Stmt]) -> CodeObject:
+    for statement in statements:
+      statement.accept(self)
+
+    self._emit_return(None)
+    return self.state.code
+
+
+  def visit_block_stmt(self, stmt: Block):
+    self._begin_scope()
+    for statement in stmt.statements:
+      statement.accept(self)
+    self._end_scope()
+
+
+  def visit_class_stmt(self, stmt: Class):
+    name = self._constant(stmt.name.lexeme)
+    is_global = self.state.scope_depth == 0
+
+    if not is_global:
+      self._emit(NIL, None)
+      self._add_local(stmt.name.lexeme)
+
+    if stmt.super_class is not None:
+      self._compile(stmt.super_class)
+      self._emit(CHECK_SUPERCLASS, stmt.super_class.name)
+
+      self._begin_scope()
+      self._add_local("super")
+
+    if is_global:
+      self._emit(NIL, None)
+      self._emit(DEFINE_GLOBAL, stmt.name, name)
+
+    self._emit(CLASS, stmt.name, name)
+    if stmt.super_class is not None:
+      self._emit(INHERIT, None)
+
+    for method in stmt.methods:
+      kind = FunctionKind.METHOD
+      if method.name.lexeme == "construct":
+        kind = FunctionKind.INITIALIZER
+
+      self._function(method, kind)
+      self._emit(METHOD, method.name, self._constant(method.name.lexeme))
+
+    self._set_variable(stmt.name)
+    self._emit(POP, None)
+
+    if stmt.super_class is not None:
+      self._end_scope()
+
+
+  def visit_expression_stmt(self, stmt: Expression):
+    self._compile(stmt.expression)
+    self._emit(POP, None)
+
+
+  def visit_function_stmt(self, stmt: Function):
+    if self.state.scope_depth > 0:
+      # declared before the body is compiled so the function can recurse
+      self._add_local(stmt.name.lexeme)
+      self._function(stmt, FunctionKind.FUNCTION)
+      return
+
+    self._function(stmt, FunctionKind.FUNCTION)
+    self._emit(DEFINE_GLOBAL, stmt.name, self._constant(stmt.name.lexeme))
+
+
+  def visit_if_stmt(self, stmt: If):
+    self._compile(stmt.condition)
+
+    then_jump = self._emit_jump(JUMP_IF_FALSE, None)
+    self._emit(POP, None)
+    stmt.then_branch.accept(self)
+
+    else_jump = self._emit_jump(JUMP, None)
+    self._patch_jump(then_jump)
+    self._emit(POP, None)
+
+    if stmt.else_branch is not None:
+      stmt.else_branch.accept(self)
+
+    self._patch_jump(else_jump)
+
+
+  def visit_import_stmt(self, stmt: Import):
+    # ModuleLoader.link has already put the module's statements in its place
+    pass
+
+
+  def visit_let_stmt(self, stmt: Let):
+    if stmt.initializer is not None:
+      self._compile(stmt.initializer)
+    else:
+      self._emit(NIL, None)
+
+    if self.state.scope_depth > 0:
+      self._add_local(stmt.name.lexeme)
+    else:
+      self._emit(DEFINE_GLOBAL, stmt.name, self._constant(stmt.name.lexeme))
+
+
+  def visit_print_stmt(self, stmt: Print):
+    self._compile(stmt.expression)
+    self._emit(PRINT, None)
+
+
+  def visit_return_stmt(self, stmt: Return):
+    self._emit_return(stmt.value)
+
+
+  def visit_while_stmt(self, stmt: While):
+    loop_start = len(self.state.code.code)
+
+    self._compile(stmt.condition)
+    exit_jump = self._emit_jump(JUMP_IF_FALSE, None)
+    self._emit(POP, None)
+
+    stmt.body.accept(self)
+
+    self._emit(LOOP, None, len(self.state.code.code) + 2 - loop_start)
+
+    self._patch_jump(exit_jump)
+    self._emit(POP, None)
+
+
+  def visit_assign_expr(self, expr: Assign):
+    self._compile(expr.value)
+    self._set_variable(expr.name)
+
+
+  def visit_binary_expr(self, expr: Binary):
+    self._compile(expr.left)
+    self._compile(expr.right)
+    self._emit(BINARY_OPCODES[expr.operator.type], expr.operator)
+
+
+  def visit_calL_expr(self, expr: Call):
+    self._compile(expr.callee)
+    for argument in expr.arguments:
+      self._compile(argument)
+
+    self._emit(CALL, expr.paren, len(expr.arguments))
+
+
+  def visit_get_expr(self, expr: Get):
+    self._compile(expr.obj)
+    self._emit(GET_PROPERTY, expr.name, self._constant(expr.name.lexeme))
+
+
+  def visit_grouping_expr(self, expr: Grouping):
+    self._compile(expr.expression)
+
+
+  def visit_literal_expr(self, expr: Literal):
+    if expr.value is None:
+      self._emit(NIL, None)
+    elif expr.value is True:
+      self._emit(TRUE, None)
+    elif expr.value is False:
+      self._emit(FALSE, None)
+    else:
+      self._emit(CONSTANT, None, self._constant(expr.value))
+
+
+  def visit_logical_expr(self, expr: Logical):
+    self._compile(expr.left)
+
+    if expr.operator.type == TokenType.OR:
+      else_jump = self._emit_jump(JUMP_IF_FALSE, None)
+      end_jump = self._emit_jump(JUMP, None)
+      self._patch_jump(else_jump)
+    else:
+      end_jump = self._emit_jump(JUMP_IF_FALSE, None)
+
+    self._emit(POP, None)
+    self._compile(expr.right)
+    self._patch_jump(end_jump)
+
+
+  def visit_set_expr(self, expr: Set):
+    # the target is checked before the value is evaluated, just like the
+    # tree-walker does it
+    self._compile(expr.obj)
+    self._emit(CHECK_FIELDS, expr.name)
+    self._compile(expr.value)
+    self._emit(SET_PROPERTY, expr.name, self._constant(expr.name.lexeme))
+
+
+  def visit_super_expr(self, expr: Super):
+    self._get_variable(Token(TokenType.THIS, "this", None, expr.keyword.line))
+    self._get_variable(expr.keyword)
+    self._emit(GET_SUPER, expr.method, self._constant(expr.method.lexeme))
+
+
+  def visit_this_expr(self, expr: This):
+    self._get_variable(expr.keyword)
+
+
+  def visit_unary_expr(self, expr: Unary):
+    self._compile(expr.right)
+    self._emit(UNARY_OPCODES[expr.operator.type], expr.operator)
+
+
+  def visit_variable_expr(self, expr: Variable):
+    self._get_variable(expr.name)
+
+
+  def _compile(self, expr: Expr):
+    expr.accept(self)
+
+
+  def _function(self, function: Function, kind: FunctionKind):
+    code = CodeObject(function.name.lexeme, len(function.params))
+    self.state = FunctionState(self.state, kind, code)
+    self._begin_scope()
+
+    for param in function.params:
+      self._add_local(param.lexeme)
+
+    for statement in function.body:
+      statement.accept(self)
+
+    self._emit_return(None)
+
+    state = self.state
+    self.state = state.enclosing # type: ignore
+
+    code.upvalue_count = len(state.upvalues)
+    self._emit(CLOSURE, function.name, self._constant(code))
+    for is_local, index in state.upvalues:
+      self._emit_operand(1 if is_local else 0)
+      self._emit_operand(index)
+
+
+  def _emit_return(self, value: Optional[Expr]):
+    if self.state.kind == FunctionKind.INITIALIZER:
+      self._emit(GET_LOCAL, None, 0)
+    elif value is not None:
+      self._compile(value)
+    else:
+      self._emit(NIL, None)
+
+    self._emit(RETURN, None)
+
+
+  def _get_variable(self, name: Token):
+    slot = self._resolve_local(self.state, name.lexeme)
+    if slot is not None:
+      self._emit(GET_LOCAL, name, slot)
+      return
+
+    index = self._resolve_upvalue(self.state, name.lexeme)
+    if index is not None:
+      self._emit(GET_UPVALUE, name, index)
+      return
+
+    self._emit(GET_GLOBAL, name, self._constant(name.lexeme))
+
+
+  def _set_variable(self, name: Token):
+    slot = self._resolve_local(self.state, name.lexeme)
+    if slot is not None:
+      self._emit(SET_LOCAL, name, slot)
+      return
+
+    index = self._resolve_upvalue(self.state, name.lexeme)
+    if index is not None:
+      self._emit(SET_UPVALUE, name, index)
+      return
+
+    self._emit(SET_GLOBAL, name, self._constant(name.lexeme))
+
+
+  def _resolve_local(self, state: FunctionState, name: str) -> Optional[int]:
+    for slot in range(len(state.locals) - 1, -1, -1):
+      if state.locals[slot].name == name:
+        return slot
+
+    return None
+
+
+  def _resolve_upvalue(
+    self, state: FunctionState, name: str
+  ) -> Optional[int]:
+    if state.enclosing is None:
+      return None
+
+    slot = self._resolve_local(state.enclosing, name)
+    if slot is not None:
+      state.enclosing.locals[slot].is_captured = True
+      return self._add_upvalue(state, True, slot)
+
+    index = self._resolve_upvalue(state.enclosing, name)
+    if index is not None:
+      return self._add_upvalue(state, False, index)
+
+    return None
+
+
+  def _add_upvalue(
+    self, state: FunctionState, is_local: bool, index: int
+  ) -> int:
+    upvalue = (is_local, index)
+    if upvalue in state.upvalues:
+      return state.upvalues.index(upvalue)
+
+    state.upvalues.append(upvalue)
+    return len(state.upvalues) - 1
+
+
+  def _add_local(self, name: str):
+    self.state.locals.append(Local(name, self.state.scope_depth))
+
+
+  def _begin_scope(self):
+    self.state.scope_depth += 1
+
+
+  def _end_scope(self):
+    state = self.state
+    state.scope_depth -= 1
+
+    while state.locals and state.locals[-1].depth > state.scope_depth:
+      if state.locals[-1].is_captured:
+        self._emit(CLOSE_UPVALUE, None)
+      else:
+        self._emit(POP, None)
+      state.locals.pop()
+
+
+  def _constant(self, value: object) -> int:
+    # keyed by type as well, 1.0 == True must not make them share a slot,
+    # and by sign for numbers, nor must 0.0 == -0.0
+    key: Tuple[object, ...] = (type(value), value)
+    if type(value) is float:
+      key += (copysign(1.0, value),)
+    index = self.state.constants.get(key)
+    if index is None:
+      constants = self.state.code.constants
+      index = self.state.constants[key] = len(constants)
+      constants.append(value)
+
+    return index
+
+
+  def _emit(self, opcode: int, token: Optional[Token], *operands: int):
+    code = self.state.code
+    code.code.append(opcode)
+    code.tokens.append(token)
+
+    for operand in operands:
+      self._emit_operand(operand)
+
+
+  def _emit_operand(self, operand: int):
+    code = self.state.code
+    code.code.append(operand)
+    code.tokens.append(None)
+
+
+  def _emit_jump(self, opcode: int, token: Optional[Token]) -> int:
+    self._emit(opcode, token, 0)
+    return len(self.state.code.code) - 1
+
+
+  def _patch_jump(self, offset: int):
+    self.state.code.code[offset] = len(self.state.code.code) - offset - 1
@@ -0,0 +1,77 @@
+from scanner.token import Token
+from typing import Dict, List, Optional
+
+
+class CodeObject:
+  # the compiled form of one function (or of a whole script)
+  def __init__(self, name: str, arity: int):
+    self.name = name
+    self.arity = arity
+    self.upvalue_count = 0
+    self.code: List[int] = []
+    self.constants: List[object] = []
+    # parallel to code, holds the token to blame at every opcode position
+    self.tokens: List[Optional[Token]] = []
+
+
+  def __repr__(self) -> str:
+    return f"<function '{self.name}'>"
+
+
+class Upvalue:
+  # refers to a slot of the VM stack until that slot goes away, then it
+  # takes over the value
+  __slots__ = ("index", "value", "is_open")
+
+  def __init__(self, index: int):
+    self.index = index
+    self.value: object = None
+    self.is_open = True
+
+
+class Closure:
+  __slots__ = ("code", "upvalues")
+
+  def __init__(self, code: CodeObject, upvalues: List[Upvalue]):
+    self.code = code
+    self.upvalues = upvalues
+
+
+  def __repr__(self) -> str:
+    return f"<function '{self.code.name}'>"
+
+
+class VmClass:
+  def __init__(self, name: str):
+    self.name = name
+    # inherited methods are copied down when the class is created, classes
+    # can't change afterwards
+    self.methods: Dict[str, Closure] = {}
+
+
+  def __repr__(self) -> str:
+    return f"<class '{self.name}'>"
+
+
+class VmInstance:
+  __slots__ = ("class_obj", "fields")
+
+  def __init__(self, class_obj: VmClass):
+    self.class_obj = class_obj
+    self.fields: Dict[str, object] = {}
+
+
+  def __repr__(self) -> str:
+    return f"<instance of '{self.class_obj.name}'>"
+
+
+class BoundMethod:
+  __slots__ = ("receiver", "method")
+
+  def __init__(self, receiver: VmInstance, method: Closure):
+    self.receiver = receiver
+    self.method = method
+
+
+  def __repr__(self) -> str:
+    return self.method.__repr__()
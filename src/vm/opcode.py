@@ -0,0 +1,56 @@
+# instructions are plain ints laid out in a flat list, each opcode followed
+# by its operands (if any); the numbering is what the VM loop compares
+# against, so keep the most frequent instructions first
+
+OPCODE_NAMES = [
+  "GET_LOCAL",        # slot
+  "SET_LOCAL",        # slot
+  "CONSTANT",         # constant index
+  "GET_GLOBAL",       # name constant index
+  "SET_GLOBAL",       # name constant index
+  "DEFINE_GLOBAL",    # name constant index
+  "GET_UPVALUE",      # upvalue index
+  "SET_UPVALUE",      # upvalue index
+  "POP",
+  "JUMP_IF_FALSE",    # forward offset, leaves the condition on the stack
+  "JUMP",             # forward offset
+  "LOOP",             # backward offset
+  "CALL",             # argument count
+  "RETURN",
+  "ADD",
+  "SUBTRACT",
+  "MULTIPLY",
+  "DIVIDE",
+  "LESS",
+  "LESS_EQUAL",
+  "GREATER",
+  "GREATER_EQUAL",
+  "EQUAL",
+  "NOT_EQUAL",
+  "NOT",
+  "NEGATE",
+  "POSITIVE",
+  "NIL",
+  "TRUE",
+  "FALSE",
+  "GET_PROPERTY",     # name constant index
+  "CHECK_FIELDS",
+  "SET_PROPERTY",     # name constant index
+  "GET_SUPER",        # name constant index
+  "PRINT",
+  "CLOSURE",          # function constant index, then (is_local, index) pairs
+  "CLOSE_UPVALUE",
+  "CLASS",            # name constant index
+  "CHECK_SUPERCLASS",
+  "INHERIT",
+  "METHOD",           # name constant index
+]
+
+(
+  GET_LOCAL, SET_LOCAL, CONSTANT, GET_GLOBAL, SET_GLOBAL, DEFINE_GLOBAL,
+  GET_UPVALUE, SET_UPVALUE, POP, JUMP_IF_FALSE, JUMP, LOOP, CALL, RETURN,
+  ADD, SUBTRACT, MULTIPLY, DIVIDE, LESS, LESS_EQUAL, GREATER, GREATER_EQUAL,
+  EQUAL, NOT_EQUAL, NOT, NEGATE, POSITIVE, NIL, TRUE, FALSE, GET_PROPERTY,
+  CHECK_FIELDS, SET_PROPERTY, GET_SUPER, PRINT, CLOSURE, CLOSE_UPVALUE,
+  CLASS, CHECK_SUPERCLASS, INHERIT, METHOD
+) = range(len(OPCODE_NAMES))
@@ -0,0 +1,395 @@
+from errors.executionerror import ExecutionError
+from interpreter.callable import Callable
+from interpreter.stringify import stringify
+from logger.logger import Logger
+from natives.clock import ClockFn
+from parser.stmt import Stmt
+from scanner.token import Token
+from typing import Any, cast, Dict, List, Optional, Tuple
+from vm.compiler import Compiler
+from vm.objects import (
+  BoundMethod, Closure, CodeObject, Upvalue, VmClass, VmInstance
+)
+from vm.opcode import (
+  ADD, CALL, CHECK_FIELDS, CHECK_SUPERCLASS, CLASS, CLOSE_UPVALUE, CLOSURE,
+  CONSTANT, DEFINE_GLOBAL, DIVIDE, EQUAL, FALSE, GET_GLOBAL, GET_LOCAL,
+  GET_PROPERTY, GET_SUPER, GET_UPVALUE, GREATER, GREATER_EQUAL, INHERIT,
+  JUMP, JUMP_IF_FALSE, LESS, LESS_EQUAL, LOOP, METHOD, MULTIPLY, NEGATE,
+  NIL, NOT, NOT_EQUAL, POP, POSITIVE, PRINT, RETURN, SET_GLOBAL, SET_LOCAL,
+  SET_PROPERTY, SET_UPVALUE, SUBTRACT, TRUE
+)
+
+
+# TNT calls don't nest Python frames here, this only stops runaway recursion
+MAX_FRAMES = 100_000
+
+Frame = Tuple[Closure, int, int]
+
+
+class VM:
+  def __init__(self):
+    self.globals: Dict[str, object] = {"clock": ClockFn()}
+    self.stack: List[Any] = []
+    self.frames: List[Frame] = []
+    # sorted by stack index, innermost last
+    self.open_upvalues: List[Upvalue] = []
+
+
+  def interpret(self, statements: List[Stmt]):
+    code = Compiler().compile(statements)
+
+    try:
+      self.stack.append(Closure(code, []))
+      self._run()
+    except ExecutionError as e:
+      Logger.execution_error(e)
+      self.stack.clear()
+      self.frames.clear()
+      self.open_upvalues.clear()
+
+
+  def _run(self):
+    stack = self.stack
+    push = stack.append
+    pop = stack.pop
+    frames = self.frames
+    global_values = self.globals
+    is_truthy = self._is_truthy
+
+    closure: Closure = stack[-1]
+    code_obj = closure.code
+    code, constants = code_obj.code, code_obj.constants
+    upvalues = closure.upvalues
+    base, ip = len(stack) - 1, 0
+
+    while True:
+      op = code[ip]
+      ip += 1
+
+      if op == GET_LOCAL:
+        push(stack[base + code[ip]])
+        ip += 1
+
+      elif op == SET_LOCAL:
+        stack[base + code[ip]] = stack[-1]
+        ip += 1
+
+      elif op == CONSTANT:
+        push(constants[code[ip]])
+        ip += 1
+
+      elif op == GET_GLOBAL:
+        name = constants[code[ip]]
+        if name not in global_values:
+          raise ExecutionError(
+            code_obj.tokens[ip - 1], f"Undefined variable '{name}'."
+          )
+        push(global_values[name])
+        ip += 1
+
+      elif op == SET_GLOBAL:
+        name = constants[code[ip]]
+        if name not in global_values:
+          raise ExecutionError(
+            code_obj.tokens[ip - 1], f"Undefined variable '{name}'."
+          )
+        global_values[name] = stack[-1]
+        ip += 1
+
+      elif op == DEFINE_GLOBAL:
+        global_values[constants[code[ip]]] = pop()
+        ip += 1
+
+      elif op == GET_UPVALUE:
+        upvalue = upvalues[code[ip]]
+        push(stack[upvalue.index] if upvalue.is_open else upvalue.value)
+        ip += 1
+
+      elif op == SET_UPVALUE:
+        upvalue = upvalues[code[ip]]
+        if upvalue.is_open:
+          stack[upvalue.index] = stack[-1]
+        else:
+          upvalue.value = stack[-1]
+        ip += 1
+
+      elif op == POP:
+        pop()
+
+      elif op == JUMP_IF_FALSE:
+        if is_truthy(stack[-1]):
+          ip += 1
+        else:
+          ip += code[ip] + 1
+
+      elif op == JUMP:
+        ip += code[ip] + 1
+
+      elif op == LOOP:
+        ip -= code[ip] - 1
+
+      elif op == CALL:
+        count = code[ip]
+        ip += 1
+        callee = stack[-1 - count]
+
+        if type(callee) is BoundMethod:
+          stack[-1 - count] = callee.receiver
+          callee = callee.method
+        elif type(callee) is VmClass:
+          stack[-1 - count] = VmInstance(callee)
+          initializer = callee.methods.get("construct")
+          if initializer is None:
+            if count != 0:
+              raise ExecutionError(
+                code_obj.tokens[ip - 2],
+                f"Expected 0 arguments but got {count}."
+              )
+            continue
+          callee = initializer
+
+        if type(callee) is Closure:
+          if count != callee.code.arity:
+            raise ExecutionError(
+              code_obj.tokens[ip - 2],
+              f"Expected {callee.code.arity} arguments but got {count}."
+            )
+          if len(frames) == MAX_FRAMES:
+            raise ExecutionError(code_obj.tokens[ip - 2], "Stack overflow.")
+
+          frames.append((closure, base, ip))
+          closure = callee
+          code_obj = closure.code
+          code, constants = code_obj.code, code_obj.constants
+          upvalues = closure.upvalues
+          base, ip = len(stack) - 1 - count, 0
+        elif isinstance(callee, Callable):
+          if count != callee.arity():
+            raise ExecutionError(
+              code_obj.tokens[ip - 2],
+              f"Expected {callee.arity()} arguments but got {count}."
+            )
+          arguments = stack[len(stack) - count : ]
+          del stack[len(stack) - 1 - count : ]
+          push(callee.call(self, arguments)) # type: ignore
+        else:
+          raise ExecutionError(
+            code_obj.tokens[ip - 2], "Can only call functions and classes."
+          )
+
+      elif op == RETURN:
+        result = pop()
+        self._close_upvalues(base)
+        del stack[base : ]
+
+        if not frames:
+          return
+
+        push(result)
+        closure, base, ip = frames.pop()
+        code_obj = closure.code
+        code, constants = code_obj.code, code_obj.constants
+        upvalues = closure.upvalues
+
+      elif op == ADD:
+        right = pop()
+        left = stack[-1]
+        if type(left) is float and type(right) is float:
+          stack[-1] = left + right
+        elif isinstance(left, str) and isinstance(right, str):
+          stack[-1] = left + right
+        else:
+          raise ExecutionError(
+            code_obj.tokens[ip - 1],
+            "Operands must be two numbers or two strings."
+          )
+
+      elif op == SUBTRACT:
+        right = pop()
+        left = stack[-1]
+        self._check_number_operands(code_obj.tokens[ip - 1], left, right)
+        stack[-1] = left - right
+
+      elif op == MULTIPLY:
+        right = pop()
+        left = stack[-1]
+        self._check_number_operands(code_obj.tokens[ip - 1], left, right)
+        stack[-1] = left * right
+
+      elif op == DIVIDE:
+        right = pop()
+        left = stack[-1]
+        self._check_number_operands(code_obj.tokens[ip - 1], left, right)
+        stack[-1] = left / right
+
+      elif op == LESS:
+        right = pop()
+        left = stack[-1]
+        self._check_number_operands(code_obj.tokens[ip - 1], left, right)
+        stack[-1] = left < right
+
+      elif op == LESS_EQUAL:
+        right = pop()
+        left = stack[-1]
+        self._check_number_operands(code_obj.tokens[ip - 1], left, right)
+        stack[-1] = left <= right
+
+      elif op == GREATER:
+        right = pop()
+        left = stack[-1]
+        self._check_number_operands(code_obj.tokens[ip - 1], left, right)
+        stack[-1] = left > right
+
+      elif op == GREATER_EQUAL:
+        right = pop()
+        left = stack[-1]
+        self._check_number_operands(code_obj.tokens[ip - 1], left, right)
+        stack[-1] = left >= right
+
+      elif op == EQUAL:
+        right = pop()
+        stack[-1] = stack[-1] == right
+
+      elif op == NOT_EQUAL:
+        right = pop()
+        stack[-1] = stack[-1] != right
+
+      elif op == NOT:
+        stack[-1] = not is_truthy(stack[-1])
+
+      elif op == NEGATE:
+        if type(stack[-1]) is not float:
+          raise ExecutionError(
+            code_obj.tokens[ip - 1], "Operand must be a number."
+          )
+        stack[-1] = -stack[-1]
+
+      elif op == POSITIVE:
+        if type(stack[-1]) is not float:
+          raise ExecutionError(
+            code_obj.tokens[ip - 1], "Operand must be a number."
+          )
+
+      elif op == NIL:
+        push(None)
+
+      elif op == TRUE:
+        push(True)
+
+      elif op == FALSE:
+        push(False)
+
+      elif op == GET_PROPERTY:
+        obj = stack[-1]
+        name = constants[code[ip]]
+        if type(obj) is not VmInstance:
+          raise ExecutionError(
+            code_obj.tokens[ip - 1], "Only instances have properties."
+          )
+
+        if name in obj.fields:
+          stack[-1] = obj.fields[name]
+        elif name in obj.class_obj.methods:
+          stack[-1] = BoundMethod(obj, obj.class_obj.methods[name])
+        else:
+          raise ExecutionError(
+            code_obj.tokens[ip - 1], f"Undefined property '{name}'."
+          )
+        ip += 1
+
+      elif op == CHECK_FIELDS:
+        if type(stack[-1]) is not VmInstance:
+          raise ExecutionError(
+            code_obj.tokens[ip - 1], "Only instances have fields."
+          )
+
+      elif op == SET_PROPERTY:
+        value = pop()
+        stack[-1].fields[constants[code[ip]]] = value
+        stack[-1] = value
+        ip += 1
+
+      elif op == GET_SUPER:
+        super_class = pop()
+        name = constants[code[ip]]
+        method = super_class.methods.get(name)
+        if method is None:
+          raise ExecutionError(
+            code_obj.tokens[ip - 1], f"Undefined property '{name}'."
+          )
+        stack[-1] = BoundMethod(stack[-1], method)
+        ip += 1
+
+      elif op == PRINT:
+        print(stringify(pop()))
+
+      elif op == CLOSURE:
+        function = cast(CodeObject, constants[code[ip]])
+        ip += 1
+
+        captured: List[Upvalue] = []
+        for _ in range(function.upvalue_count):
+          is_local, index = code[ip], code[ip + 1]
+          ip += 2
+          if is_local:
+            captured.append(self._capture_upvalue(base + index))
+          else:
+            captured.append(upvalues[index])
+
+        push(Closure(function, captured))
+
+      elif op == CLOSE_UPVALUE:
+        self._close_upvalues(len(stack) - 1)
+        pop()
+
+      elif op == CLASS:
+        push(VmClass(constants[code[ip]]))
+        ip += 1
+
+      elif op == CHECK_SUPERCLASS:
+        if type(stack[-1]) is not VmClass:
+          raise ExecutionError(
+            code_obj.tokens[ip - 1], "Superclass must be a class."
+          )
+
+      elif op == INHERIT:
+        stack[-1].methods.update(stack[-2].methods)
+
+      elif op == METHOD:
+        method = pop()
+        stack[-1].methods[constants[code[ip]]] = method
+        ip += 1
+
+
+  def _capture_upvalue(self, index: int) -> Upvalue:
+    for upvalue in reversed(self.open_upvalues):
+      if upvalue.index == index:
+        return upvalue
+      if upvalue.index < index:
+        break
+
+    created = Upvalue(index)
+    self.open_upvalues.append(created)
+    self.open_upvalues.sort(key = lambda upvalue: upvalue.index)
+    return created
+
+
+  def _close_upvalues(self, last: int):
+    open_upvalues = self.open_upvalues
+    while open_upvalues and open_upvalues[-1].index >= last:
+      upvalue = open_upvalues.pop()
+      upvalue.value = self.stack[upvalue.index]
+      upvalue.is_open = False
+
+
+  def _is_truthy(self, obj: Any) -> bool:
+    return obj is not None and obj is not False
+
+
+  def _check_number_operands(
+    self, operator: Optional[Token], left: Any, right: Any
+  ):
+    if type(left) is float and type(right) is float:
+      return
+
+    raise ExecutionError(operator, "Operands must be numbers.") # type: ignore